@@ -0,0 +1,186 @@
+import json
+import re
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from signals import load_dataframe
+import logging
+
+DEFAULT_HORIZONS = ["5s", "1m", "5m", "15m"]
+
+HORIZON_UNITS = {"ms": "ms", "s": "s", "m": "min", "h": "h", "d": "D"}
+
+def parse_horizon(horizon):
+    """'5s', '1m', '4h' (Binance-style units), a number of seconds or a Timedelta."""
+    if isinstance(horizon, pd.Timedelta):
+        return horizon
+    if isinstance(horizon, (int, float)):
+        return pd.Timedelta(seconds=horizon)
+    match = re.fullmatch(r"(\d+)(ms|s|m|h|d)", str(horizon).strip())
+    if not match:
+        raise ValueError(f"Unsupported horizon '{horizon}'. Use e.g. 5s, 1m, 5m or 1h")
+    return pd.Timedelta(int(match.group(1)), unit=HORIZON_UNITS[match.group(2)])
+
+def signals_to_frame(signals):
+    """Signal dicts (as produced by `evaluate_strategies`) as a DataFrame with
+    one boolean column per condition, prefixed `condition:`."""
+    if isinstance(signals, pd.DataFrame):
+        return signals
+    signals = list(signals)
+    frame = pd.DataFrame({
+        "timestamp": pd.to_datetime([signal.get("timestamp") for signal in signals]),
+        "price": np.array([signal.get("price") for signal in signals], dtype=np.float64),
+        "symbol": [signal.get("symbol") for signal in signals],
+        "strategy": [signal.get("strategy") for signal in signals],
+        "signal": [signal.get("signal") for signal in signals],
+        "direction": [signal.get("direction") for signal in signals],
+    })
+    names = sorted({name for signal in signals for name in signal.get("conditions", {})})
+    for name in names:
+        frame[f"condition:{name}"] = np.fromiter(
+            (bool(signal.get("conditions", {}).get(name, False)) for signal in signals), dtype=bool, count=len(signals)
+        )
+    return frame
+
+def range_extrema(values, start, stop, maximum=True):
+    """max (or min) of values[start:stop + 1] for every (start, stop) pair,
+    NaN where the range is empty.
+
+    Sparse-table doubling, one level at a time: each query is answered at the
+    level of its length by two overlapping blocks, so the cost is
+    O(len(values) * log(longest range)) regardless of the number of queries.
+    """
+    combine = np.fmax if maximum else np.fmin
+    out = np.full(len(start), np.nan)
+    length = stop - start + 1
+    valid = length > 0
+    if not valid.any():
+        return out
+    level = np.zeros(len(start), dtype=np.int64)
+    level[valid] = np.floor(np.log2(length[valid])).astype(np.int64)
+    lo = int(start[valid].min())
+    hi = int(stop[valid].max())
+    table = np.asarray(values[lo:hi + 1], dtype=np.float64)
+    first = start - lo
+    last = stop - lo
+    for j in range(int(level[valid].max()) + 1):
+        here = valid & (level == j)
+        if here.any():
+            out[here] = combine(table[first[here]], table[last[here] - (1 << j) + 1])
+        table = combine(table[:-(1 << j)], table[1 << j:])
+    return out
+
+def forward_returns(signals, candles, horizons=None):
+    """Join every signal to the candle series at each horizon.
+
+    The signal candle and the candle at `timestamp + horizon` are found with
+    an as-of (searchsorted) join on candle open times. Per horizon the result
+    gets `return_<h>` (signed by direction, so positive is a win for shorts
+    too), and `mfe_<h>` / `mae_<h>`, the most favourable and most adverse
+    excursion from the high/low of the candles after the signal up to the
+    horizon. Signals without a direction, or whose horizon runs past the
+    candles, get NaN.
+    """
+    horizons = horizons or DEFAULT_HORIZONS
+    frame = signals_to_frame(signals).copy()
+    if frame.empty:
+        return frame
+    times = pd.to_datetime(candles["timestamp"]).to_numpy(dtype="datetime64[ns]")
+    close = candles["close"].to_numpy(dtype=np.float64)
+    high = candles["high"].to_numpy(dtype=np.float64)
+    low = candles["low"].to_numpy(dtype=np.float64)
+    if len(times) == 0:
+        for horizon in horizons:
+            for prefix in ("return", "mfe", "mae"):
+                frame[f"{prefix}_{horizon}"] = np.nan
+        return frame
+    signal_times = frame["timestamp"].to_numpy(dtype="datetime64[ns]")
+    origin = np.searchsorted(times, signal_times, side="right") - 1
+    known = origin >= 0
+    entry = frame["price"].to_numpy(dtype=np.float64)
+    entry = np.where(np.isnan(entry) & known, close[np.maximum(origin, 0)], entry)
+    sign = frame["direction"].map({"long": 1.0, "short": -1.0}).to_numpy(dtype=np.float64)
+    for horizon in horizons:
+        delta = parse_horizon(horizon).to_timedelta64()
+        target = signal_times + delta
+        forward = np.searchsorted(times, target, side="right") - 1
+        complete = known & (target <= times[-1])
+        exit_price = np.where(complete, close[np.clip(forward, 0, len(close) - 1)], np.nan)
+        start = np.where(complete, origin + 1, 0)
+        stop = np.where(complete, forward, -1)
+        highest = range_extrema(high, start, stop, maximum=True)
+        lowest = range_extrema(low, start, stop, maximum=False)
+        label = str(horizon)
+        frame[f"return_{label}"] = sign * (exit_price / entry - 1.0)
+        frame[f"mfe_{label}"] = np.where(sign > 0, highest / entry - 1.0, 1.0 - lowest / entry) * np.abs(sign)
+        frame[f"mae_{label}"] = np.where(sign > 0, lowest / entry - 1.0, 1.0 - highest / entry) * np.abs(sign)
+    return frame
+
+def summarize(forward, horizons=None, by="strategy"):
+    """Per-group statistics for every horizon: the number of signals with a
+    complete horizon, hit rate (signed return > 0), mean return and mean MFE
+    and MAE.
+
+    `by="condition"` groups by the `condition:` columns, so a signal counts
+    once for every condition it met.
+    """
+    horizons = horizons or DEFAULT_HORIZONS
+    if by == "condition":
+        columns = [column for column in forward.columns if column.startswith("condition:")]
+        groups = [column.split(":", 1)[1] for column in columns]
+        members = [np.flatnonzero(forward[column].to_numpy(dtype=bool)) for column in columns]
+        rows = np.concatenate(members) if members else np.empty(0, dtype=np.int64)
+        codes = np.concatenate([np.full(len(member), code) for code, member in enumerate(members)]) if members else rows
+    else:
+        codes, groups = pd.factorize(forward[by])
+        rows = np.flatnonzero(codes >= 0)
+        codes = codes[rows]
+    size = len(groups)
+
+    def mean(values):
+        values = values[rows]
+        valid = ~np.isnan(values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.bincount(codes[valid], weights=values[valid], minlength=size) / np.bincount(codes[valid], minlength=size)
+
+    frames = []
+    for horizon in horizons:
+        label = str(horizon)
+        returns = forward[f"return_{label}"].to_numpy(dtype=np.float64)
+        hits = np.where(np.isnan(returns), np.nan, returns > 0)
+        index = pd.MultiIndex.from_arrays([list(groups), [label] * size], names=[by, "horizon"])
+        frames.append(pd.DataFrame({
+            "count": np.bincount(codes[~np.isnan(returns[rows])], minlength=size),
+            "hit_rate": mean(hits),
+            "mean_return": mean(returns),
+            "mean_mfe": mean(forward[f"mfe_{label}"].to_numpy(dtype=np.float64)),
+            "mean_mae": mean(forward[f"mae_{label}"].to_numpy(dtype=np.float64)),
+        }, index=index))
+    return pd.concat(frames).sort_index(level=0, sort_remaining=False)
+
+def analyze_signals(signals, candles, horizons=None):
+    horizons = horizons or DEFAULT_HORIZONS
+    forward = forward_returns(signals, candles, horizons)
+    logging.info("Signal analytics: joined %d signals to %d horizons", len(forward), len(horizons))
+    if forward.empty:
+        return {"signals": forward, "by_strategy": pd.DataFrame(), "by_condition": pd.DataFrame()}
+    return {
+        "signals": forward,
+        "by_strategy": summarize(forward, horizons, by="strategy"),
+        "by_condition": summarize(forward, horizons, by="condition"),
+    }
+
+def run_cli(signals_file, data_file, horizons=None, output=None):
+    with open(signals_file, "r", encoding="utf-8") as handle:
+        signals = json.load(handle)
+    result = analyze_signals(signals, load_dataframe(data_file), horizons)
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(result["by_strategy"])
+        print(result["by_condition"])
+    if output:
+        destination = Path(output).expanduser().resolve()
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        result["by_strategy"].reset_index().to_csv(destination.with_name(destination.stem + "_strategy.csv"), index=False)
+        result["by_condition"].reset_index().to_csv(destination.with_name(destination.stem + "_condition.csv"), index=False)
+        print(f"Saved signal analytics next to {destination}")
+    return 0
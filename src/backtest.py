@@ -0,0 +1,288 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from store import CandleStore
+from fetch import interval_to_milliseconds
+from candle_buffer import to_milliseconds
+from indicators.engine import IndicatorEngine
+from signals import (
+    SignalGenerator, build_condition_matrix, compile_strategies, compute_conditions,
+    emitted_rows, load_config_file, load_dataframe, score_strategies
+)
+import logging
+
+CANDLE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume", "trades_count"]
+
+# EMA and Wilder seeds weigh less than float64 precision after ~37 periods
+# ((1 - 1/n) ** (37 * n) < 1e-16), so this many warm-up spans of trailing
+# candles reproduce the indicators of an uninterrupted pass.
+SEED_DECAY_PERIODS = 37
+
+DEFAULT_SETTINGS = {
+    "fee": 0.001,
+    "slippage": 0.0005,
+    "capital": 10000.0,
+    "allow_short": True,
+    "max_hold_bars": None,
+    "chunk_size": 500000,
+}
+
+class BacktestState:
+    """Everything carried from one chunk to the next."""
+
+    def __init__(self):
+        self.context = None
+        self.last_signal_times = {}
+        self.position = 0
+        self.bars_since_signal = None
+        self.last_close = np.nan
+        self.log_equity = 0.0
+        self.peak_log_equity = 0.0
+        self.max_drawdown = 0.0
+        self.open_trade_log = 0.0
+        self.bars = 0
+        self.exposed_bars = 0
+        self.turnover = 0.0
+        self.costs = 0.0
+        self.entries = 0
+        self.closed_trades = 0
+        self.wins = 0
+        self.trade_log_sum = 0.0
+        self.signal_counts = {}
+
+class Backtester:
+    """Vectorized backtest of the `config.json` strategies.
+
+    Each emitted signal sets the target position by the strategy `direction`
+    (long +1, short -1, or flat when shorts are disabled) and the position is
+    held until an opposite signal or `max_hold_bars` bars after the last
+    signal. Trades fill at the signal candle's close, paying `fee + slippage`
+    per unit of notional traded. Signal cooldowns follow `signal_settings`.
+
+    Candles are processed in chunks of `chunk_size` rows; each chunk is
+    prefixed with enough trailing candles for the indicators to match a single
+    pass, and positions, cooldowns and equity are carried between chunks.
+    """
+
+    def __init__(self, config_path=None, config=None, **settings):
+        if config is None:
+            path = Path(config_path) if config_path else Path(__file__).resolve().parents[1] / "config.json"
+            config = load_config_file(path)
+        self.config = config
+        self.settings = {**DEFAULT_SETTINGS, **config.get("backtest", {}), **settings}
+        engine = IndicatorEngine(
+            config=config.get("indicator_parameters"),
+            cache_size=0,
+            backend=config.get("indicator_backend", "pandas_ta")
+        )
+        self.generator = SignalGenerator(config=config, indicator_engine=engine)
+        self.context_rows = SEED_DECAY_PERIODS * max(self.generator.warmup_period(), 1)
+        self.state = BacktestState()
+
+    def reset(self):
+        self.state = BacktestState()
+
+    def run(self, candles):
+        """Backtest a candle frame, or an iterable of consecutive candle frames,
+        from a fresh state and return the report."""
+        self.reset()
+        chunk_size = self.settings["chunk_size"]
+        chunks = [candles] if isinstance(candles, pd.DataFrame) else candles
+        for frame in chunks:
+            for start in range(0, len(frame), chunk_size):
+                self.process_chunk(frame.iloc[start:start + chunk_size])
+        return self.report()
+
+    def run_store(self, store, symbol, interval, start=None, end=None):
+        return self.run(iter_store_chunks(store, symbol, interval, start, end, self.settings["chunk_size"]))
+
+    def process_chunk(self, df):
+        if df is None or df.empty:
+            return
+        state = self.state
+        df = df[[column for column in CANDLE_COLUMNS if column in df.columns]].reset_index(drop=True)
+        frame = df if state.context is None else pd.concat([state.context, df], ignore_index=True)
+        offset = len(frame) - len(df)
+        timestamps = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ns]")
+        direction = self.signal_directions(frame, offset, timestamps)
+        self.simulate(direction, df["close"].to_numpy(dtype=np.float64))
+        state.context = frame.iloc[-self.context_rows:].reset_index(drop=True)
+        logging.info("Backtester: processed %d candles (%d total)", len(df), state.bars)
+
+    def run_conditions(self, conditions, timestamps, close):
+        """Backtest one uninterrupted history whose conditions are already
+        computed (as `compute_conditions` returns them) from a fresh state."""
+        self.reset()
+        timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        self.simulate(self.emitted_directions(conditions, 0, timestamps), np.asarray(close, dtype=np.float64))
+        return self.report()
+
+    def signal_directions(self, frame, offset, timestamps):
+        """Net direction (+1, -1 or 0) of the signals emitted on each new row."""
+        generator = self.generator
+        plan = generator.indicator_plan
+        indicator_df = generator.indicator_engine.calculate_all_indicators(frame, columns=plan["columns"] if plan else None)
+        conditions = compute_conditions(indicator_df, generator.thresholds, plan["conditions"] if plan else None)
+        conditions.update(generator.timeframe_conditions(frame))
+        return self.emitted_directions(conditions, offset, timestamps)
+
+    def emitted_directions(self, conditions, offset, timestamps):
+        generator = self.generator
+        state = self.state
+        condition_names, matrix = build_condition_matrix(conditions, offset + len(timestamps))
+        settings = generator.signal_settings
+        compiled = compile_strategies(generator.strategies, condition_names, settings.get("min_confluence_count", 1))
+        direction = np.zeros(len(timestamps), dtype=np.int64)
+        if not compiled:
+            return direction
+        fired = score_strategies(matrix, matrix.sum(axis=1), compiled)
+        low_volatility = conditions.get("low_volatility")
+        if settings.get("ignore_low_volatility", False) and low_volatility is not None:
+            fired &= ~np.asarray(low_volatility, dtype=bool)[:, None]
+        fired = fired[offset:]
+        min_interval = settings.get("min_signal_interval_minutes", 0)
+        interval = np.timedelta64(int(min_interval * 60 * 1e9), "ns") if min_interval > 0 else None
+        groups = {}
+        for strategy_index, (strategy, _, _) in enumerate(compiled):
+            groups.setdefault(strategy.get("signal", "NEUTRAL"), []).append(strategy_index)
+        for signal_name, members in groups.items():
+            emitted = emitted_rows(fired[:, members].T, timestamps, interval, state.last_signal_times.get(signal_name))
+            for strategy_index, rows in zip(members, emitted):
+                strategy = compiled[strategy_index][0]
+                name = strategy.get("name")
+                state.signal_counts[name] = state.signal_counts.get(name, 0) + len(rows)
+                if strategy.get("direction") == "long":
+                    direction[rows] += 1
+                elif strategy.get("direction") == "short":
+                    direction[rows] -= 1
+            last = max((rows[-1] for rows in emitted if len(rows)), default=None)
+            if last is not None:
+                state.last_signal_times[signal_name] = timestamps[last]
+        return np.sign(direction)
+
+    def positions(self, direction):
+        """Target position after each row and the bars since the signal that
+        set it: the direction of the latest signal, until `max_hold_bars` bars
+        have passed. A short signal only closes longs when shorts are off."""
+        state = self.state
+        rows = np.arange(len(direction))
+        signalled = direction != 0
+        target = direction if self.settings["allow_short"] else np.maximum(direction, 0)
+        last_signal = np.maximum.accumulate(np.where(signalled, rows, -1))
+        # Rows before this chunk's first signal continue the carried position.
+        carried = last_signal < 0
+        position = np.where(carried, state.position, target[np.maximum(last_signal, 0)])
+        if state.bars_since_signal is None:
+            since = np.where(carried, -1, rows - last_signal)
+        else:
+            since = np.where(carried, state.bars_since_signal + rows + 1, rows - last_signal)
+        max_hold = self.settings["max_hold_bars"]
+        if max_hold is not None:
+            position = np.where(since >= max_hold, 0, position)
+        return position, since
+
+    def simulate(self, direction, close):
+        position, since = self.positions(direction)
+        self.account(close, position)
+        self.state.position = int(position[-1])
+        self.state.bars_since_signal = int(since[-1]) if since[-1] >= 0 else None
+
+    def account(self, close, position):
+        state = self.state
+        cost_rate = self.settings["fee"] + self.settings["slippage"]
+        previous_close = np.concatenate([[state.last_close], close[:-1]])
+        previous_position = np.concatenate([[state.position], position[:-1]])
+        returns = np.nan_to_num(close / previous_close - 1.0)
+        held = previous_position.astype(np.float64)
+        traded = np.abs(position - previous_position).astype(np.float64)
+        changed = traded > 0
+        gross = np.log1p(held * returns)
+        exit_cost = np.where(changed, np.log1p(-cost_rate * np.abs(held)), 0.0)
+        entry_cost = np.where(changed, np.log1p(-cost_rate * np.abs(position)), 0.0)
+        log_equity = state.log_equity + np.cumsum(gross + exit_cost + entry_cost)
+        before_costs = np.exp(log_equity - exit_cost - entry_cost)
+        peak = np.maximum(np.maximum.accumulate(log_equity), state.peak_log_equity)
+        state.max_drawdown = max(state.max_drawdown, float(np.max(1.0 - np.exp(log_equity - peak))))
+        # Trades are runs of constant position: segment 0 continues the run
+        # open at the start of the chunk, each change closes one and opens the next.
+        segment = np.cumsum(changed)
+        held_segment = np.concatenate([[0], segment[:-1]])
+        trade_log = np.bincount(held_segment, weights=gross + exit_cost, minlength=segment[-1] + 1)
+        trade_log += np.bincount(segment, weights=entry_cost, minlength=segment[-1] + 1)
+        trade_log[0] += state.open_trade_log
+        segment_position = np.concatenate([[previous_position[0]], position[changed]])
+        closed = segment_position[:-1] != 0
+        state.closed_trades += int(closed.sum())
+        state.wins += int((trade_log[:-1][closed] > 0).sum())
+        state.trade_log_sum += float(trade_log[:-1][closed].sum())
+        state.open_trade_log = float(trade_log[-1])
+        state.entries += int((changed & (position != 0)).sum())
+        state.turnover += float(traded.sum())
+        state.costs += float((before_costs * -np.expm1(exit_cost + entry_cost)).sum())
+        state.exposed_bars += int((held != 0).sum())
+        state.bars += len(close)
+        state.log_equity = float(log_equity[-1])
+        state.peak_log_equity = float(peak[-1])
+        state.last_close = float(close[-1])
+
+    def report(self):
+        state = self.state
+        capital = self.settings["capital"]
+        total_return = float(np.expm1(state.log_equity))
+        return {
+            "bars": state.bars,
+            "signals": dict(state.signal_counts),
+            "signal_count": int(sum(state.signal_counts.values())),
+            "trades": state.entries,
+            "closed_trades": state.closed_trades,
+            "hit_rate": state.wins / state.closed_trades if state.closed_trades else None,
+            "average_trade_return": float(np.expm1(state.trade_log_sum / state.closed_trades)) if state.closed_trades else None,
+            "total_return": total_return,
+            "pnl": capital * total_return,
+            "final_equity": capital * (1.0 + total_return),
+            "max_drawdown": state.max_drawdown,
+            "turnover": state.turnover,
+            "costs": capital * state.costs,
+            "exposure": state.exposed_bars / state.bars if state.bars else 0.0,
+            "open_position": state.position,
+        }
+
+def iter_store_chunks(store, symbol, interval, start=None, end=None, chunk_size=500000):
+    """Consecutive candle frames of at most `chunk_size` rows read from a
+    CandleStore, so the whole range never has to be in memory."""
+    days = store.days(symbol, interval)
+    if not days:
+        return
+    step = interval_to_milliseconds(interval)
+    position = to_milliseconds(start) if start is not None else days[0] * 86_400_000
+    end_ms = to_milliseconds(end) if end is not None else (days[-1] + 1) * 86_400_000
+    span = chunk_size * step
+    while position < end_ms:
+        df = store.read(symbol, interval, position, min(position + span, end_ms))
+        position += span
+        if not df.empty:
+            yield df
+
+def run_cli(symbol="BTCUSDT", interval="1s", data_file=None, store_dir=None,
+            start=None, end=None, config=None, output=None):
+    backtester = Backtester(config_path=config)
+    if data_file:
+        report = backtester.run(load_dataframe(data_file))
+    elif store_dir:
+        report = backtester.run_store(CandleStore(store_dir), symbol, interval, start, end)
+    else:
+        print("Pass a data file or a candle store directory to backtest.")
+        return 1
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    if output:
+        destination = Path(output).expanduser().resolve()
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with destination.open("w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Saved backtest report to {destination}")
+    return 0
+
+if __name__ == "__main__":
+    run_cli()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+def to_milliseconds(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+class CandleRingBuffer:
+    """Fixed-capacity columnar candle buffer.
+
+    Timestamps are stored as int64 epoch milliseconds and OHLCV as float64.
+    Every value is written twice, at `i` and `i + capacity`, so the newest
+    `len(self)` values are always one contiguous slice and `view()` can hand
+    them out without copying. Views are only valid until the next append.
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("Buffer capacity must be positive")
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._trades = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = {column: np.zeros(2 * capacity, dtype=np.float64) for column in PRICE_COLUMNS}
+        self._position = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def append(self, candle):
+        position = self._position
+        mirror = position + self.capacity
+        timestamp = to_milliseconds(candle['timestamp'])
+        self._timestamps[position] = self._timestamps[mirror] = timestamp
+        trades = candle.get('trades_count', 0)
+        self._trades[position] = self._trades[mirror] = trades
+        for column, values in self._values.items():
+            values[position] = values[mirror] = candle[column]
+        self._position = (position + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, df):
+        if df is None or df.empty:
+            return
+        df = df.iloc[-self.capacity:]
+        count = len(df)
+        slots = (self._position + np.arange(count)) % self.capacity
+        timestamps = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        self._write(self._timestamps, slots, timestamps)
+        if 'trades_count' in df.columns:
+            self._write(self._trades, slots, df['trades_count'].to_numpy(dtype=np.int64))
+        else:
+            self._write(self._trades, slots, 0)
+        for column, values in self._values.items():
+            self._write(values, slots, df[column].to_numpy(dtype=np.float64))
+        self._position = (self._position + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+
+    def _write(self, array, slots, values):
+        array[slots] = values
+        array[slots + self.capacity] = values
+
+    def clear(self):
+        self._position = 0
+        self._size = 0
+
+    def _window(self, array):
+        end = self._position + self.capacity
+        window = array[end - self._size:end]
+        window.flags.writeable = False
+        return window
+
+    def view(self, column):
+        if column == 'timestamp':
+            return self._window(self._timestamps)
+        if column == 'trades_count':
+            return self._window(self._trades)
+        return self._window(self._values[column])
+
+    def timestamps(self):
+        return self.view('timestamp')
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("candle buffer index out of range")
+        slot = self._position + self.capacity - self._size + index
+        candle = {'timestamp': pd.Timestamp(int(self._timestamps[slot]), unit='ms')}
+        for column, values in self._values.items():
+            candle[column] = float(values[slot])
+        candle['trades_count'] = int(self._trades[slot])
+        return candle
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self[index]
+
+    def to_dataframe(self):
+        if not self._size:
+            return pd.DataFrame()
+        data = {'timestamp': pd.to_datetime(self.view('timestamp'), unit='ms')}
+        for column in PRICE_COLUMNS:
+            data[column] = self.view(column)
+        data['trades_count'] = self.view('trades_count')
+        return pd.DataFrame(data)
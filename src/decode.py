@@ -0,0 +1,120 @@
+import json
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+REST_KLINE_FIELDS = {
+    'open_time': 0,
+    'open': 1,
+    'high': 2,
+    'low': 3,
+    'close': 4,
+    'volume': 5,
+    'close_time': 6,
+    'trades_count': 8,
+}
+
+def decode_rest_klines(raw_data):
+    """Parse a REST /klines payload into typed column arrays.
+
+    Times stay int64 epoch milliseconds; prices and volume become float64.
+    """
+    if not raw_data:
+        return {
+            'open_time': np.empty(0, dtype=np.int64),
+            'close_time': np.empty(0, dtype=np.int64),
+            'trades_count': np.empty(0, dtype=np.int64),
+            **{name: np.empty(0, dtype=np.float64) for name in ('open', 'high', 'low', 'close', 'volume')},
+        }
+    fields = list(zip(*raw_data))
+    columns = {}
+    for name, position in REST_KLINE_FIELDS.items():
+        dtype = np.int64 if name in ('open_time', 'close_time', 'trades_count') else np.float64
+        columns[name] = np.array(fields[position], dtype=dtype)
+    return columns
+
+def klines_to_frame(columns):
+    order = np.argsort(columns['open_time'], kind='stable')
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(columns['open_time'][order], unit='ms'),
+        'open': columns['open'][order],
+        'high': columns['high'][order],
+        'low': columns['low'][order],
+        'close': columns['close'][order],
+        'volume': columns['volume'][order],
+        'trades_count': columns['trades_count'][order],
+        'close_timestamp': pd.to_datetime(columns['close_time'][order], unit='ms'),
+    })
+
+def decode_kline_message(message):
+    """Decode one websocket kline frame into a tuple of
+    (open_time_ms, open, high, low, close, volume, trades_count, is_closed),
+    or None for frames that carry no kline. Combined-stream payloads are
+    unwrapped, so journals recorded by either client replay into both.
+    """
+    payload = loads(message)
+    kline = payload.get('data', payload).get('k')
+    if kline is None:
+        return None
+    return kline_fields(kline)
+
+def decode_stream_message(message):
+    """Decode a combined-stream frame into (stream_name, kline tuple), or None.
+    Raw kline frames are accepted too, named after their symbol and interval."""
+    payload = loads(message)
+    data = payload.get('data', payload)
+    if not data or 'k' not in data:
+        return None
+    stream = payload.get('stream') or f"{data['s'].lower()}@kline_{data['k']['i']}"
+    return stream, kline_fields(data['k'])
+
+def kline_fields(kline):
+    return (
+        kline['t'],
+        float(kline['o']),
+        float(kline['h']),
+        float(kline['l']),
+        float(kline['c']),
+        float(kline['v']),
+        kline['n'],
+        kline['x'],
+    )
+
+def kline_to_candle(kline):
+    open_time, open_price, high, low, close, volume, trades_count, _ = kline
+    return {
+        'timestamp': pd.Timestamp(open_time, unit='ms'),
+        'open': open_price,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+        'trades_count': trades_count,
+    }
+
+def decode_agg_trade_message(message):
+    """Decode an aggTrade frame, raw or wrapped in a combined-stream payload,
+    into (symbol, (trade_time_ms, price, quantity, trades_count, event_time_ms)),
+    or None for frames that carry no trade."""
+    payload = loads(message)
+    data = payload.get('data', payload)
+    if data.get('e') != 'aggTrade':
+        return None
+    return data['s'], agg_trade_fields(data)
+
+def agg_trade_fields(trade):
+    # One aggregate trade stands for the exchange trades first_id..last_id.
+    return (
+        trade['T'],
+        float(trade['p']),
+        float(trade['q']),
+        trade['l'] - trade['f'] + 1,
+        trade.get('E', trade['T']),
+    )
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest', 'coalesce')
+
+DEFAULT_POLICIES = {
+    'on_candle_closed': 'block',
+    'on_price_update': 'coalesce'
+}
+
+class EventChannel:
+    """Bounded queue of pending invocations for one event.
+
+    Overflow policies when the queue is full:
+    - block: the publisher waits for space, so nothing is lost.
+    - drop_oldest / drop_newest: discard the oldest queued or the incoming event.
+    - coalesce: a pending event with the same `symbol` is replaced in place by
+      the newer one; if the queue is still full the oldest event is dropped.
+    """
+
+    def __init__(self, event, max_size, policy, concurrency):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}'. Expected one of {OVERFLOW_POLICIES}")
+        self.event = event
+        self.max_size = max_size
+        self.policy = policy
+        self.concurrency = concurrency
+        self.callbacks = []
+        self.items = deque()
+        self.pending = {}
+        self.ready = None
+        self.space = None
+        self.in_flight = 0
+        self.published = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    async def put(self, args, kwargs):
+        self.published += 1
+        key = kwargs.get('symbol')
+        if self.policy == 'coalesce':
+            entry = self.pending.get(key)
+            if entry is not None:
+                # Lag is measured from the event that will be delivered.
+                entry[1] = args
+                entry[2] = kwargs
+                entry[3] = time.monotonic()
+                self.coalesced += 1
+                return
+        while len(self.items) >= self.max_size:
+            if self.policy == 'block':
+                self.space.clear()
+                await self.space.wait()
+            elif self.policy == 'drop_newest':
+                self.dropped += 1
+                return
+            else:
+                oldest = self.items.popleft()
+                self.pending.pop(oldest[0], None)
+                self.dropped += 1
+        entry = [key, args, kwargs, time.monotonic()]
+        self.items.append(entry)
+        if self.policy == 'coalesce':
+            self.pending[key] = entry
+        self.max_depth = max(self.max_depth, len(self.items))
+        self.ready.set()
+
+    async def get(self):
+        while not self.items:
+            self.ready.clear()
+            await self.ready.wait()
+        key, args, kwargs, enqueued_at = self.items.popleft()
+        if self.policy == 'coalesce':
+            self.pending.pop(key, None)
+        self.space.set()
+        self.dispatched += 1
+        lag = time.monotonic() - enqueued_at
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.total_lag += lag
+        return args, kwargs
+
+    def metrics(self):
+        return {
+            'policy': self.policy,
+            'depth': len(self.items),
+            'max_depth': self.max_depth,
+            'in_flight': self.in_flight,
+            'published': self.published,
+            'dispatched': self.dispatched,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'last_lag_ms': round(self.last_lag * 1000, 3),
+            'max_lag_ms': round(self.max_lag * 1000, 3),
+            'avg_lag_ms': round(self.total_lag / self.dispatched * 1000, 3) if self.dispatched else 0.0
+        }
+
+class EventDispatcher:
+    """Decouples the websocket receive loop from callback execution.
+
+    `publish()` only enqueues; worker tasks (per-event `concurrency` of them)
+    run the registered callbacks, so a slow handler no longer stalls reads
+    from the socket.
+    """
+
+    def __init__(self, events, max_queue_size=1000, policies=None, concurrency=None):
+        policies = {**DEFAULT_POLICIES, **(policies or {})}
+        concurrency = concurrency or {}
+        self.channels = {
+            event: EventChannel(event, max_queue_size, policies.get(event, 'block'), concurrency.get(event, 1))
+            for event in events
+        }
+        self.workers = []
+
+    def register(self, event, callback):
+        if event in self.channels:
+            self.channels[event].callbacks.append((callback, asyncio.iscoroutinefunction(callback)))
+
+    def start(self):
+        if self.workers:
+            return
+        for channel in self.channels.values():
+            # Events are created here so they belong to the loop that runs the workers.
+            channel.ready = asyncio.Event()
+            channel.space = asyncio.Event()
+            for _ in range(channel.concurrency):
+                self.workers.append(asyncio.ensure_future(self._run(channel)))
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def publish(self, event, *args, **kwargs):
+        channel = self.channels.get(event)
+        if channel is None or not channel.callbacks:
+            return
+        if not self.workers:
+            self.start()
+        await channel.put(args, kwargs)
+
+    async def join(self):
+        while any(channel.items or channel.in_flight for channel in self.channels.values()):
+            await asyncio.sleep(0.001)
+
+    async def _run(self, channel):
+        while True:
+            args, kwargs = await channel.get()
+            channel.in_flight += 1
+            try:
+                for callback, is_coroutine in channel.callbacks:
+                    try:
+                        if is_coroutine:
+                            await callback(*args, **kwargs)
+                        else:
+                            callback(*args, **kwargs)
+                    except Exception as e:
+                        logger.error(f"Error in callback for {channel.event}: {e}")
+            finally:
+                channel.in_flight -= 1
+
+    def metrics(self):
+        return {event: channel.metrics() for event, channel in self.channels.items()}
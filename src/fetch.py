@@ -4,20 +4,113 @@ import pandas as pd
 import json
 import logging
 import asyncio
-from datetime import datetime
+import threading
+import time
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import websockets
+from requests.adapters import HTTPAdapter
+from candle_buffer import CandleRingBuffer, to_milliseconds
+from dispatch import EventDispatcher
+from decode import JSONDecodeError, decode_kline_message, decode_rest_klines, decode_stream_message, kline_to_candle, klines_to_frame
 
 logger = logging.getLogger(__name__)
 
+MAX_KLINES_PER_REQUEST = 1000
+MAX_STREAMS_PER_CONNECTION = 1024
+SUBSCRIBE_BATCH_SIZE = 100
+SUBSCRIBE_INTERVAL = 0.25
+
+CALLBACK_EVENTS = ('on_candle_closed', 'on_price_update')
+KLINES_REQUEST_WEIGHT = 2
+
+INTERVAL_MILLISECONDS = {
+    '1s': 1_000,
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 3_600_000,
+    '2h': 2 * 3_600_000,
+    '4h': 4 * 3_600_000,
+    '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000,
+    '12h': 12 * 3_600_000,
+    '1d': 86_400_000,
+    '3d': 3 * 86_400_000,
+    '1w': 7 * 86_400_000,
+}
+
+def interval_to_milliseconds(interval):
+    if interval not in INTERVAL_MILLISECONDS:
+        raise ValueError(f"Unsupported interval for paginated downloads: {interval}")
+    return INTERVAL_MILLISECONDS[interval]
+
+def bar_interval_to_milliseconds(interval):
+    """Like `interval_to_milliseconds`, but also accepts the sub-second bar
+    intervals built locally from trades, e.g. '250ms'."""
+    if interval.endswith('ms') and interval[:-2].isdigit() and int(interval[:-2]) > 0:
+        return int(interval[:-2])
+    return interval_to_milliseconds(interval)
+
+class RequestWeightLimiter:
+    """Sliding one-minute budget of Binance request weight shared by worker threads."""
+
+    def __init__(self, weight_per_minute=1200, window=60.0):
+        self.weight_per_minute = weight_per_minute
+        self.window = window
+        self.lock = threading.Lock()
+        self.spent = deque()
+        self.blocked_until = 0.0
+
+    def acquire(self, weight=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.spent and now - self.spent[0][0] >= self.window:
+                    self.spent.popleft()
+                used = sum(spent_weight for _, spent_weight in self.spent)
+                if now >= self.blocked_until and used + weight <= self.weight_per_minute:
+                    self.spent.append((now, weight))
+                    return
+                wait = self.blocked_until - now
+                if self.spent and used + weight > self.weight_per_minute:
+                    wait = max(wait, self.spent[0][0] + self.window - now)
+            time.sleep(max(wait, 0.01))
+
+    def block_for(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def observe(self, used_weight):
+        if used_weight >= self.weight_per_minute:
+            self.block_for(self.window - time.time() % self.window)
+
 class BinanceDataFetcher:
-    def __init__(self, data_dir="data"):
-        self.base_url = "https://api.binance.com/api/v3"
+    def __init__(self, data_dir="data", base_url="https://api.binance.com/api/v3", max_workers=4,
+                 weight_per_minute=1200, max_retries=3, session=None):
+        self.base_url = base_url
         self.data_dir = data_dir
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.limiter = RequestWeightLimiter(weight_per_minute)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
         os.makedirs(self.data_dir, exist_ok=True)
     
     def fetch_klines(self, symbol="BTCUSDT", interval="5m", limit=100):
-        endpoint = f"{self.base_url}/klines"
+        if limit > MAX_KLINES_PER_REQUEST:
+            step = interval_to_milliseconds(interval)
+            end = (int(time.time() * 1000) // step + 1) * step
+            df = self.fetch_range(symbol, interval, end - limit * step, end)
+            return df.tail(limit).reset_index(drop=True) if df is not None else None
+        
         params = {
             "symbol": symbol,
             "interval": interval,
@@ -26,9 +119,7 @@ class BinanceDataFetcher:
         
         try:
             print(f"Fetching {limit} {interval} candles for {symbol}...")
-            response = requests.get(endpoint, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._request_klines(params)
             
             if not data:
                 print("No data received")
@@ -42,25 +133,67 @@ class BinanceDataFetcher:
             print(e)
             return None
     
-    def _process_klines(self, raw_data):
-        columns = [
-            'open_time', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_volume', 'trades_count',
-            'taker_buy_volume', 'taker_buy_quote_volume', 'ignore'
-        ]
-        
-        df = pd.DataFrame(raw_data, columns=columns)
-        df['timestamp'] = pd.to_datetime(df['open_time'], unit='ms')
-        df['close_timestamp'] = pd.to_datetime(df['close_time'], unit='ms')
-        
-        numeric_columns = ['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'trades_count']
-        for col in numeric_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume', 'trades_count', 'close_timestamp']]
-        df = df.sort_values('timestamp').reset_index(drop=True)
+    def fetch_range(self, symbol, interval, start, end=None):
+        step = interval_to_milliseconds(interval)
+        start_ms = to_milliseconds(start)
+        end_ms = to_milliseconds(end) if end is not None else int(time.time() * 1000)
+        if end_ms <= start_ms:
+            return None
+        page_span = step * MAX_KLINES_PER_REQUEST
+        pages = [(page_start, min(page_start + page_span, end_ms) - 1) for page_start in range(start_ms, end_ms, page_span)]
         
-        return df
+        try:
+            print(f"Fetching {interval} candles for {symbol} in {len(pages)} pages...")
+            frames = []
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pending = [executor.submit(self._fetch_page, symbol, interval, page_start, page_end) for page_start, page_end in pages]
+                for future in pending:
+                    data = future.result()
+                    if data:
+                        frames.append(self._process_klines(data))
+            
+            if not frames:
+                # The exchange has no candles here; unlike a failed request, that is final.
+                print("No data received")
+                return self._process_klines([])
+            
+            df = pd.concat(frames, ignore_index=True)
+            df = df.drop_duplicates(subset='timestamp', keep='last').sort_values('timestamp').reset_index(drop=True)
+            print(f"Fetched {len(df)} candles")
+            return df
+            
+        except Exception as e:
+            print(e)
+            return None
+    
+    def _fetch_page(self, symbol, interval, start_ms, end_ms):
+        params = {
+            "symbol": symbol,
+            "interval": interval,
+            "startTime": start_ms,
+            "endTime": end_ms,
+            "limit": MAX_KLINES_PER_REQUEST
+        }
+        return self._request_klines(params)
+    
+    def _request_klines(self, params):
+        endpoint = f"{self.base_url}/klines"
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(KLINES_REQUEST_WEIGHT)
+            response = self.session.get(endpoint, params=params, timeout=10)
+            used_weight = response.headers.get("X-MBX-USED-WEIGHT-1M")
+            if used_weight:
+                self.limiter.observe(int(used_weight))
+            if response.status_code in (418, 429) and attempt < self.max_retries:
+                retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+                logger.warning(f"Rate limited by Binance, retrying in {retry_after}s")
+                self.limiter.block_for(retry_after)
+                continue
+            response.raise_for_status()
+            return response.json()
+    
+    def _process_klines(self, raw_data):
+        return klines_to_frame(decode_rest_klines(raw_data))
     
     def save(self, df, filename="btcusdt_5m_candles.csv"):
         try:
@@ -74,31 +207,27 @@ class BinanceDataFetcher:
 
 
 class BinanceWebSocketClient:
-    def __init__(self, symbol="BTCUSDT", interval="1s", buffer_size=35):
+    def __init__(self, symbol="BTCUSDT", interval="1s", buffer_size=35, queue_size=1000,
+                 overflow_policies=None, concurrency=None, journal=None):
         self.symbol = symbol
+        self.journal = journal
         self.interval = interval
         self.buffer_size = buffer_size
-        self.candle_buffer = deque(maxlen=buffer_size)
+        self.candle_buffer = CandleRingBuffer(buffer_size)
         self.latest_price = None
         self.is_connected = False
-        self.callbacks = {
-            'on_candle_closed': [],
-            'on_price_update': []
-        }
+        self.dispatcher = EventDispatcher(
+            CALLBACK_EVENTS,
+            max_queue_size=queue_size,
+            policies=overflow_policies,
+            concurrency=concurrency
+        )
     
     def register_callback(self, event, callback):
-        if event in self.callbacks:
-            self.callbacks[event].append(callback)
+        self.dispatcher.register(event, callback)
     
     async def _trigger_callbacks(self, event, *args, **kwargs):
-        for callback in self.callbacks.get(event, []):
-            try:
-                if asyncio.iscoroutinefunction(callback):
-                    await callback(*args, **kwargs)
-                else:
-                    callback(*args, **kwargs)
-            except Exception as e:
-                logger.error(f"Error in callback for {event}: {e}")
+        await self.dispatcher.publish(event, *args, **kwargs)
     
     async def fetch_initial_candles(self):
         logger.info(f"Fetching initial {self.buffer_size} candles for {self.symbol}...")
@@ -114,17 +243,7 @@ class BinanceWebSocketClient:
             logger.error("Failed to fetch initial candles")
             return False
         
-        for _, row in df.iterrows():
-            candle = {
-                'timestamp': pd.to_datetime(row['timestamp']),
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close']),
-                'volume': float(row['volume']),
-                'trades_count': int(row['trades_count']),
-            }
-            self.candle_buffer.append(candle)
+        self.candle_buffer.extend(df)
         
         if len(self.candle_buffer) > 0:
             self.latest_price = self.candle_buffer[-1]['close']
@@ -134,13 +253,39 @@ class BinanceWebSocketClient:
         return True
     
     def get_buffer_as_dataframe(self):
-        if not self.candle_buffer:
-            return pd.DataFrame()
-        return pd.DataFrame(list(self.candle_buffer))
+        return self.candle_buffer.to_dataframe()
+    
+    async def _handle_message(self, message):
+        kline = decode_kline_message(message)
+        if kline is None:
+            return
+        open_time, close, is_closed = kline[0], kline[4], kline[7]
+        
+        self.latest_price = close
+        
+        await self._trigger_callbacks(
+            'on_price_update',
+            price=close,
+            timestamp=open_time,
+            is_closed=is_closed
+        )
+        
+        if is_closed:
+            candle = kline_to_candle(kline)
+            logger.info(f"New candle closed: {candle['timestamp']} - ${candle['close']}")
+            
+            self.candle_buffer.append(candle)
+            
+            await self._trigger_callbacks(
+                'on_candle_closed',
+                candle=candle,
+                buffer=self.candle_buffer
+            )
     
     async def connect_and_stream(self):
         symbol_lower = self.symbol.lower()
         uri = f"wss://stream.binance.com:9443/ws/{symbol_lower}@kline_{self.interval}"
+        self.dispatcher.start()
         
         while True:
             try:
@@ -150,44 +295,11 @@ class BinanceWebSocketClient:
                     logger.info("Connected to Binance WebSocket!")
                     
                     async for message in websocket:
+                        if self.journal is not None:
+                            self.journal.write(message)
                         try:
-                            data = json.loads(message)
-                            
-                            if 'k' in data:
-                                kline = data['k']
-                                is_closed = kline['x']
-                                
-                                candle = {
-                                    'timestamp': pd.to_datetime(kline['t'], unit='ms'),
-                                    'open': float(kline['o']),
-                                    'high': float(kline['h']),
-                                    'low': float(kline['l']),
-                                    'close': float(kline['c']),
-                                    'volume': float(kline['v']),
-                                    'trades_count': int(kline['n']),
-                                }
-                                
-                                self.latest_price = candle['close']
-                                
-                                await self._trigger_callbacks(
-                                    'on_price_update',
-                                    price=candle['close'],
-                                    timestamp=candle['timestamp'],
-                                    is_closed=is_closed
-                                )
-                                
-                                if is_closed:
-                                    logger.info(f"New candle closed: {candle['timestamp']} - ${candle['close']}")
-                                    
-                                    self.candle_buffer.append(candle)
-                                    
-                                    await self._trigger_callbacks(
-                                        'on_candle_closed',
-                                        candle=candle,
-                                        buffer=self.candle_buffer
-                                    )
-                                
-                        except json.JSONDecodeError as e:
+                            await self._handle_message(message)
+                        except JSONDecodeError as e:
                             logger.error(f"JSON decode error: {e}")
                         except Exception as e:
                             logger.error(f"Error processing message: {e}", exc_info=True)
@@ -203,6 +315,182 @@ class BinanceWebSocketClient:
                 logger.info("Reconnecting in 5 seconds...")
                 await asyncio.sleep(5)
 
+class BinanceMultiStreamClient:
+    """Many symbol@kline_interval streams multiplexed over combined-stream connections.
+
+    Streams are split into shards of at most `max_streams_per_connection`,
+    each shard is one websocket subscribed with SUBSCRIBE requests, and all
+    shards run as tasks on the same event loop. Frames are routed by stream
+    name into per-(symbol, interval) buffers, and callbacks receive the
+    `symbol` and `interval` they belong to.
+
+    With a `resampler` (see `resample.TimeframeResampler`), closed candles of
+    its base interval also build its higher-timeframe bars, and every bar
+    that closes is published as an `on_candle_closed` of that timeframe right
+    after the candle that closed it.
+
+    With a `journal` (see `journal.MessageJournal`), every raw frame is
+    recorded before it is handled, so the session can be replayed offline.
+    """
+
+    def __init__(self, streams, buffer_size=35, max_streams_per_connection=MAX_STREAMS_PER_CONNECTION,
+                 url="wss://stream.binance.com:9443/stream", queue_size=1000, overflow_policies=None,
+                 concurrency=None, resampler=None, journal=None):
+        self.url = url
+        self.journal = journal
+        self.resampler = resampler
+        self.buffer_size = buffer_size
+        self.max_streams_per_connection = max_streams_per_connection
+        self.routes = {}
+        self.buffers = {}
+        for symbol, interval in streams:
+            key = (symbol.upper(), interval)
+            self.routes[f"{symbol.lower()}@kline_{interval}"] = key
+            self.buffers[key] = CandleRingBuffer(buffer_size)
+        self.latest_prices = {}
+        self.connected_shards = set()
+        self.dispatcher = EventDispatcher(
+            CALLBACK_EVENTS,
+            max_queue_size=queue_size,
+            policies=overflow_policies,
+            concurrency=concurrency
+        )
+    
+    @property
+    def streams(self):
+        return list(self.routes.values())
+    
+    @property
+    def is_connected(self):
+        return len(self.connected_shards) == len(self.shards())
+    
+    def shards(self):
+        names = list(self.routes)
+        size = self.max_streams_per_connection
+        return [names[i:i + size] for i in range(0, len(names), size)]
+    
+    def register_callback(self, event, callback):
+        self.dispatcher.register(event, callback)
+    
+    async def _trigger_callbacks(self, event, *args, **kwargs):
+        await self.dispatcher.publish(event, *args, **kwargs)
+    
+    def get_buffer(self, symbol, interval):
+        return self.buffers[(symbol.upper(), interval)]
+    
+    def get_buffer_as_dataframe(self, symbol, interval):
+        return self.get_buffer(symbol, interval).to_dataframe()
+    
+    async def fetch_initial_candles(self, fetcher=None):
+        fetcher = fetcher or BinanceDataFetcher()
+        loop = asyncio.get_running_loop()
+        keys = list(self.buffers)
+        logger.info(f"Fetching initial {self.buffer_size} candles for {len(keys)} streams...")
+        frames = await asyncio.gather(*[
+            loop.run_in_executor(None, fetcher.fetch_klines, symbol, interval, self.buffer_size)
+            for symbol, interval in keys
+        ])
+        loaded = 0
+        for key, df in zip(keys, frames):
+            if df is None or df.empty:
+                logger.error(f"Failed to fetch initial candles for {key[0]} {key[1]}")
+                continue
+            self.buffers[key].extend(df)
+            self.latest_prices[key[0]] = self.buffers[key][-1]['close']
+            loaded += 1
+        logger.info(f"Initialized {loaded}/{len(keys)} stream buffers")
+        return loaded == len(keys)
+    
+    async def _subscribe(self, websocket, stream_names):
+        for request_id, start in enumerate(range(0, len(stream_names), SUBSCRIBE_BATCH_SIZE), start=1):
+            await websocket.send(json.dumps({
+                "method": "SUBSCRIBE",
+                "params": stream_names[start:start + SUBSCRIBE_BATCH_SIZE],
+                "id": request_id
+            }))
+            await asyncio.sleep(SUBSCRIBE_INTERVAL)
+    
+    async def _handle_kline(self, stream, kline):
+        key = self.routes.get(stream)
+        if key is None:
+            return
+        symbol, interval = key
+        open_time, close, is_closed = kline[0], kline[4], kline[7]
+        self.latest_prices[symbol] = close
+        
+        await self._trigger_callbacks(
+            'on_price_update',
+            price=close,
+            timestamp=open_time,
+            is_closed=is_closed,
+            symbol=symbol,
+            interval=interval
+        )
+        
+        if is_closed:
+            await self._publish_candle(symbol, interval, kline_to_candle(kline))
+    
+    async def _publish_candle(self, symbol, interval, candle):
+        buffer = self.buffers[(symbol, interval)]
+        buffer.append(candle)
+        bars = []
+        if self.resampler is not None and interval == self.resampler.base_interval:
+            bars = self.resampler.update(symbol, candle)
+        await self._trigger_callbacks(
+            'on_candle_closed',
+            candle=candle,
+            buffer=buffer,
+            symbol=symbol,
+            interval=interval
+        )
+        for timeframe, bar in bars:
+            await self._trigger_callbacks(
+                'on_candle_closed',
+                candle=bar,
+                buffer=self.resampler.buffer(symbol, timeframe),
+                symbol=symbol,
+                interval=timeframe
+            )
+    
+    async def _handle_message(self, message):
+        decoded = decode_stream_message(message)
+        if decoded is not None:
+            await self._handle_kline(*decoded)
+    
+    async def _stream_shard(self, shard_id, stream_names):
+        while True:
+            try:
+                logger.info(f"Connecting shard {shard_id} with {len(stream_names)} streams: {self.url}")
+                async with websockets.connect(self.url) as websocket:
+                    await self._subscribe(websocket, stream_names)
+                    self.connected_shards.add(shard_id)
+                    logger.info(f"Shard {shard_id} subscribed")
+                    
+                    async for message in websocket:
+                        if self.journal is not None:
+                            self.journal.write(message)
+                        try:
+                            await self._handle_message(message)
+                        except JSONDecodeError as e:
+                            logger.error(f"JSON decode error: {e}")
+                        except Exception as e:
+                            logger.error(f"Error processing message: {e}", exc_info=True)
+                            
+            except websockets.exceptions.WebSocketException as e:
+                logger.error(f"WebSocket error on shard {shard_id}: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error on shard {shard_id}: {e}", exc_info=True)
+            self.connected_shards.discard(shard_id)
+            logger.info("Reconnecting in 5 seconds...")
+            await asyncio.sleep(5)
+    
+    async def connect_and_stream(self):
+        self.dispatcher.start()
+        await asyncio.gather(*[
+            self._stream_shard(shard_id, stream_names)
+            for shard_id, stream_names in enumerate(self.shards())
+        ])
+
 def main():
     print("Crypto Signal Generator")
     
@@ -5,6 +5,7 @@ from .ema import EMAIndicator
 from .bollinger_bands import BollingerBandsIndicator
 from .volume_ma import VolumeMaIndicator
 from .engine import IndicatorEngine
+from .panel import IndicatorPanel
 
 __all__ = [
     'BaseIndicator',
@@ -13,7 +14,8 @@ __all__ = [
     'EMAIndicator',
     'BollingerBandsIndicator',
     'VolumeMaIndicator',
-    'IndicatorEngine'
+    'IndicatorEngine',
+    'IndicatorPanel'
 ]
 
 __version__ = "1.0.0"
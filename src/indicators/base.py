@@ -1,13 +1,82 @@
 import pandas as pd
 from abc import ABC, abstractmethod
+from itertools import product
+from . import kernels
+from .cache import fingerprint, parameter_key
+from .grid import GridGraph, GridResult
+from .panel import IndicatorPanel
 
 class BaseIndicator(ABC):
     def __init__(self, name):
         self.name = name
         self.parameters = {}
+        self.cache = None
+        self.backend = 'pandas_ta'
 
     @abstractmethod
-    def calculate(self, df):
+    def calculate(self, df, graph=None, columns=None):
+        pass
+
+    def cached_calculate(self, df, graph=None, columns=None):
+        if self.cache is None:
+            return self.calculate(df, graph, columns)
+        key = (fingerprint(df), self.name, self.backend, parameter_key(self.parameters), tuple(columns) if columns is not None else None)
+        return self.cache.get_or_compute(key, lambda: self.calculate(df, graph, columns))
+
+    @abstractmethod
+    def output_columns(self):
+        pass
+
+    @abstractmethod
+    def warmup_period(self, columns=None):
+        pass
+
+    def build_frame(self, df, outputs, columns=None):
+        data = {column: compute() for column, compute in outputs.items() if columns is None or column in columns}
+        if isinstance(df, IndicatorPanel):
+            return IndicatorPanel(data, df.index, df.symbols)
+        return pd.DataFrame(data, index=df.index)
+
+    @abstractmethod
+    def calculate_grid(self, df, graph=None, columns=None, **values):
+        pass
+
+    def grid_parameters(self, values):
+        """Every combination of the given parameter values; parameters that are
+        not swept keep the indicator's own setting."""
+        unknown = sorted(set(values) - set(self.parameters))
+        if unknown:
+            raise ValueError(f"{self.name} has no parameters {unknown}")
+        options = [
+            list(values[name]) if isinstance(values.get(name), (list, tuple, range)) else [values.get(name, default)]
+            for name, default in self.parameters.items()
+        ]
+        return [dict(zip(self.parameters, combination)) for combination in product(*options)]
+
+    def build_grid(self, df, parameters, outputs, columns=None):
+        values = {column: compute() for column, compute in outputs.items() if columns is None or column in columns}
+        return GridResult(self.name, parameters, values, df.index)
+
+    def grid_graph(self, df, graph=None):
+        if not self.validate_data(df):
+            raise ValueError("DataFrame must contain required OHLCV columns")
+        return graph or GridGraph(df)
+
+    def divergence(self, df, oscillator, lookback, name):
+        """Price-vs-oscillator divergence as a Series; for a list of lookbacks,
+        a frame with one `<name>_<lookback>` column each."""
+        lookbacks = list(lookback) if isinstance(lookback, (list, tuple, range)) else [lookback]
+        values = kernels.divergence(df['close'], oscillator, lookbacks)
+        if isinstance(lookback, (list, tuple, range)):
+            return pd.DataFrame({f'{name}_{period}': row for period, row in zip(lookbacks, values)}, index=df.index)
+        return pd.Series(values[0], index=df.index, name=name)
+
+    def pivot_divergence(self, df, oscillator, window, max_distance, name):
+        values = kernels.pivot_divergence(df['close'], oscillator, window, max_distance)
+        return pd.Series(values, index=df.index, name=name)
+
+    @abstractmethod
+    def create_state(self):
         pass
 
     def validate_data(self, df):
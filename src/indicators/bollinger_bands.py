@@ -1,8 +1,9 @@
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 import logging
 from .base import BaseIndicator
+from .graph import IndicatorGraph
+from .streaming import RollingStats, divide
 
 class BollingerBandsIndicator(BaseIndicator):
     def __init__(self, period=20, std_dev=2.0):
@@ -11,31 +12,52 @@ class BollingerBandsIndicator(BaseIndicator):
         self.std_dev = std_dev
         self.parameters = {'period': period, 'std_dev': std_dev}
     
-    def calculate(self, df):
+    def calculate(self, df, graph=None, columns=None):
         if not self.validate_data(df):
             raise ValueError("DataFrame must contain required OHLCV columns")
         if len(df) < self.period:
             logging.error("Bollinger Bands calculation failed: Not enough data points. Have %d, need %d", len(df), self.period)
             raise ValueError(f"Not enough data points. Need at least {self.period} rows")
-        bb_data = ta.bbands(df['close'], length=self.period, std=self.std_dev)
-        bb_df = pd.DataFrame(index=df.index)
-        
-        lower_col = [col for col in bb_data.columns if col.startswith('BBL_')]
-        middle_col = [col for col in bb_data.columns if col.startswith('BBM_')]
-        upper_col = [col for col in bb_data.columns if col.startswith('BBU_')]
-        
-        if not lower_col or not middle_col or not upper_col:
-            raise ValueError(f"Bollinger Bands columns not found. Available columns: {list(bb_data.columns)}")
-        
-        bb_df['bb_lower'] = bb_data[lower_col[0]]
-        bb_df['bb_middle'] = bb_data[middle_col[0]]
-        bb_df['bb_upper'] = bb_data[upper_col[0]]
-        bb_df['bb_width'] = (bb_df['bb_upper'] - bb_df['bb_lower']) / bb_df['bb_middle']
-        bb_df['bb_percent'] = (df['close'] - bb_df['bb_lower']) / (bb_df['bb_upper'] - bb_df['bb_lower'])
-        return bb_df
+        graph = graph or IndicatorGraph(df, self.backend)
+        middle = graph.sma('close', self.period)
+        deviations = self.std_dev * graph.rolling_std('close', self.period, ddof=0)
+        lower = middle - deviations
+        upper = middle + deviations
+        return self.build_frame(df, {
+            'bb_lower': lambda: lower,
+            'bb_middle': lambda: middle,
+            'bb_upper': lambda: upper,
+            'bb_width': lambda: (upper - lower) / middle,
+            'bb_percent': lambda: (df['close'] - lower) / (upper - lower)
+        }, columns)
+    
+    def calculate_grid(self, df, graph=None, columns=None, **values):
+        graph = self.grid_graph(df, graph)
+        parameters = self.grid_parameters(values)
+        periods = [p['period'] for p in parameters]
+        middle = graph.sma('close', periods)
+        deviations = np.array([[p['std_dev']] for p in parameters]) * graph.rolling_std('close', periods, ddof=0)
+        close = graph.values('close')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.build_grid(df, parameters, {
+                'bb_lower': lambda: middle - deviations,
+                'bb_middle': lambda: middle,
+                'bb_upper': lambda: middle + deviations,
+                'bb_width': lambda: 2 * deviations / middle,
+                'bb_percent': lambda: (close - middle + deviations) / (2 * deviations)
+            }, columns)
+    
+    def output_columns(self):
+        return ['bb_lower', 'bb_middle', 'bb_upper', 'bb_width', 'bb_percent']
+    
+    def warmup_period(self, columns=None):
+        return self.period
+    
+    def create_state(self):
+        return BollingerBandsState(self.period, self.std_dev)
     
     def get_signals(self, df):
-        bb_data = self.calculate(df)
+        bb_data = self.cached_calculate(df)
         signals_df = bb_data.copy()
         signals_df['close'] = df['close']
         signals_df['touching_upper'] = df['close'] >= bb_data['bb_upper']
@@ -51,7 +73,7 @@ class BollingerBandsIndicator(BaseIndicator):
         return signals_df
     
     def get_volatility_signals(self, df):
-        bb_data = self.calculate(df)
+        bb_data = self.cached_calculate(df)
         vol_df = pd.DataFrame(index=df.index)
         vol_df['bb_width'] = bb_data['bb_width']
         vol_df['bb_width_ma'] = bb_data['bb_width'].rolling(window=10).mean()
@@ -63,7 +85,7 @@ class BollingerBandsIndicator(BaseIndicator):
         return vol_df
     
     def get_mean_reversion_signals(self, df):
-        bb_data = self.calculate(df)
+        bb_data = self.cached_calculate(df)
         mr_df = pd.DataFrame(index=df.index)
         mr_df['bb_percent'] = bb_data['bb_percent']
         mr_df['close'] = df['close']
@@ -76,7 +98,7 @@ class BollingerBandsIndicator(BaseIndicator):
         return mr_df
     
     def get_trend_continuation_signals(self, df):
-        bb_data = self.calculate(df)
+        bb_data = self.cached_calculate(df)
         tc_df = pd.DataFrame(index=df.index)
         tc_df['walking_upper_band'] = (df['close'] >= bb_data['bb_upper']) & (df['close'].shift(1) >= bb_data['bb_upper'].shift(1)) & (df['close'].shift(2) >= bb_data['bb_upper'].shift(2))
         tc_df['walking_lower_band'] = (df['close'] <= bb_data['bb_lower']) & (df['close'].shift(1) <= bb_data['bb_lower'].shift(1)) & (df['close'].shift(2) <= bb_data['bb_lower'].shift(2))
@@ -85,3 +107,24 @@ class BollingerBandsIndicator(BaseIndicator):
         bb_width_ma = bb_data['bb_width'].rolling(window=5).mean()
         tc_df['squeeze_to_expansion'] = (bb_data['bb_width'].shift(1) < bb_width_ma.shift(1)) & (bb_data['bb_width'] > bb_width_ma)
         return tc_df
+
+
+class BollingerBandsState:
+    def __init__(self, period, std_dev):
+        self.std_dev = std_dev
+        self.stats = RollingStats(period, ddof=0)
+
+    def update(self, candle):
+        close = float(candle['close'])
+        self.stats.update(close)
+        middle = self.stats.mean
+        deviation = self.std_dev * self.stats.std
+        lower = middle - deviation
+        upper = middle + deviation
+        return {
+            'bb_lower': lower,
+            'bb_middle': middle,
+            'bb_upper': upper,
+            'bb_width': divide(upper - lower, middle),
+            'bb_percent': divide(close - lower, upper - lower)
+        }
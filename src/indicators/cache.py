@@ -0,0 +1,84 @@
+import copy
+import threading
+from collections import OrderedDict
+
+def fingerprint(df):
+    """Cheap identity for a candle frame: length, first/last timestamp and the
+    last close and volume, so an in-progress candle that changes in place still
+    produces a new key."""
+    if len(df) == 0:
+        return (0,)
+    times = df['timestamp'] if 'timestamp' in df.columns else df.index.to_series()
+    return (
+        len(df),
+        times.iloc[0],
+        times.iloc[-1],
+        float(df['close'].iloc[-1]) if 'close' in df.columns else None,
+        float(df['volume'].iloc[-1]) if 'volume' in df.columns else None
+    )
+
+def parameter_key(parameters):
+    return tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(parameters.items())
+    )
+
+def detach(value):
+    """A copy of a cached result the caller is free to modify."""
+    if hasattr(value, 'copy') and hasattr(value, 'index'):
+        return value.copy()
+    return copy.deepcopy(value)
+
+class ResultCache:
+    """Bounded LRU cache of computed results keyed by (fingerprint, tag).
+
+    Callers get copies, so modifying a result never changes what later calls
+    return.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            hit = key in self.entries
+            if hit:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                value = self.entries[key]
+            else:
+                self.misses += 1
+        if hit:
+            return detach(value)
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return detach(value)
+
+    def invalidate(self, df=None):
+        with self.lock:
+            if df is None:
+                self.entries.clear()
+                return
+            target = fingerprint(df)
+            for key in [key for key in self.entries if key[0] == target]:
+                del self.entries[key]
+
+    def info(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
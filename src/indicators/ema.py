@@ -1,7 +1,8 @@
 import pandas as pd
-import pandas_ta as ta
 import logging
 from .base import BaseIndicator
+from .graph import IndicatorGraph
+from .streaming import EMAState
 
 class EMAIndicator(BaseIndicator):
     def __init__(self, periods=[12, 26]):
@@ -9,7 +10,7 @@ class EMAIndicator(BaseIndicator):
         self.periods = periods
         self.parameters = {'periods': periods}
     
-    def calculate(self, df):
+    def calculate(self, df, graph=None, columns=None):
         if not self.validate_data(df):
             raise ValueError("DataFrame must contain required OHLCV columns")
         
@@ -18,18 +19,34 @@ class EMAIndicator(BaseIndicator):
             logging.error("EMA calculation failed: Not enough data points. Have %d, need %d", len(df), max_period)
             raise ValueError(f"Not enough data points. Need at least {max_period} rows")
         
-        ema_df = pd.DataFrame(index=df.index)
-        for period in self.periods:
-            ema_values = ta.ema(df['close'], length=period)
-            ema_df[f'ema_{period}'] = ema_values
-        
-        return ema_df
+        graph = graph or IndicatorGraph(df, self.backend)
+        return self.build_frame(df, {
+            f'ema_{period}': (lambda period=period: graph.ema('close', period))
+            for period in self.periods
+        }, columns)
+    
+    def calculate_grid(self, df, graph=None, columns=None, periods=None):
+        graph = self.grid_graph(df, graph)
+        parameters = [{'period': period} for period in (periods or self.periods)]
+        return self.build_grid(df, parameters, {
+            'ema': lambda: graph.ema('close', [p['period'] for p in parameters])
+        }, columns)
+    
+    def output_columns(self):
+        return [f'ema_{period}' for period in self.periods]
+    
+    def warmup_period(self, columns=None):
+        periods = [period for period in self.periods if columns is None or f'ema_{period}' in columns]
+        return max(periods, default=0)
+    
+    def create_state(self):
+        return EMAIndicatorState(self.periods)
     
     def get_signals(self, df):
         if len(self.periods) < 2:
             raise ValueError("Need at least 2 periods for crossover signals")
         
-        ema_data = self.calculate(df)
+        ema_data = self.cached_calculate(df)
         signals_df = ema_data.copy()
         
         fast_period = min(self.periods)
@@ -60,7 +77,7 @@ class EMAIndicator(BaseIndicator):
         return signals_df
     
     def get_trend_strength(self, df):
-        ema_data = self.calculate(df)
+        ema_data = self.cached_calculate(df)
         trend_df = pd.DataFrame(index=df.index)
         
         for period in self.periods:
@@ -92,7 +109,7 @@ class EMAIndicator(BaseIndicator):
         if period is None:
             period = max(self.periods)
         
-        ema_data = self.calculate(df)
+        ema_data = self.cached_calculate(df)
         ema_values = ema_data[f'ema_{period}']
         
         sr_df = pd.DataFrame(index=df.index)
@@ -118,3 +135,12 @@ class EMAIndicator(BaseIndicator):
         )
         
         return sr_df
+
+
+class EMAIndicatorState:
+    def __init__(self, periods):
+        self.emas = {f'ema_{period}': EMAState(period) for period in periods}
+
+    def update(self, candle):
+        close = float(candle['close'])
+        return {column: ema.update(close) for column, ema in self.emas.items()}
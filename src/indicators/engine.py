@@ -6,9 +6,14 @@ from .macd import MACDIndicator
 from .ema import EMAIndicator
 from .bollinger_bands import BollingerBandsIndicator
 from .volume_ma import VolumeMaIndicator
+from .cache import ResultCache, fingerprint, parameter_key
+from .graph import BACKENDS, IndicatorGraph
+from .grid import GridGraph
+from .panel import IndicatorPanel
+from .streaming import IndicatorStream
 
 class IndicatorEngine:
-    def __init__(self, config=None):
+    def __init__(self, config=None, cache_size=32, backend='pandas_ta'):
         default_config = {
             'rsi': {'period': 14},
             'macd': {'fast_period': 12, 'slow_period': 26, 'signal_period': 9},
@@ -24,33 +29,164 @@ class IndicatorEngine:
             'bollinger_bands': BollingerBandsIndicator(**self.config['bollinger_bands']),
             'volume_ma': VolumeMaIndicator(**self.config['volume_ma'])
         }
+        self.stream = None
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown indicator backend '{backend}'. Expected one of {BACKENDS}")
+        self.backend = backend
+        self.cache = ResultCache(cache_size) if cache_size else None
+        for indicator in self.indicators.values():
+            indicator.cache = self.cache
+            indicator.backend = backend
 
-    def calculate_all_indicators(self, df):
+    def _cached(self, tag, df, compute):
+        if self.cache is None:
+            return compute()
+        parameters = tuple(parameter_key(indicator.parameters) for indicator in self.indicators.values())
+        return self.cache.get_or_compute((fingerprint(df), tag, self.backend, parameters), compute)
+
+    def invalidate_cache(self, df=None):
+        if self.cache is not None:
+            self.cache.invalidate(df)
+
+    def cache_info(self):
+        return self.cache.info() if self.cache is not None else None
+
+    def calculate_all_indicators(self, df, columns=None):
+        """Enrich `df` with indicator columns. When `columns` is given only the
+        indicators (and auxiliary columns) producing those names are computed."""
         if not self._validate_data(df):
             raise ValueError("DataFrame must contain required OHLCV columns")
+        if columns is not None:
+            columns = tuple(sorted(set(columns)))
+        return self._cached(('all', columns), df, lambda: self._calculate_all_indicators(df, columns))
+
+    def _calculate_all_indicators(self, df, columns=None):
         result_df = df.copy()
+        frames = []
+        graph = IndicatorGraph(df, self.backend)
         logging.info("IndicatorEngine: Calculating all indicators for %d rows", len(df))
-        try:
-            logging.info("Calculating RSI indicator")
-            rsi_data = self.indicators['rsi'].calculate(df)
-            result_df['rsi'] = rsi_data
-            logging.info("Calculating MACD indicator")
-            macd_data = self.indicators['macd'].calculate(df)
-            result_df = pd.concat([result_df, macd_data], axis=1)
-            logging.info("Calculating EMA indicator")
-            ema_data = self.indicators['ema'].calculate(df)
-            result_df = pd.concat([result_df, ema_data], axis=1)
-            logging.info("Calculating Bollinger Bands indicator")
-            bb_data = self.indicators['bollinger_bands'].calculate(df)
-            result_df = pd.concat([result_df, bb_data], axis=1)
-            logging.info("Calculating Volume MA indicator")
-            vol_data = self.indicators['volume_ma'].calculate(df)
-            result_df = pd.concat([result_df, vol_data], axis=1)
-            return result_df
-        except Exception as e:
-            raise
+        for indicator in self.indicators.values():
+            wanted = self.requested_columns(indicator, columns)
+            if wanted is not None and not wanted:
+                continue
+            logging.info("Calculating %s indicator", indicator.name)
+            data = indicator.cached_calculate(df, graph, wanted)
+            if isinstance(data, pd.Series):
+                result_df[indicator.output_columns()[0]] = data
+            else:
+                frames.append(data)
+        logging.debug("IndicatorEngine: %d shared nodes computed, %d reused", graph.misses, graph.hits)
+        return pd.concat([result_df, *frames], axis=1) if frames else result_df
+
+    def calculate_panel(self, data, columns=None):
+        """Compute indicators for many symbols in one pass.
+
+        `data` is an IndicatorPanel, a dict of wide (time x symbols) frames per
+        OHLCV field, or a long-format frame with `symbol` and `timestamp`
+        columns. Returns an IndicatorPanel holding the input fields plus one
+        wide frame per indicator column.
+        """
+        if isinstance(data, IndicatorPanel):
+            panel = data
+        elif isinstance(data, pd.DataFrame):
+            panel = IndicatorPanel.from_long(data)
+        else:
+            panel = IndicatorPanel(data)
+        if not self._validate_data(panel):
+            raise ValueError("Panel must contain required OHLCV fields")
+        graph = IndicatorGraph(panel, self.backend)
+        fields = dict(panel.fields)
+        logging.info("IndicatorEngine: Calculating panel indicators for %d symbols x %d rows", len(panel.symbols), len(panel))
+        for indicator in self.indicators.values():
+            wanted = self.requested_columns(indicator, columns)
+            if wanted is not None and not wanted:
+                continue
+            data = indicator.calculate(panel, graph, wanted)
+            if isinstance(data, IndicatorPanel):
+                fields.update(data.fields)
+            else:
+                fields[indicator.output_columns()[0]] = data
+        return IndicatorPanel(fields, panel.index, panel.symbols)
+
+    def calculate_grid(self, df, grids, columns=None):
+        """Sweep indicator parameters in one pass.
+
+        `grids` is shaped like `indicator_parameters` with lists of values to
+        try, e.g. {'rsi': {'period': [7, 14, 21]}, 'bollinger_bands': {'period':
+        [10, 20], 'std_dev': [1.5, 2.0, 2.5]}}; every combination is computed.
+        Returns {indicator name: GridResult}. All grids share one GridGraph.
+        """
+        if not self._validate_data(df):
+            raise ValueError("DataFrame must contain required OHLCV columns")
+        unknown = sorted(set(grids) - set(self.indicators))
+        if unknown:
+            raise ValueError(f"Unknown indicators {unknown}. Expected some of {list(self.indicators)}")
+        graph = GridGraph(df)
+        results = {}
+        for name, values in grids.items():
+            indicator = self.indicators[name]
+            results[name] = indicator.calculate_grid(df, graph, columns, **values)
+            logging.info("IndicatorEngine: %s grid computed for %d parameter sets", indicator.name, len(results[name]))
+        logging.debug("IndicatorEngine: %d grid rows computed, %d reused", graph.misses, graph.hits)
+        return results
+
+    def compare_backends(self, df, backend='numpy', reference='pandas_ta'):
+        """Parity report between two backends on the same frame: for every
+        indicator column, the number of rows where only one side is NaN and the
+        largest absolute deviation, also relative to the column's magnitude."""
+        results = {}
+        frames = [
+            IndicatorEngine(config=self.config, cache_size=0, backend=name).calculate_all_indicators(df)
+            for name in (reference, backend)
+        ]
+        expected, actual = (frame.loc[:, ~frame.columns.duplicated()] for frame in frames)
+        for column in expected.columns:
+            if column in df.columns:
+                continue
+            left = expected[column].to_numpy(dtype=np.float64)
+            right = actual[column].to_numpy(dtype=np.float64)
+            both = ~np.isnan(left) & ~np.isnan(right)
+            error = float(np.abs(left[both] - right[both]).max()) if both.any() else 0.0
+            scale = float(np.abs(left[both]).max()) if both.any() else 0.0
+            results[column] = {
+                'nan_mismatch': int((np.isnan(left) != np.isnan(right)).sum()),
+                'max_abs_error': error,
+                'max_rel_error': error / scale if scale else error
+            }
+        return results
+
+    def requested_columns(self, indicator, columns):
+        if columns is None:
+            return None
+        return [column for column in indicator.output_columns() if column in columns]
+
+    def warmup_period(self, columns=None):
+        periods = []
+        for indicator in self.indicators.values():
+            wanted = self.requested_columns(indicator, columns)
+            if wanted is None or wanted:
+                periods.append(indicator.warmup_period(wanted))
+        return max(periods, default=0)
+
+    def create_stream(self):
+        return IndicatorStream(self.indicators)
+
+    def update(self, candle):
+        if self.stream is None:
+            self.stream = self.create_stream()
+        return self.stream.update(candle)
+
+    def warm_up(self, df):
+        self.stream = self.create_stream()
+        return self.stream.warm_up(df)
+
+    def reset_stream(self):
+        self.stream = None
 
     def get_trading_signals(self, df):
+        return self._cached('trading_signals', df, lambda: self._get_trading_signals(df))
+
+    def _get_trading_signals(self, df):
         signals_df = pd.DataFrame(index=df.index)
         rsi_signals = self.indicators['rsi'].get_signals(df)
         macd_signals = self.indicators['macd'].get_signals(df)
@@ -111,10 +247,14 @@ class IndicatorEngine:
         return signals_df
 
     def get_market_regime(self, df):
+        return self._cached('market_regime', df, lambda: self._get_market_regime(df))
+
+    def _get_market_regime(self, df):
         regime_df = pd.DataFrame(index=df.index)
-        ema_data = self.indicators['ema'].calculate(df)
-        bb_data = self.indicators['bollinger_bands'].calculate(df)
-        vol_data = self.indicators['volume_ma'].calculate(df)
+        graph = IndicatorGraph(df, self.backend)
+        ema_data = self.indicators['ema'].cached_calculate(df, graph)
+        bb_data = self.indicators['bollinger_bands'].cached_calculate(df, graph)
+        vol_data = self.indicators['volume_ma'].cached_calculate(df, graph)
         if 'ema_12' in ema_data.columns and 'ema_26' in ema_data.columns:
             regime_df['trend_strength'] = abs(
                 (ema_data['ema_12'] - ema_data['ema_26']) / ema_data['ema_26']
@@ -148,28 +288,32 @@ class IndicatorEngine:
     def get_indicator_summary(self, df):
         if len(df) == 0:
             return {}
+        return self._cached('indicator_summary', df, lambda: self._get_indicator_summary(df))
+
+    def _get_indicator_summary(self, df):
         latest_idx = df.index[-1]
         summary = {}
-        rsi_value = self.indicators['rsi'].calculate(df).iloc[-1]
+        graph = IndicatorGraph(df, self.backend)
+        rsi_value = self.indicators['rsi'].cached_calculate(df, graph).iloc[-1]
         summary['rsi'] = {
             'value': round(rsi_value, 2),
             'signal': 'overbought' if rsi_value > 70 else 'oversold' if rsi_value < 30 else 'neutral'
         }
-        macd_data = self.indicators['macd'].calculate(df)
+        macd_data = self.indicators['macd'].cached_calculate(df, graph)
         summary['macd'] = {
             'macd': round(macd_data['macd'].iloc[-1], 4),
             'signal': round(macd_data['signal'].iloc[-1], 4),
             'histogram': round(macd_data['histogram'].iloc[-1], 4),
             'trend': 'bullish' if macd_data['macd'].iloc[-1] > macd_data['signal'].iloc[-1] else 'bearish'
         }
-        bb_data = self.indicators['bollinger_bands'].calculate(df)
+        bb_data = self.indicators['bollinger_bands'].cached_calculate(df, graph)
         bb_position = bb_data['bb_percent'].iloc[-1]
         summary['bollinger_bands'] = {
             'position': round(bb_position, 3),
             'signal': 'overbought' if bb_position > 0.8 else 'oversold' if bb_position < 0.2 else 'neutral',
             'squeeze': bb_data['bb_width'].iloc[-1] < bb_data['bb_width'].rolling(window=20).mean().iloc[-1] * 0.8
         }
-        vol_data = self.indicators['volume_ma'].calculate(df)
+        vol_data = self.indicators['volume_ma'].cached_calculate(df, graph)
         summary['volume'] = {
             'ratio': round(vol_data['vol_ratio_long'].iloc[-1], 2),
             'signal': 'high' if vol_data['vol_ratio_long'].iloc[-1] > 1.5 else 'low' if vol_data['vol_ratio_long'].iloc[-1] < 0.7 else 'normal'
@@ -0,0 +1,111 @@
+import pandas as pd
+from . import kernels
+from .panel import IndicatorPanel
+
+BACKENDS = ('pandas_ta', 'numpy')
+
+def pandas_ta():
+    # Imported on first use so the numpy backend does not pay for it.
+    import pandas_ta as ta
+    return ta
+
+class IndicatorGraph:
+    """Per-call cache of intermediate series shared between indicators.
+
+    Nodes are keyed by (operation, source, parameters), where the source is
+    either a DataFrame column name or the key of another node, so EMA(close, 12)
+    is computed once even when both MACD and EMA need it. The `backend` decides
+    whether nodes come from pandas_ta or from the array kernels in `kernels`;
+    an IndicatorPanel always uses the kernels, which run along the time axis
+    for every symbol at once.
+    """
+
+    def __init__(self, df, backend='pandas_ta'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown indicator backend '{backend}'. Expected one of {BACKENDS}")
+        self.df = df
+        self.backend = backend
+        self.nodes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def node(self, key, compute):
+        if key in self.nodes:
+            self.hits += 1
+            return self.nodes[key]
+        self.misses += 1
+        value = compute()
+        self.nodes[key] = value
+        return value
+
+    def source(self, source):
+        if isinstance(source, tuple):
+            return self.nodes[source]
+        return self.df[source]
+
+    def series(self, values):
+        if values.ndim == 2:
+            return pd.DataFrame(values, index=self.df.index, columns=self.df.symbols)
+        return pd.Series(values, index=self.df.index)
+
+    @property
+    def native(self):
+        return self.backend == 'numpy' or isinstance(self.df, IndicatorPanel)
+
+    def ema(self, source, period):
+        def compute():
+            if self.native:
+                return self.series(kernels.ema(self.source(source).to_numpy(), period))
+            return pandas_ta().ema(self.source(source), length=period)
+
+        return self.node(('ema', source, period), compute)
+
+    def moments(self, source, period):
+        return self.node(('moments', source, period), lambda: kernels.rolling_moments(self.source(source).to_numpy(), period))
+
+    def sma(self, source, period):
+        def compute():
+            if self.native:
+                return self.series(self.moments(source, period)[0])
+            return self.source(source).rolling(window=period).mean()
+
+        return self.node(('sma', source, period), compute)
+
+    def rolling_std(self, source, period, ddof=1):
+        def compute():
+            if self.native:
+                return self.series(kernels.rolling_std(self.moments(source, period)[1], period, ddof))
+            return self.source(source).rolling(window=period).std(ddof=ddof)
+
+        return self.node(('std', source, period, ddof), compute)
+
+    def diff(self, source, periods=1):
+        return self.node(('diff', source, periods), lambda: self.source(source).diff(periods))
+
+    def rsi(self, source, period):
+        def compute():
+            if self.native:
+                return self.series(kernels.rsi(self.source(source).to_numpy(), period))
+            return pandas_ta().rsi(self.source(source), length=period)
+
+        return self.node(('rsi', source, period), compute)
+
+    def macd_line(self, source, fast_period, slow_period):
+        if slow_period < fast_period:
+            fast_period, slow_period = slow_period, fast_period
+        key = ('macd', source, fast_period, slow_period)
+        return self.node(key, lambda: self.ema(source, fast_period) - self.ema(source, slow_period))
+
+    def macd_signal(self, source, fast_period, slow_period, signal_period):
+        if slow_period < fast_period:
+            fast_period, slow_period = slow_period, fast_period
+        macd_key = ('macd', source, fast_period, slow_period)
+
+        def compute():
+            macd = self.macd_line(source, fast_period, slow_period)
+            if self.native:
+                return self.series(kernels.ema_from_first_valid(macd.to_numpy(), signal_period))
+            signal = pandas_ta().ema(macd.loc[macd.first_valid_index():], length=signal_period)
+            return signal.reindex(macd.index)
+
+        return self.node(('ema_valid', macd_key, signal_period), compute)
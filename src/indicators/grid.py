@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from . import kernels
+
+class GridGraph:
+    """Per-call cache of parameter x time intermediates for parameter sweeps.
+
+    Like IndicatorGraph, rows are keyed by (operation, source, parameters), so a
+    row is computed once however many parameter combinations use it: the SMA and
+    standard deviation of one Bollinger period serve every `std_dev`, and each
+    EMA period serves every MACD pair containing it. Rolling means and variances
+    come from prefix sums computed once per source and shared by all windows.
+    Grids always use the array kernels.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.nodes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def node(self, key, compute):
+        if key in self.nodes:
+            self.hits += 1
+            return self.nodes[key]
+        self.misses += 1
+        value = compute()
+        self.nodes[key] = value
+        return value
+
+    def rows(self, keys, compute):
+        """Stack the rows for `keys`, computing the missing ones with one
+        `compute(missing)` call that returns them as a 2-D array."""
+        missing = [key for key in dict.fromkeys(keys) if key not in self.nodes]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            for key, row in zip(missing, compute(missing)):
+                self.nodes[key] = row
+        if not keys:
+            return np.empty((0, len(self.df)))
+        return np.stack([self.nodes[key] for key in keys])
+
+    def values(self, source):
+        return self.node(('values', source), lambda: kernels.as_array(self.df[source].to_numpy()))
+
+    def sums(self, source):
+        return self.node(('sums', source), lambda: kernels.cumulative_sums(self.values(source)))
+
+    def ema(self, source, periods):
+        keys = [('ema', source, period) for period in periods]
+        return self.rows(keys, lambda missing: kernels.ema_grid(self.values(source), [key[2] for key in missing]))
+
+    def sma(self, source, periods):
+        keys = [('sma', source, period) for period in periods]
+        return self.rows(keys, lambda missing: [kernels.window_mean(self.sums(source), key[2]) for key in missing])
+
+    def rolling_std(self, source, periods, ddof=1):
+        def compute(missing):
+            return [
+                kernels.rolling_std(kernels.window_m2(self.sums(source), key[2]), key[2], ddof)
+                for key in missing
+            ]
+
+        return self.rows([('std', source, period, ddof) for period in periods], compute)
+
+    def rsi(self, source, periods):
+        def compute(missing):
+            gains, losses = self.node(('gains_losses', source), lambda: kernels.gains_losses(self.values(source)))
+            missing = [key[2] for key in missing]
+            average_gain = kernels.rma_grid(gains, missing)
+            average_loss = kernels.rma_grid(losses, missing)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return 100.0 * average_gain / (average_gain + average_loss)
+
+        return self.rows([('rsi', source, period) for period in periods], compute)
+
+    def macd_line(self, source, pairs):
+        pairs = [tuple(sorted(pair)) for pair in pairs]
+
+        def compute(missing):
+            fast = self.ema(source, [key[2] for key in missing])
+            slow = self.ema(source, [key[3] for key in missing])
+            return fast - slow
+
+        return self.rows([('macd', source, fast, slow) for fast, slow in pairs], compute)
+
+    def macd_signal(self, source, combinations):
+        combinations = [(*sorted((fast, slow)), signal) for fast, slow, signal in combinations]
+
+        def compute(missing):
+            macd = self.macd_line(source, [key[1][2:] for key in missing])
+            return kernels.ema_rows(macd, [key[2] for key in missing])
+
+        keys = [('ema_valid', ('macd', source, fast, slow), signal) for fast, slow, signal in combinations]
+        return self.rows(keys, compute)
+
+
+class GridResult:
+    """Indicator outputs for many parameter sets.
+
+    `result[column]` is a (parameter set, time) array whose row i was computed
+    with `result.parameters[i]`.
+    """
+
+    def __init__(self, name, parameters, values, index):
+        self.name = name
+        self.parameters = parameters
+        self.values = values
+        self.index = index
+
+    @property
+    def columns(self):
+        return list(self.values)
+
+    def __getitem__(self, column):
+        return self.values[column]
+
+    def __len__(self):
+        return len(self.parameters)
+
+    def parameter_index(self):
+        names = list(self.parameters[0]) if self.parameters else []
+        return pd.MultiIndex.from_tuples([tuple(parameters.values()) for parameters in self.parameters], names=names)
+
+    def find(self, **parameters):
+        for i, candidate in enumerate(self.parameters):
+            if all(candidate.get(name) == value for name, value in parameters.items()):
+                return i
+        raise KeyError(f"{self.name} grid has no parameter set {parameters}")
+
+    def row(self, i):
+        return pd.DataFrame({column: values[i] for column, values in self.values.items()}, index=self.index)
+
+    def to_frame(self, column):
+        return pd.DataFrame(self.values[column].T, index=self.index, columns=self.parameter_index())
@@ -0,0 +1,420 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+def jit(function):
+    if NUMBA_AVAILABLE:
+        return njit(cache=True, nogil=True)(function)
+    return function
+
+@jit
+def _ema_loop(values, period):
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+    alpha = 2.0 / (period + 1.0)
+    decay = 1.0 - alpha
+    total = 0.0
+    count = 0
+    for i in range(period):
+        if values[i] == values[i]:
+            total += values[i]
+            count += 1
+    weighted = total / count if count else np.nan
+    out[period - 1] = weighted
+    # Like pandas' ewm(ignore_na=False): the old weight keeps decaying over NaNs.
+    weight = 1.0
+    for i in range(period, n):
+        current = values[i]
+        weight *= decay
+        if current == current:
+            if weighted != current:
+                weighted = (weight * weighted + alpha * current) / (weight + alpha)
+            weight = 1.0
+        out[i] = weighted
+    return out
+
+@jit
+def _rma_loop(values, period):
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    decay = 1.0 - 1.0 / period
+    weighted = np.nan
+    weight = 1.0
+    count = 0
+    for i in range(n):
+        current = values[i]
+        if count > 0:
+            weight *= decay
+        if current == current:
+            count += 1
+            if count == 1:
+                weighted = current
+            else:
+                if weighted != current:
+                    weighted = (weight * weighted + current) / (weight + 1.0)
+                weight += 1.0
+        if count >= period:
+            out[i] = weighted
+    return out
+
+@jit
+def _window_moments(values, end, window):
+    total = 0.0
+    for i in range(end - window + 1, end + 1):
+        total += values[i]
+    average = total / window
+    squares = 0.0
+    for i in range(end - window + 1, end + 1):
+        delta = values[i] - average
+        squares += delta * delta
+    return average, squares
+
+@jit
+def _rolling_moments_loop(values, window, refresh_every):
+    # Welford add/remove updates, recomputed exactly every `refresh_every`
+    # rows and whenever a NaN leaves the window; constant windows are exact.
+    n = values.shape[0]
+    mean = np.full(n, np.nan)
+    m2 = np.full(n, np.nan)
+    average = 0.0
+    squares = 0.0
+    nans = 0
+    same_run = 0
+    since_refresh = 0
+    for i in range(n):
+        current = values[i]
+        if i > 0 and current == values[i - 1]:
+            same_run += 1
+        else:
+            same_run = 1
+        if current != current:
+            nans += 1
+        if i >= window and values[i - window] != values[i - window]:
+            nans -= 1
+            if nans == 0 and i >= window - 1:
+                average, squares = _window_moments(values, i, window)
+                since_refresh = 0
+                mean[i] = average
+                m2[i] = squares
+                continue
+        if nans > 0:
+            continue
+        if i < window:
+            delta = current - average
+            average += delta / (i + 1)
+            squares += delta * (current - average)
+        else:
+            since_refresh += 1
+            if since_refresh >= refresh_every:
+                average, squares = _window_moments(values, i, window)
+                since_refresh = 0
+            else:
+                previous = values[i - window]
+                updated = average + (current - previous) / window
+                squares += (current - previous) * (current - updated + previous - average)
+                average = updated
+        if same_run >= window:
+            average = current
+            squares = 0.0
+        elif squares < 0.0:
+            squares = 0.0
+        if i >= window - 1:
+            mean[i] = average
+            m2[i] = squares
+    return mean, m2
+
+@jit
+def _first_valid(row):
+    start = 0
+    while start < row.shape[0] and row[start] != row[start]:
+        start += 1
+    return start
+
+@jit
+def _ema_panel_loop(rows, period):
+    out = np.full(rows.shape, np.nan)
+    for j in range(rows.shape[0]):
+        start = _first_valid(rows[j])
+        if start < rows.shape[1]:
+            out[j, start:] = _ema_loop(rows[j, start:], period)
+    return out
+
+@jit
+def _rma_panel_loop(rows, period):
+    out = np.empty(rows.shape)
+    for j in range(rows.shape[0]):
+        out[j] = _rma_loop(rows[j], period)
+    return out
+
+@jit
+def _rolling_moments_panel_loop(rows, window, refresh_every):
+    mean = np.empty(rows.shape)
+    m2 = np.empty(rows.shape)
+    for j in range(rows.shape[0]):
+        mean[j], m2[j] = _rolling_moments_loop(rows[j], window, refresh_every)
+    return mean, m2
+
+@jit
+def _ema_grid_loop(values, periods):
+    out = np.empty((periods.shape[0], values.shape[0]))
+    for k in range(periods.shape[0]):
+        out[k] = _ema_loop(values, periods[k])
+    return out
+
+@jit
+def _rma_grid_loop(values, periods):
+    out = np.empty((periods.shape[0], values.shape[0]))
+    for k in range(periods.shape[0]):
+        out[k] = _rma_loop(values, periods[k])
+    return out
+
+@jit
+def _ema_rows_loop(rows, periods):
+    out = np.full(rows.shape, np.nan)
+    for k in range(rows.shape[0]):
+        start = _first_valid(rows[k])
+        if start < rows.shape[1]:
+            out[k, start:] = _ema_loop(rows[k, start:], periods[k])
+    return out
+
+def _rows(values):
+    # Panels arrive as (time, symbols); the loops want each symbol contiguous.
+    return np.ascontiguousarray(values.T)
+
+def _ema_panel(values, period):
+    if NUMBA_AVAILABLE:
+        return _ema_panel_loop(_rows(values), period).T
+    n = values.shape[0]
+    valid = ~np.isnan(values)
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), n)
+    seed_rows = first + period - 1
+    seeded = values.copy()
+    seeded[np.arange(n)[:, None] < seed_rows] = np.nan
+    sums = np.vstack([np.zeros((1, values.shape[1])), np.nancumsum(values, axis=0)])
+    for column in np.flatnonzero(seed_rows < n):
+        seeded[seed_rows[column], column] = (sums[seed_rows[column] + 1, column] - sums[first[column], column]) / period
+    return pd.DataFrame(seeded).ewm(span=period, adjust=False).mean().to_numpy()
+
+def _rolling_moments_pandas(values, window):
+    rolling = (pd.DataFrame(values) if values.ndim == 2 else pd.Series(values)).rolling(window=window)
+    mean = np.array(rolling.mean().to_numpy())
+    m2 = rolling.var(ddof=0).to_numpy() * window
+    # Constant windows are exact, as in the loop.
+    constant = rolling.max().to_numpy() == rolling.min().to_numpy()
+    mean[constant] = values[constant]
+    m2[constant] = 0.0
+    return mean, m2
+
+def as_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+def ema(values, period):
+    """pandas_ta.ema: SMA seed over the first `period` values, then a recursive EMA."""
+    values = as_array(values)
+    if values.ndim == 2:
+        return _ema_panel(values, period)
+    if NUMBA_AVAILABLE:
+        return _ema_loop(values, period)
+    out = np.full(values.shape[0], np.nan)
+    if values.shape[0] < period:
+        return out
+    seeded = values.copy()
+    seeded[:period - 1] = np.nan
+    seeded[period - 1] = np.nanmean(values[:period])
+    return pd.Series(seeded).ewm(span=period, adjust=False).mean().to_numpy()
+
+def ema_from_first_valid(values, period):
+    values = as_array(values)
+    if values.ndim == 2:
+        return _ema_panel(values, period)
+    out = np.full(values.shape[0], np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if valid.size:
+        out[valid[0]:] = ema(values[valid[0]:], period)
+    return out
+
+def rma(values, period):
+    """pandas_ta.rma: adjusted EWM with alpha=1/period and `period` observations before output."""
+    values = as_array(values)
+    if NUMBA_AVAILABLE:
+        if values.ndim == 2:
+            return _rma_panel_loop(_rows(values), period).T
+        return _rma_loop(values, period)
+    frame = pd.DataFrame(values) if values.ndim == 2 else pd.Series(values)
+    return frame.ewm(alpha=1.0 / period, min_periods=period).mean().to_numpy()
+
+def diff(values, periods=1):
+    values = as_array(values)
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] > periods:
+        out[periods:] = values[periods:] - values[:-periods]
+    return out
+
+def gains_losses(values):
+    change = diff(values)
+    gains = np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0))
+    losses = np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0))
+    return gains, losses
+
+def rsi(values, period):
+    gains, losses = gains_losses(values)
+    average_gain = rma(gains, period)
+    average_loss = rma(losses, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * average_gain / (average_gain + average_loss)
+
+def rolling_moments(values, window):
+    """Rolling mean and sum of squared deviations in one scan, so the mean and
+    every ddof variant of the standard deviation share the work."""
+    values = as_array(values)
+    if NUMBA_AVAILABLE:
+        if values.ndim == 2:
+            mean, m2 = _rolling_moments_panel_loop(_rows(values), window, 1024)
+            return mean.T, m2.T
+        return _rolling_moments_loop(values, window, 1024)
+    return _rolling_moments_pandas(values, window)
+
+def rolling_std(m2, window, ddof=1):
+    if window - ddof <= 0:
+        return np.full(m2.shape, np.nan)
+    return np.sqrt(m2 / (window - ddof))
+
+def _periods(periods):
+    return np.asarray(periods, dtype=np.int64)
+
+def ema_grid(values, periods):
+    """One EMA row per period over the same series: shape (len(periods), time)."""
+    values = as_array(values)
+    if NUMBA_AVAILABLE:
+        return _ema_grid_loop(values, _periods(periods))
+    return np.array([ema(values, period) for period in periods]).reshape(len(periods), values.shape[0])
+
+def rma_grid(values, periods):
+    values = as_array(values)
+    if NUMBA_AVAILABLE:
+        return _rma_grid_loop(values, _periods(periods))
+    return np.array([rma(values, period) for period in periods]).reshape(len(periods), values.shape[0])
+
+def ema_rows(rows, periods):
+    """EMA of each row with its own period, seeded at the row's first valid value."""
+    rows = as_array(rows)
+    if NUMBA_AVAILABLE:
+        return _ema_rows_loop(rows, _periods(periods))
+    return np.array([ema_from_first_valid(row, period) for row, period in zip(rows, periods)]).reshape(rows.shape)
+
+def cumulative_sums(values):
+    """Prefix sums shared by every window length: any rolling sum is then a
+    difference of two entries. Values are centred on their mean first so the
+    sum of squares keeps its precision on large prices. `run` counts the equal
+    values ending at each row, so constant windows can be made exact."""
+    values = as_array(values)
+    missing = np.isnan(values)
+    center = float(np.nanmean(values)) if not missing.all() else 0.0
+    centred = np.where(missing, 0.0, values - center)
+    zero = np.zeros(1)
+    rows = np.arange(values.shape[0])
+    changed = np.ones(values.shape[0], dtype=bool)
+    changed[1:] = values[1:] != values[:-1]
+    return {
+        'center': center,
+        'values': values,
+        'run': rows - np.maximum.accumulate(np.where(changed, rows, 0)) + 1,
+        'sum': np.concatenate([zero, np.cumsum(centred)]),
+        'squares': np.concatenate([zero, np.cumsum(centred * centred)]),
+        'nans': np.concatenate([zero, np.cumsum(missing)])
+    }
+
+def window_sums(sums, window):
+    """Rolling sum of centred values and of their squares over `window` rows,
+    NaN where the window is incomplete or contains a NaN."""
+    n = sums['sum'].shape[0] - 1
+    total = np.full(n, np.nan)
+    squares = np.full(n, np.nan)
+    if window <= n:
+        complete = sums['nans'][window:] == sums['nans'][:-window]
+        total[window - 1:] = np.where(complete, sums['sum'][window:] - sums['sum'][:-window], np.nan)
+        squares[window - 1:] = np.where(complete, sums['squares'][window:] - sums['squares'][:-window], np.nan)
+    return total, squares
+
+def window_mean(sums, window):
+    mean = window_sums(sums, window)[0] / window + sums['center']
+    # Constant windows are exact, as in the rolling loop.
+    constant = sums['run'] >= window
+    mean[constant] = sums['values'][constant]
+    return mean
+
+def window_m2(sums, window):
+    total, squares = window_sums(sums, window)
+    m2 = np.maximum(squares - total * total / window, 0.0)
+    m2[sums['run'] >= window] = 0.0
+    return m2
+
+def divergence(price, oscillator, lookbacks):
+    """Divergence over each lookback, one row per lookback: +1 where price fell
+    while the oscillator rose since `lookback` rows back, -1 for the reverse and
+    0 otherwise (including rows with a NaN on either side). Panels (time x
+    symbols) get a (lookback, time, symbol) array."""
+    price = as_array(price)
+    oscillator = as_array(oscillator)
+    out = np.zeros((len(lookbacks),) + price.shape, dtype=np.int64)
+    for row, lookback in zip(out, lookbacks):
+        if 0 < lookback < price.shape[0]:
+            price_trend = price[lookback:] - price[:-lookback]
+            oscillator_trend = oscillator[lookback:] - oscillator[:-lookback]
+            bullish = (price_trend < 0) & (oscillator_trend > 0)
+            bearish = (price_trend > 0) & (oscillator_trend < 0)
+            row[lookback:] = bullish.astype(np.int64) - bearish.astype(np.int64)
+    return out
+
+def rolling_extrema(values, window, maximum=True):
+    rolling = pd.Series(as_array(values)).rolling(window)
+    return (rolling.max() if maximum else rolling.min()).to_numpy()
+
+def pivots(values, window, maximum=True):
+    """Rows that are the highest (or lowest) value within `window` rows on
+    either side. A pivot at row j is only known at row j + window."""
+    values = as_array(values)
+    n = values.shape[0]
+    pivot = np.zeros(n, dtype=bool)
+    if n > 2 * window:
+        extreme = rolling_extrema(values, 2 * window + 1, maximum)
+        pivot[window:n - window] = values[window:n - window] == extreme[2 * window:]
+    return pivot
+
+def pivot_divergence(price, oscillator, window, max_distance=None):
+    """Swing divergence between consecutive price pivots: +1 where a pivot low
+    is lower than the previous one while the oscillator's is higher, -1 where a
+    pivot high is higher while the oscillator's is lower. Signals land on the
+    row that confirms the later pivot, `window` rows after it, so nothing looks
+    ahead. With `max_distance`, pivots further apart are not compared."""
+    price = as_array(price)
+    oscillator = as_array(oscillator)
+    if price.ndim == 2:
+        return np.column_stack([
+            pivot_divergence(price[:, column], oscillator[:, column], window, max_distance)
+            for column in range(price.shape[1])
+        ]).reshape(price.shape)
+    out = np.zeros(price.shape[0], dtype=np.int64)
+    for maximum, sign in ((False, 1), (True, -1)):
+        rows = np.flatnonzero(pivots(price, window, maximum))
+        if rows.shape[0] < 2:
+            continue
+        previous, current = rows[:-1], rows[1:]
+        price_trend = price[current] - price[previous]
+        oscillator_trend = oscillator[current] - oscillator[previous]
+        if maximum:
+            found = (price_trend > 0) & (oscillator_trend < 0)
+        else:
+            found = (price_trend < 0) & (oscillator_trend > 0)
+        if max_distance is not None:
+            found &= current - previous <= max_distance
+        out[current[found] + window] += sign
+    return out
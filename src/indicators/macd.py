@@ -1,6 +1,7 @@
 import pandas as pd
-import pandas_ta as ta
 from .base import BaseIndicator
+from .graph import IndicatorGraph
+from .streaming import EMAState
 import logging
 
 class MACDIndicator(BaseIndicator):
@@ -15,7 +16,7 @@ class MACDIndicator(BaseIndicator):
             'signal_period': signal_period
         }
     
-    def calculate(self, df):
+    def calculate(self, df, graph=None, columns=None):
         if not self.validate_data(df):
             raise ValueError("DataFrame must contain required OHLCV columns")
         
@@ -24,22 +25,39 @@ class MACDIndicator(BaseIndicator):
             logging.error("MACD calculation failed: Not enough data points. Have %d, need %d", len(df), min_periods)
             raise ValueError(f"Not enough data points. Need at least {min_periods} rows")
         
-        macd_data = ta.macd(
-            df['close'],
-            fast=self.fast_period,
-            slow=self.slow_period,
-            signal=self.signal_period
-        )
-        
-        macd_df = pd.DataFrame(index=df.index)
-        macd_df['macd'] = macd_data[f'MACD_{self.fast_period}_{self.slow_period}_{self.signal_period}']
-        macd_df['signal'] = macd_data[f'MACDs_{self.fast_period}_{self.slow_period}_{self.signal_period}']
-        macd_df['histogram'] = macd_data[f'MACDh_{self.fast_period}_{self.slow_period}_{self.signal_period}']
-        
-        return macd_df
+        graph = graph or IndicatorGraph(df, self.backend)
+        macd = graph.macd_line('close', self.fast_period, self.slow_period)
+        signal = graph.macd_signal('close', self.fast_period, self.slow_period, self.signal_period)
+        return self.build_frame(df, {
+            'macd': lambda: macd,
+            'signal': lambda: signal,
+            'histogram': lambda: macd - signal
+        }, columns)
+    
+    def calculate_grid(self, df, graph=None, columns=None, **values):
+        graph = self.grid_graph(df, graph)
+        parameters = self.grid_parameters(values)
+        pairs = [(p['fast_period'], p['slow_period']) for p in parameters]
+        combinations = [(p['fast_period'], p['slow_period'], p['signal_period']) for p in parameters]
+        macd = lambda: graph.macd_line('close', pairs)
+        signal = lambda: graph.macd_signal('close', combinations)
+        return self.build_grid(df, parameters, {
+            'macd': macd,
+            'signal': signal,
+            'histogram': lambda: macd() - signal()
+        }, columns)
+    
+    def output_columns(self):
+        return ['macd', 'signal', 'histogram']
+    
+    def warmup_period(self, columns=None):
+        return max(self.slow_period, self.fast_period) + self.signal_period
+    
+    def create_state(self):
+        return MACDState(self.fast_period, self.slow_period, self.signal_period)
     
     def get_signals(self, df):
-        macd_data = self.calculate(df)
+        macd_data = self.cached_calculate(df)
         
         signals_df = macd_data.copy()
         signals_df['signal_type'] = 0
@@ -70,24 +88,15 @@ class MACDIndicator(BaseIndicator):
         return signals_df
     
     def get_divergence(self, df, lookback=10):
-        macd_data = self.calculate(df)
-        price = df['close']
-        
-        divergence = pd.Series(0, index=df.index, name='macd_divergence')
-        
-        for i in range(lookback, len(df)):
-            price_trend = price.iloc[i] - price.iloc[i-lookback]
-            macd_trend = macd_data['macd'].iloc[i] - macd_data['macd'].iloc[i-lookback]
-            
-            if price_trend < 0 and macd_trend > 0:
-                divergence.iloc[i] = 1
-            elif price_trend > 0 and macd_trend < 0:
-                divergence.iloc[i] = -1
-        
-        return divergence
+        macd_data = self.cached_calculate(df)
+        return self.divergence(df, macd_data['macd'], lookback, 'macd_divergence')
+    
+    def get_pivot_divergence(self, df, window=5, max_distance=None):
+        macd_data = self.cached_calculate(df)
+        return self.pivot_divergence(df, macd_data['macd'], window, max_distance, 'macd_pivot_divergence')
     
     def get_zero_line_cross(self, df):
-        macd_data = self.calculate(df)
+        macd_data = self.cached_calculate(df)
         
         crosses_df = pd.DataFrame(index=df.index)
         crosses_df['macd'] = macd_data['macd']
@@ -103,3 +112,19 @@ class MACDIndicator(BaseIndicator):
         )
         
         return crosses_df
+
+class MACDState:
+    def __init__(self, fast_period, slow_period, signal_period):
+        self.fast = EMAState(fast_period)
+        self.slow = EMAState(slow_period)
+        self.signal = EMAState(signal_period)
+
+    def update(self, candle):
+        close = float(candle['close'])
+        macd = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(macd)
+        return {
+            'macd': macd,
+            'signal': signal,
+            'histogram': macd - signal
+        }
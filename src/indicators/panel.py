@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'trades_count']
+
+class IndicatorPanel:
+    """Aligned wide frames (time x symbols), one per field.
+
+    Behaves like a single-symbol candle DataFrame where it matters to the
+    indicators: `panel['close']` is a DataFrame indexed by time with one column
+    per symbol, `panel.columns` lists the fields and `len(panel)` is the number
+    of timestamps. Symbols that start later than others carry leading NaNs and
+    are computed from their own first candle.
+    """
+
+    def __init__(self, fields, index=None, symbols=None):
+        frames = dict(fields)
+        if index is None:
+            index = pd.Index([])
+            for frame in frames.values():
+                index = index.union(frame.index)
+        if symbols is None:
+            symbols = []
+            for frame in frames.values():
+                symbols.extend(symbol for symbol in frame.columns if symbol not in symbols)
+        self.index = pd.Index(index)
+        self.symbols = list(symbols)
+        self.fields = {
+            name: frame if frame.index.equals(self.index) and list(frame.columns) == self.symbols
+            else frame.reindex(index=self.index, columns=self.symbols)
+            for name, frame in frames.items()
+        }
+
+    @classmethod
+    def from_long(cls, df, symbol_column='symbol', time_column='timestamp'):
+        rows, index = pd.factorize(df[time_column], sort=True)
+        columns, symbols = pd.factorize(df[symbol_column])
+        fields = {}
+        for field in PANEL_FIELDS:
+            if field not in df.columns:
+                continue
+            values = np.full((len(index), len(symbols)), np.nan)
+            # Later rows win, so a duplicated candle keeps its last update.
+            values[rows, columns] = df[field].to_numpy(dtype=np.float64)
+            fields[field] = pd.DataFrame(values, index=index, columns=list(symbols))
+        return cls(fields, index, list(symbols))
+
+    @property
+    def columns(self):
+        return list(self.fields)
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, name, default=None):
+        return self.fields.get(name, default)
+
+    def tail(self, n):
+        return IndicatorPanel({name: frame.iloc[-n:] for name, frame in self.fields.items()}, self.index[-n:], self.symbols)
+
+    def symbol_frame(self, symbol):
+        frame = pd.DataFrame({name: wide[symbol] for name, wide in self.fields.items()}, index=self.index)
+        return frame.dropna(how='all')
+
+    def to_long(self, symbol_column='symbol', time_column='timestamp'):
+        frames = []
+        for symbol in self.symbols:
+            frame = self.symbol_frame(symbol)
+            frame.index.name = time_column
+            frames.append(frame.reset_index().assign(**{symbol_column: symbol}))
+        if not frames:
+            return pd.DataFrame(columns=[time_column, symbol_column, *self.fields])
+        return pd.concat(frames, ignore_index=True)
@@ -1,6 +1,7 @@
 import pandas as pd
-import pandas_ta as ta
 from .base import BaseIndicator
+from .graph import IndicatorGraph
+from .streaming import RMAState, NAN
 import logging
 
 class RSIIndicator(BaseIndicator):
@@ -9,17 +10,34 @@ class RSIIndicator(BaseIndicator):
         self.period = period
         self.parameters = {'period': period}
     
-    def calculate(self, df):
+    def calculate(self, df, graph=None, columns=None):
         if not self.validate_data(df):
             raise ValueError("DataFrame must contain required OHLCV columns")
         if len(df) < self.period:
             logging.error("RSI calculation failed: Not enough data points. Have %d, need %d", len(df), self.period)
             raise ValueError(f"Not enough data points. Need at least {self.period} rows")
-        rsi_values = ta.rsi(df['close'], length=self.period)
+        graph = graph or IndicatorGraph(df, self.backend)
+        rsi_values = graph.rsi('close', self.period)
         return rsi_values
     
+    def calculate_grid(self, df, graph=None, columns=None, **values):
+        graph = self.grid_graph(df, graph)
+        parameters = self.grid_parameters(values)
+        return self.build_grid(df, parameters, {
+            'rsi': lambda: graph.rsi('close', [p['period'] for p in parameters])
+        }, columns)
+    
+    def output_columns(self):
+        return ['rsi']
+    
+    def warmup_period(self, columns=None):
+        return self.period + 1
+    
+    def create_state(self):
+        return RSIState(self.period)
+    
     def get_signals(self, df, overbought=70, oversold=30):
-        rsi_values = self.calculate(df)
+        rsi_values = self.cached_calculate(df)
         signals_df = pd.DataFrame(index=df.index)
         signals_df['rsi'] = rsi_values
         signals_df['overbought'] = rsi_values > overbought
@@ -30,14 +48,28 @@ class RSIIndicator(BaseIndicator):
         return signals_df
     
     def get_divergence(self, df, lookback=5):
-        rsi_values = self.calculate(df)
-        price = df['close']
-        divergence = pd.Series(0, index=df.index, name='rsi_divergence')
-        for i in range(lookback, len(df)):
-            price_trend = price.iloc[i] - price.iloc[i-lookback]
-            rsi_trend = rsi_values.iloc[i] - rsi_values.iloc[i-lookback]
-            if price_trend < 0 and rsi_trend > 0:
-                divergence.iloc[i] = 1
-            elif price_trend > 0 and rsi_trend < 0:
-                divergence.iloc[i] = -1
-        return divergence
+        rsi_values = self.cached_calculate(df)
+        return self.divergence(df, rsi_values, lookback, 'rsi_divergence')
+
+    def get_pivot_divergence(self, df, window=5, max_distance=None):
+        rsi_values = self.cached_calculate(df)
+        return self.pivot_divergence(df, rsi_values, window, max_distance, 'rsi_pivot_divergence')
+
+class RSIState:
+    def __init__(self, period):
+        self.gains = RMAState(period)
+        self.losses = RMAState(period)
+        self.previous_close = None
+
+    def update(self, candle):
+        close = float(candle['close'])
+        if self.previous_close is not None:
+            change = close - self.previous_close
+            self.gains.update(max(change, 0.0))
+            self.losses.update(min(change, 0.0))
+        self.previous_close = close
+        gain = self.gains.value
+        loss = abs(self.losses.value)
+        denominator = gain + loss
+        rsi = 100 * gain / denominator if denominator else NAN
+        return {'rsi': rsi}
@@ -0,0 +1,153 @@
+import math
+from collections import deque
+
+NAN = float('nan')
+
+def divide(numerator, denominator):
+    if denominator == 0 or math.isnan(denominator):
+        if denominator == 0 and numerator != 0 and not math.isnan(numerator):
+            return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+        return NAN
+    return numerator / denominator
+
+class EMAState:
+    """Recursive EMA seeded with the SMA of the first `period` values, as pandas_ta.ema does."""
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.count += 1
+        if self.count < self.period:
+            self.seed_sum += x
+        elif self.count == self.period:
+            self.value = (self.seed_sum + x) / self.period
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+class RMAState:
+    """Wilder smoothing as an adjusted EWM (alpha=1/period), matching pandas_ta.rma."""
+
+    def __init__(self, period):
+        self.period = period
+        self.decay = 1.0 - 1.0 / period
+        self.count = 0
+        self.weight = 1.0
+        self.average = NAN
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        self.count += 1
+        if self.count == 1:
+            self.average = x
+        else:
+            self.weight *= self.decay
+            if self.average != x:
+                self.average = (self.weight * self.average + x) / (self.weight + 1.0)
+            self.weight += 1.0
+        return self.value
+
+    @property
+    def value(self):
+        return self.average if self.count >= self.period else NAN
+
+class RollingStats:
+    """Fixed-window mean and standard deviation from running sums.
+
+    Sums are kept relative to an anchor value and rebuilt from the window
+    periodically so long streams do not accumulate cancellation error. A
+    window of identical values reports exactly that value as its mean and
+    zero deviation, as the batch indicators do.
+    """
+
+    rebuild_every = 4096
+
+    def __init__(self, window, ddof=1):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque(maxlen=window)
+        self.anchor = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.updates = 0
+        self.same_run = 0
+
+    def update(self, x):
+        if self.values and self.values[-1] == x:
+            self.same_run += 1
+        else:
+            self.same_run = 1
+        if self.anchor is None:
+            self.anchor = x
+        if len(self.values) == self.window:
+            old = self.values[0] - self.anchor
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        delta = x - self.anchor
+        self.total += delta
+        self.total_sq += delta * delta
+        self.updates += 1
+        if self.updates % self.rebuild_every == 0:
+            self._rebuild()
+
+    def _rebuild(self):
+        self.anchor = sum(self.values) / len(self.values)
+        deltas = [value - self.anchor for value in self.values]
+        self.total = sum(deltas)
+        self.total_sq = sum(delta * delta for delta in deltas)
+
+    @property
+    def ready(self):
+        return len(self.values) == self.window
+
+    @property
+    def mean(self):
+        if not self.ready:
+            return NAN
+        if self.same_run >= self.window:
+            return self.values[-1]
+        return self.anchor + self.total / self.window
+
+    @property
+    def std(self):
+        if not self.ready or self.window - self.ddof <= 0:
+            return NAN
+        if self.same_run >= self.window:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.window) / (self.window - self.ddof)
+        return math.sqrt(max(variance, 0.0))
+
+class IndicatorStream:
+    """Per-symbol streaming state for every indicator of an IndicatorEngine.
+
+    Each update costs O(1) in the length of the history and returns the
+    newest row with the same columns as `calculate_all_indicators`.
+    """
+
+    def __init__(self, indicators):
+        self.states = {name: indicator.create_state() for name, indicator in indicators.items()}
+        self.count = 0
+        self.latest = None
+
+    def update(self, candle):
+        row = dict(candle)
+        for state in self.states.values():
+            row.update(state.update(candle))
+        self.count += 1
+        self.latest = row
+        return row
+
+    def warm_up(self, df):
+        columns = [col for col in df.columns if col in ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'trades_count')]
+        for candle in df[columns].to_dict('records'):
+            self.update(candle)
+        return self.latest
@@ -1,8 +1,9 @@
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 import logging
 from .base import BaseIndicator
+from .graph import IndicatorGraph
+from .streaming import EMAState, RollingStats, divide
 
 class VolumeMaIndicator(BaseIndicator):
     def __init__(self, short_period=10, long_period=30):
@@ -14,7 +15,7 @@ class VolumeMaIndicator(BaseIndicator):
             'long_period': long_period
         }
     
-    def calculate(self, df):
+    def calculate(self, df, graph=None, columns=None):
         if not self.validate_data(df):
             raise ValueError("DataFrame must contain required OHLCV columns")
         
@@ -22,20 +23,52 @@ class VolumeMaIndicator(BaseIndicator):
             logging.error("Volume MA calculation failed: Not enough data points. Have %d, need %d", len(df), self.long_period)
             raise ValueError(f"Not enough data points. Need at least {self.long_period} rows")
         
-        vol_df = pd.DataFrame(index=df.index)
-        vol_df['volume'] = df['volume']
-        vol_df['vol_sma_short'] = df['volume'].rolling(window=self.short_period).mean()
-        vol_df['vol_sma_long'] = df['volume'].rolling(window=self.long_period).mean()
-        vol_df['vol_ema_short'] = ta.ema(df['volume'], length=self.short_period)
-        vol_df['vol_ema_long'] = ta.ema(df['volume'], length=self.long_period)
-        vol_df['vol_ratio_short'] = df['volume'] / vol_df['vol_sma_short']
-        vol_df['vol_ratio_long'] = df['volume'] / vol_df['vol_sma_long']
-        vol_df['vol_std'] = df['volume'].rolling(window=self.long_period).std()
-        vol_df['vol_zscore'] = (df['volume'] - vol_df['vol_sma_long']) / vol_df['vol_std']
-        return vol_df
+        graph = graph or IndicatorGraph(df, self.backend)
+        volume = df['volume']
+        return self.build_frame(df, {
+            'volume': lambda: volume,
+            'vol_sma_short': lambda: graph.sma('volume', self.short_period),
+            'vol_sma_long': lambda: graph.sma('volume', self.long_period),
+            'vol_ema_short': lambda: graph.ema('volume', self.short_period),
+            'vol_ema_long': lambda: graph.ema('volume', self.long_period),
+            'vol_ratio_short': lambda: volume / graph.sma('volume', self.short_period),
+            'vol_ratio_long': lambda: volume / graph.sma('volume', self.long_period),
+            'vol_std': lambda: graph.rolling_std('volume', self.long_period),
+            'vol_zscore': lambda: (volume - graph.sma('volume', self.long_period)) / graph.rolling_std('volume', self.long_period)
+        }, columns)
+    
+    def calculate_grid(self, df, graph=None, columns=None, **values):
+        graph = self.grid_graph(df, graph)
+        parameters = self.grid_parameters(values)
+        short = [p['short_period'] for p in parameters]
+        long = [p['long_period'] for p in parameters]
+        volume = graph.values('volume')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.build_grid(df, parameters, {
+                'vol_sma_short': lambda: graph.sma('volume', short),
+                'vol_sma_long': lambda: graph.sma('volume', long),
+                'vol_ema_short': lambda: graph.ema('volume', short),
+                'vol_ema_long': lambda: graph.ema('volume', long),
+                'vol_ratio_short': lambda: volume / graph.sma('volume', short),
+                'vol_ratio_long': lambda: volume / graph.sma('volume', long),
+                'vol_std': lambda: graph.rolling_std('volume', long),
+                'vol_zscore': lambda: (volume - graph.sma('volume', long)) / graph.rolling_std('volume', long)
+            }, columns)
+    
+    def output_columns(self):
+        return ['volume', 'vol_sma_short', 'vol_sma_long', 'vol_ema_short', 'vol_ema_long',
+                'vol_ratio_short', 'vol_ratio_long', 'vol_std', 'vol_zscore']
+    
+    def warmup_period(self, columns=None):
+        if columns is not None and not {'vol_sma_long', 'vol_ema_long', 'vol_ratio_long', 'vol_std', 'vol_zscore'} & set(columns):
+            return self.short_period
+        return self.long_period
+    
+    def create_state(self):
+        return VolumeMaState(self.short_period, self.long_period)
     
     def get_volume_anomalies(self, df, spike_threshold=2.0):
-        vol_data = self.calculate(df)
+        vol_data = self.cached_calculate(df)
         anomaly_df = vol_data.copy()
         anomaly_df['volume_spike'] = vol_data['vol_ratio_long'] > spike_threshold
         anomaly_df['volume_dryup'] = vol_data['vol_ratio_long'] < 0.5
@@ -48,7 +81,7 @@ class VolumeMaIndicator(BaseIndicator):
         return anomaly_df
     
     def get_volume_price_analysis(self, df):
-        vol_data = self.calculate(df)
+        vol_data = self.cached_calculate(df)
         vpa_df = pd.DataFrame(index=df.index)
         price_change = df['close'].pct_change()
         volume_change = df['volume'].pct_change()
@@ -64,7 +97,7 @@ class VolumeMaIndicator(BaseIndicator):
         return vpa_df
     
     def get_volume_trend_analysis(self, df):
-        vol_data = self.calculate(df)
+        vol_data = self.cached_calculate(df)
         trend_df = pd.DataFrame(index=df.index)
         trend_df['vol_ma_trend'] = vol_data['vol_sma_short'] > vol_data['vol_sma_long']
         trend_df['vol_momentum'] = vol_data['vol_sma_short'].pct_change()
@@ -83,7 +116,7 @@ class VolumeMaIndicator(BaseIndicator):
         return trend_df
     
     def get_climax_signals(self, df):
-        vol_data = self.calculate(df)
+        vol_data = self.cached_calculate(df)
         climax_df = pd.DataFrame(index=df.index)
         price_change = df['close'].pct_change()
         high_volume = vol_data['vol_ratio_long'] > 2.0
@@ -95,3 +128,30 @@ class VolumeMaIndicator(BaseIndicator):
         vol_ma_5 = vol_data['vol_sma_short'].rolling(window=5).mean()
         climax_df['volume_exhaustion'] = (vol_data['vol_sma_short'] > vol_ma_5 * 1.5) & (vol_data['vol_sma_short'].shift(1) > vol_data['vol_sma_short'])
         return climax_df
+
+
+class VolumeMaState:
+    def __init__(self, short_period, long_period):
+        self.short = RollingStats(short_period)
+        self.long = RollingStats(long_period)
+        self.ema_short = EMAState(short_period)
+        self.ema_long = EMAState(long_period)
+
+    def update(self, candle):
+        volume = float(candle['volume'])
+        self.short.update(volume)
+        self.long.update(volume)
+        sma_short = self.short.mean
+        sma_long = self.long.mean
+        vol_std = self.long.std
+        return {
+            'volume': volume,
+            'vol_sma_short': sma_short,
+            'vol_sma_long': sma_long,
+            'vol_ema_short': self.ema_short.update(volume),
+            'vol_ema_long': self.ema_long.update(volume),
+            'vol_ratio_short': divide(volume, sma_short),
+            'vol_ratio_long': divide(volume, sma_long),
+            'vol_std': vol_std,
+            'vol_zscore': divide(volume - sma_long, vol_std)
+        }
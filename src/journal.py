@@ -0,0 +1,136 @@
+import asyncio
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+import numpy as np
+from decode import JSONDecodeError
+from fetch import bar_interval_to_milliseconds
+
+logger = logging.getLogger(__name__)
+
+class MessageJournal:
+    """Append-only gzip journal of raw websocket frames.
+
+    Each line is `<receive time, epoch ns>\\t<frame>`. Reopening an existing
+    journal appends a new gzip member, which readers see as one continuous
+    file. The compressor is flushed every `flush_interval` seconds, so a
+    crash loses at most that much of the session.
+    """
+
+    def __init__(self, path, flush_interval=1.0, compresslevel=6):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.handle = gzip.open(self.path, 'at', encoding='utf-8', compresslevel=compresslevel)
+        self.last_flush = time.monotonic()
+        self.written = 0
+
+    def write(self, message, received=None):
+        if isinstance(message, (bytes, bytearray)):
+            message = message.decode('utf-8')
+        received = received if received is not None else time.time_ns()
+        self.handle.write(f"{received}\t{message}\n")
+        self.written += 1
+        now = time.monotonic()
+        if now - self.last_flush >= self.flush_interval:
+            self.handle.flush()
+            self.last_flush = now
+
+    def flush(self):
+        self.handle.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if not self.handle.closed:
+            self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_journal(path):
+    """(receive time in epoch ns, frame) for every frame of a journal. A line
+    cut short by a crash ends the journal instead of failing the replay."""
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        try:
+            for line in handle:
+                received, _, message = line.rstrip('\n').partition('\t')
+                if not message:
+                    continue
+                yield int(received), message
+        except (EOFError, gzip.BadGzipFile):
+            logger.warning(f"Journal {path} ends with a truncated record")
+
+def iter_candle_frames(records, symbol, interval):
+    """Closed raw kline frames for candle `records` (see `store.CANDLE_DTYPE`),
+    each received the moment its candle closes."""
+    step = bar_interval_to_milliseconds(interval)
+    symbol = symbol.upper()
+    for timestamp, open_price, high, low, close, volume, trades_count in records.tolist():
+        close_time = timestamp + step
+        yield close_time * 1_000_000, json.dumps({
+            'e': 'kline',
+            'E': close_time,
+            's': symbol,
+            'k': {
+                't': timestamp,
+                'T': close_time - 1,
+                's': symbol,
+                'i': interval,
+                'o': repr(open_price),
+                'h': repr(high),
+                'l': repr(low),
+                'c': repr(close),
+                'v': repr(volume),
+                'n': trades_count,
+                'x': True,
+            },
+        }, separators=(',', ':'))
+
+def iter_store_file(path):
+    """Kline frames for a candle store partition,
+    <root>/<SYMBOL>/<interval>/<YYYY-MM-DD>.npy."""
+    path = Path(path)
+    return iter_candle_frames(np.load(path), path.parent.parent.name, path.parent.name)
+
+def iter_replay_source(path):
+    path = Path(path)
+    return iter_store_file(path) if path.suffix == '.npy' else iter_journal(path)
+
+async def replay(client, source, speed=1.0):
+    """Feed (receive time, frame) pairs from `source` into `client` through
+    the same `_handle_message` path as its websocket.
+
+    With `speed` 1 frames arrive with their recorded spacing, with N at N×
+    speed, and with None or 0 as fast as possible. `source` may also be a
+    journal or candle store partition path. Returns the number of frames
+    replayed once every callback has run.
+    """
+    if isinstance(source, (str, Path)):
+        source = iter_replay_source(source)
+    client.dispatcher.start()
+    count = 0
+    first = None
+    started = time.perf_counter()
+    for received, message in source:
+        if speed:
+            if first is None:
+                first = received
+            delay = (received - first) / 1e9 / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        try:
+            await client._handle_message(message)
+        except JSONDecodeError as e:
+            logger.error(f"JSON decode error: {e}")
+        except Exception as e:
+            logger.error(f"Error processing message: {e}", exc_info=True)
+        count += 1
+    await client.dispatcher.join()
+    elapsed = time.perf_counter() - started
+    logger.info(f"Replayed {count} frames in {elapsed:.3f}s ({count / elapsed if elapsed else 0:.0f} frames/s)")
+    return count
@@ -8,12 +8,20 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+import pandas as pd
+
 from flask import Flask, send_from_directory
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 
-from signals import SignalGenerator
-from fetch import BinanceWebSocketClient
+from fetch import BinanceMultiStreamClient
+from indicators.engine import IndicatorEngine
+from journal import MessageJournal, replay
+from resample import TimeframeResampler
+from signals import condition_timeframes, load_config_file
+from snapshot import restore_snapshot, snapshot_loop
+from trades import BinanceAggTradeClient
+from workers import SignalWorkerPool
 
 logging.basicConfig(
     level=logging.INFO,
@@ -41,11 +49,30 @@ socketio = SocketIO(
     ping_interval=25
 )
 
+SYMBOLS = [symbol.strip().upper() for symbol in os.getenv('SYMBOLS', 'BTCUSDT').split(',') if symbol.strip()]
+INTERVAL = os.getenv('INTERVAL', '1s')
+# 'kline' streams exchange candles; 'aggtrade' builds INTERVAL bars (which may
+# be sub-second, e.g. 250ms) locally from trades.
+SOURCE = os.getenv('SOURCE', 'kline').lower()
+BUFFER_SIZE = 35
+# JOURNAL records every raw frame to a gzip journal. REPLAY feeds a journal or
+# candle store partition instead of connecting, at REPLAY_SPEED× ('max' for as
+# fast as possible).
+JOURNAL = os.getenv('JOURNAL')
+REPLAY = os.getenv('REPLAY')
+REPLAY_SPEED = os.getenv('REPLAY_SPEED', '1')
+# With SNAPSHOT set (e.g. data/snapshot.npz), buffers and indicator state are
+# saved there every SNAPSHOT_INTERVAL seconds and restored on startup.
+SNAPSHOT = os.getenv('SNAPSHOT', '')
+SNAPSHOT_INTERVAL = float(os.getenv('SNAPSHOT_INTERVAL', 5))
+
 class AppState:
     def __init__(self):
         self.current_signal = "NEUTRAL"
         self.signal_data = None
-        self.symbol = "BTCUSDT"
+        self.symbol = SYMBOLS[0]
+        self.symbols = SYMBOLS
+        self.current_signals = {}
         self.binance_client = None
         self.connected_clients = 0
         
@@ -55,50 +82,89 @@ class AppState:
 state = AppState()
 
 config_path = Path(__file__).parent.parent / "config.json"
-signal_generator = SignalGenerator(config_path=str(config_path))
+config = load_config_file(config_path)
+
+# Higher timeframes are resampled from the INTERVAL stream: the ones named by
+# `<timeframe>:<condition>` strategy conditions, which the signal buffer is too
+# short to resample, and any extra ones in TIMEFRAMES.
+TIMEFRAMES = list(dict.fromkeys([
+    *condition_timeframes(config.get('strategies', [])),
+    *[timeframe.strip() for timeframe in os.getenv('TIMEFRAMES', '').split(',') if timeframe.strip()]
+]))
 
-binance_client = BinanceWebSocketClient(
-    symbol=state.symbol,
-    interval="1s",
-    buffer_size=35
+# Also streams the INTERVAL indicators themselves, which signals are built from.
+resampler = TimeframeResampler(
+    TIMEFRAMES,
+    base_interval=INTERVAL,
+    engine=IndicatorEngine(config=config.get('indicator_parameters'), cache_size=0),
+    buffer_size=BUFFER_SIZE
 )
+
+journal = MessageJournal(JOURNAL) if JOURNAL and not REPLAY else None
+
+if SOURCE == 'aggtrade':
+    binance_client = BinanceAggTradeClient(
+        SYMBOLS,
+        intervals=[INTERVAL],
+        buffer_size=BUFFER_SIZE,
+        resampler=resampler,
+        journal=journal
+    )
+else:
+    binance_client = BinanceMultiStreamClient(
+        [(symbol, INTERVAL) for symbol in SYMBOLS],
+        buffer_size=BUFFER_SIZE,
+        resampler=resampler,
+        journal=journal
+    )
 state.binance_client = binance_client
 
-async def on_price_update(price, timestamp, is_closed):
+async def on_price_update(price, timestamp, is_closed, symbol, interval):
     try:
         state.broadcast('price_update', {
+            'symbol': symbol,
             'price': price,
-            'timestamp': timestamp.isoformat(),
+            'timestamp': pd.Timestamp(timestamp, unit='ms').isoformat(),
             'is_closed': is_closed
         })
     except Exception as e:
         logger.error(f"Error broadcasting price update: {e}")
 
-async def on_candle_closed(candle, buffer):
+async def on_candle_closed(candle, buffer, symbol, interval):
     try:
-        if len(buffer) >= 35:
-            await check_for_signals()
+        if interval != INTERVAL:
+            return
+        if len(buffer) >= BUFFER_SIZE:
+            # The client fed the candle to the resampler before this callback.
+            rows = resampler.base_indicator_frame(symbol)
+            signal_workers.submit(symbol, rows, resampler.indicator_frames(symbol), streamed=True)
     except Exception as e:
         logger.error(f"Error in candle closed handler: {e}")
 
-async def check_for_signals():
+def publish_signal(symbol, latest_signal):
     try:
-        df = binance_client.get_buffer_as_dataframe()
-        if not df.empty and len(df) >= 35:
-            signals = signal_generator.generate_signals(df, symbol=state.symbol)
-            if signals:
-                latest_signal = signals[-1]
-                signal_type = latest_signal.get('signal', 'NEUTRAL')
-                if signal_type != state.current_signal:
-                    logger.info(f"Signal changed: {state.current_signal} -> {signal_type}")
-                    state.current_signal = signal_type
-                    state.signal_data = latest_signal
-                    state.broadcast('signal', {
-                        'signal': signal_type,
-                        'data': latest_signal
-                    })
+        signal_type = latest_signal.get('signal', 'NEUTRAL')
+        previous_signal = state.current_signals.get(symbol, "NEUTRAL")
+        if signal_type != previous_signal:
+            logger.info(f"Signal changed for {symbol}: {previous_signal} -> {signal_type}")
+            state.current_signals[symbol] = signal_type
+            if symbol == state.symbol:
+                state.current_signal = signal_type
+                state.signal_data = latest_signal
+            state.broadcast('signal', {
+                'symbol': symbol,
+                'signal': signal_type,
+                'data': latest_signal
+            })
     except Exception as e:
-        logger.error(f"Error checking for signals: {e}")
+        logger.error(f"Error publishing signal: {e}")
+
+signal_workers = SignalWorkerPool(
+    config_path,
+    executor=os.getenv('SIGNAL_EXECUTOR', 'thread'),
+    max_workers=int(os.getenv('SIGNAL_WORKERS', 2)),
+    on_result=publish_signal
+)
 
 @app.route('/')
 def index():
@@ -128,6 +194,9 @@ def health_check():
         'status': 'healthy',
         'connected_clients': state.connected_clients,
         'current_signal': state.current_signal,
+        'signals': state.current_signals,
+        'dispatch': binance_client.dispatcher.metrics(),
+        'signal_workers': signal_workers.metrics(),
         'timestamp': datetime.now().isoformat()
     }, 200
 
@@ -145,17 +214,20 @@ def handle_connect():
     try:
         state.connected_clients += 1
         logger.info(f"Client connected. Total clients: {state.connected_clients}")
-        emit('connection_status', {'status': 'connected'})
+        emit('connection_status', {'status': 'connected', 'symbol': state.symbol})
         
         if state.signal_data:
             emit('signal', {
+                'symbol': state.symbol,
                 'signal': state.current_signal,
                 'data': state.signal_data
             })
         
-        if binance_client.latest_price:
+        latest_price = binance_client.latest_prices.get(state.symbol)
+        if latest_price:
             emit('price_update', {
-                'price': binance_client.latest_price,
+                'symbol': state.symbol,
+                'price': latest_price,
                 'timestamp': datetime.now().isoformat(),
                 'is_closed': False
             })
@@ -190,12 +262,26 @@ def run_binance_websocket():
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(binance_client.fetch_initial_candles())
-            logger.info("Initial candles fetched successfully")
-            loop.run_until_complete(binance_client.connect_and_stream())
+            if REPLAY:
+                # Buffers fill from the replay alone so runs are reproducible.
+                speed = 0 if REPLAY_SPEED == 'max' else float(REPLAY_SPEED)
+                loop.run_until_complete(replay(binance_client, REPLAY, speed=speed))
+                return
+            if SNAPSHOT and loop.run_until_complete(restore_snapshot(SNAPSHOT, binance_client, resampler)):
+                logger.info("Resumed from snapshot")
+            else:
+                loop.run_until_complete(binance_client.fetch_initial_candles())
+                logger.info("Initial candles fetched successfully")
+                loop.run_until_complete(resampler.fetch_initial_bars(SYMBOLS))
+            tasks = [binance_client.connect_and_stream()]
+            if SNAPSHOT:
+                tasks.append(snapshot_loop(SNAPSHOT, binance_client, resampler, SNAPSHOT_INTERVAL))
+            loop.run_until_complete(asyncio.gather(*tasks))
         except Exception as e:
             logger.error(f"Error in WebSocket event loop: {e}")
         finally:
+            if journal is not None:
+                journal.close()
             loop.close()
     except Exception as e:
         logger.error(f"Fatal error in Binance WebSocket thread: {e}")
@@ -0,0 +1,239 @@
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, product
+from multiprocessing import shared_memory
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from backtest import CANDLE_COLUMNS, Backtester
+from indicators.engine import IndicatorEngine
+from signals import compute_conditions, load_config_file, load_dataframe
+
+logger = logging.getLogger(__name__)
+
+class SharedArrays:
+    """Named NumPy arrays packed into one shared memory block.
+
+    The parent creates the block once; workers attach to it by name from
+    `spec` and get zero-copy views, so candle and indicator columns are never
+    pickled per task.
+    """
+
+    def __init__(self, block, layout, owner):
+        self.block = block
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            for name, (offset, shape, dtype) in layout.items()
+        }
+
+    @classmethod
+    def create(cls, arrays):
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            size = -(-size // 64) * 64
+            layout[name] = (size, array.shape, array.dtype.str)
+            size += array.nbytes
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shared = cls(block, layout, owner=True)
+        for name, array in arrays.items():
+            shared.arrays[name][...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(shared_memory.SharedMemory(name=spec['name']), spec['layout'], owner=False)
+
+    @property
+    def spec(self):
+        return {'name': self.block.name, 'layout': self.layout}
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def close(self):
+        self.arrays = {}
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+_shared = None
+_base_config = None
+_frame = None
+_conditions = {}
+
+def _init_worker(spec, base_config):
+    global _shared, _base_config, _frame
+    _shared = SharedArrays.attach(spec)
+    _base_config = base_config
+    columns = [name for name in _shared.arrays if name != 'timestamp']
+    _frame = pd.DataFrame({name: pd.Series(_shared[name], copy=False) for name in columns}, copy=False)
+    _conditions.clear()
+
+def _release_worker():
+    global _shared, _frame
+    _frame = None
+    _conditions.clear()
+    if _shared is not None:
+        _shared.close()
+        _shared = None
+
+def evaluate_candidate(candidate):
+    config = apply_candidate(_base_config, candidate)
+    backtester = Backtester(config=config)
+    generator = backtester.generator
+    names = generator.indicator_plan['conditions'] if generator.indicator_plan else None
+    key = (json.dumps(generator.thresholds, sort_keys=True), tuple(names) if names is not None else None)
+    # Candidates that keep the thresholds reuse the same conditions.
+    if key not in _conditions:
+        if len(_conditions) >= 8:
+            _conditions.clear()
+        _conditions[key] = compute_conditions(_frame, generator.thresholds, names)
+        if generator.timeframe_plan:
+            candles = _frame[[column for column in CANDLE_COLUMNS if column in _frame.columns]]
+            _conditions[key].update(generator.timeframe_conditions(candles.assign(timestamp=_shared['timestamp'])))
+    report = backtester.run_conditions(_conditions[key], _shared['timestamp'], _shared['close'])
+    return candidate, report
+
+def apply_candidate(base_config, candidate):
+    config = copy.deepcopy(base_config)
+    enabled = candidate.get('strategies')
+    min_confluence = candidate.get('min_confluence', {})
+    for strategy in config.get('strategies', []):
+        name = strategy.get('name')
+        if enabled is not None:
+            strategy['enabled'] = name in enabled
+        if name in min_confluence:
+            strategy['min_confluence'] = min_confluence[name]
+    config.setdefault('signal_settings', {}).update(candidate.get('signal_settings', {}))
+    for group, values in candidate.get('thresholds', {}).items():
+        config.setdefault('thresholds', {}).setdefault(group, {}).update(values)
+    return config
+
+def strategy_subsets(config, min_size=1, max_size=None):
+    names = [strategy['name'] for strategy in config.get('strategies', []) if strategy.get('enabled', True)]
+    max_size = len(names) if max_size is None else max_size
+    return [list(subset) for size in range(min_size, max_size + 1) for subset in combinations(names, size)]
+
+def candidate_configs(config, space, max_candidates=None, seed=0):
+    """Every combination of the search space, as small overrides of `config`.
+
+    `space` may hold `strategies` (a list of enabled-name lists, see
+    `strategy_subsets`), `min_confluence` (a list of values for every strategy,
+    or {name: [values]}), and `signal_settings` / `thresholds` shaped like the
+    config with lists of values. With `max_candidates`, a seeded random sample
+    of that size is returned instead.
+    """
+    axes = []
+    if 'strategies' in space:
+        axes.append([('strategies', None, list(names)) for names in space['strategies']])
+    min_confluence = space.get('min_confluence')
+    if isinstance(min_confluence, dict):
+        for name, values in min_confluence.items():
+            axes.append([('min_confluence', name, value) for value in values])
+    elif min_confluence is not None:
+        axes.append([('min_confluence', '*', value) for value in min_confluence])
+    for key, values in space.get('signal_settings', {}).items():
+        axes.append([('signal_settings', key, value) for value in values])
+    for group, keys in space.get('thresholds', {}).items():
+        for key, values in keys.items():
+            axes.append([('thresholds', (group, key), value) for value in values])
+    names = [strategy.get('name') for strategy in config.get('strategies', [])]
+    candidates = []
+    for choice in product(*axes):
+        candidate = {}
+        for section, key, value in choice:
+            if section == 'strategies':
+                candidate['strategies'] = value
+            elif section == 'min_confluence':
+                targets = names if key == '*' else [key]
+                candidate.setdefault('min_confluence', {}).update({name: value for name in targets})
+            elif section == 'thresholds':
+                candidate.setdefault('thresholds', {}).setdefault(key[0], {})[key[1]] = value
+            else:
+                candidate.setdefault(section, {})[key] = value
+        candidates.append(candidate)
+    if max_candidates is not None and len(candidates) > max_candidates:
+        candidates = random.Random(seed).sample(candidates, max_candidates)
+    return candidates
+
+def share_history(df, config):
+    """Candles plus every indicator column of `config`, computed once and
+    packed into shared memory."""
+    engine = IndicatorEngine(
+        config=config.get('indicator_parameters'),
+        cache_size=0,
+        backend=config.get('indicator_backend', 'pandas_ta')
+    )
+    indicator_df = engine.calculate_all_indicators(df)
+    indicator_df = indicator_df.loc[:, ~indicator_df.columns.duplicated()]
+    arrays = {'timestamp': pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ns]')}
+    for column in indicator_df.columns:
+        if column != 'timestamp':
+            arrays[column] = indicator_df[column].to_numpy(dtype=np.float64)
+    return SharedArrays.create(arrays)
+
+def optimize(df, space, config=None, config_path=None, processes=None, rank_by='total_return',
+             descending=True, min_trades=0, max_candidates=None, seed=0):
+    """Backtest every candidate of `space` on `df` across a process pool and
+    return the reports ranked by `rank_by`.
+
+    Indicators are computed once in the parent and shared with the workers
+    through shared memory; each worker then only recomputes conditions when a
+    candidate changes thresholds.
+    """
+    if config is None:
+        config = load_config_file(Path(config_path) if config_path else Path(__file__).resolve().parents[1] / 'config.json')
+    candidates = candidate_configs(config, space, max_candidates, seed)
+    processes = processes or os.cpu_count() or 1
+    logger.info(f"Optimizing {len(candidates)} candidates on {len(df)} candles with {processes} processes")
+    shared = share_history(df, config)
+    try:
+        if processes == 1:
+            _init_worker(shared.spec, config)
+            try:
+                results = [evaluate_candidate(candidate) for candidate in candidates]
+            finally:
+                _release_worker()
+        else:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork') if 'fork' in methods else None
+            with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker,
+                                     initargs=(shared.spec, config)) as executor:
+                chunksize = max(1, len(candidates) // (processes * 4))
+                results = list(executor.map(evaluate_candidate, candidates, chunksize=chunksize))
+    finally:
+        shared.close()
+    ranked = [
+        {'candidate': candidate, 'report': report}
+        for candidate, report in results
+        if report['trades'] >= min_trades and report.get(rank_by) is not None
+    ]
+    ranked.sort(key=lambda result: result['report'][rank_by], reverse=descending)
+    for rank, result in enumerate(ranked, start=1):
+        result['rank'] = rank
+    return ranked
+
+def run_cli(space_file, data_file, config=None, processes=None, rank_by='total_return', top=10, output=None):
+    with open(space_file, 'r', encoding='utf-8') as handle:
+        space = json.load(handle)
+    results = optimize(load_dataframe(data_file), space, config_path=config, processes=processes, rank_by=rank_by)
+    for result in results[:top]:
+        report = result['report']
+        print(f"#{result['rank']} {rank_by}={report[rank_by]:.6f} trades={report['trades']} "
+              f"hit_rate={report['hit_rate']} max_drawdown={report['max_drawdown']:.4f} {result['candidate']}")
+    if output:
+        destination = Path(output).expanduser().resolve()
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with destination.open('w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2, default=str)
+        print(f"Saved {len(results)} ranked results to {destination}")
+    return 0
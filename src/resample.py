@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+from candle_buffer import CandleRingBuffer, to_milliseconds
+from fetch import INTERVAL_MILLISECONDS, BinanceDataFetcher, bar_interval_to_milliseconds
+
+logger = logging.getLogger(__name__)
+
+BAR_AGGREGATION = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'trades_count': 'sum',
+}
+
+# Closed bars fetched per timeframe at startup to warm the indicator streams.
+WARMUP_BARS = 500
+
+def resample_candles(df, interval):
+    """Aggregate candles into `interval` bars aligned to the epoch, as Binance
+    aligns klines. Bars are built from whatever candles fall in them, so the
+    first and last bar of a frame may be partial."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['timestamp', *BAR_AGGREGATION])
+    step = bar_interval_to_milliseconds(interval)
+    times = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    columns = [column for column in BAR_AGGREGATION if column in df.columns]
+    bars = df[columns].groupby(times // step * step, sort=True).agg({column: BAR_AGGREGATION[column] for column in columns})
+    bars.insert(0, 'timestamp', pd.to_datetime(bars.index, unit='ms'))
+    return bars.reset_index(drop=True)
+
+class BarAggregator:
+    """The partial `interval` bar built from closed candles of `base_interval`.
+
+    `update(candle)` returns the bars the candle closes: the current bar as
+    soon as the candle ending its period arrives, so a 1m bar is out the
+    moment its last second closes, and a still-open bar when a candle of a
+    later bar arrives after a gap. Candles of bars already closed, and
+    candles already aggregated, are ignored. A bar whose first candle was
+    never seen, such as the one in progress when streaming starts, is
+    incomplete and is dropped instead of returned.
+    """
+
+    def __init__(self, interval, base_interval='1s'):
+        self.interval = interval
+        self.step = bar_interval_to_milliseconds(interval)
+        self.base_step = bar_interval_to_milliseconds(base_interval)
+        self.start = None
+        self.bar = None
+        self.complete = False
+        self.closed_until = None
+        self.last_open = None
+
+    def update(self, candle):
+        open_time = to_milliseconds(candle['timestamp'])
+        if self.closed_until is not None and open_time < self.closed_until:
+            return []
+        if self.last_open is not None and open_time <= self.last_open:
+            return []
+        self.last_open = open_time
+        start = open_time // self.step * self.step
+        closed = []
+        if self.bar is not None and start != self.start:
+            closed.extend(self.close())
+        if self.bar is None:
+            self.start = start
+            self.complete = open_time == start
+            self.bar = {
+                'timestamp': pd.Timestamp(start, unit='ms'),
+                'open': candle['open'],
+                'high': candle['high'],
+                'low': candle['low'],
+                'close': candle['close'],
+                'volume': candle['volume'],
+                'trades_count': candle.get('trades_count', 0),
+            }
+        else:
+            bar = self.bar
+            bar['high'] = max(bar['high'], candle['high'])
+            bar['low'] = min(bar['low'], candle['low'])
+            bar['close'] = candle['close']
+            bar['volume'] += candle['volume']
+            bar['trades_count'] += candle.get('trades_count', 0)
+        if open_time + self.base_step >= start + self.step:
+            closed.extend(self.close())
+        return closed
+
+    def close(self):
+        """The current bar as a list, empty when the bar is incomplete."""
+        bar = self.bar
+        self.bar = None
+        self.closed_until = self.start + self.step
+        return [bar] if self.complete else []
+
+    def partial(self):
+        return dict(self.bar) if self.bar is not None else None
+
+class IndicatorRows:
+    """An IndicatorStream and the newest `history` rows it returned."""
+
+    def __init__(self, engine, history):
+        self.stream = engine.create_stream() if engine is not None else None
+        self.rows = deque(maxlen=history)
+
+    def add(self, bar):
+        if self.stream is not None:
+            self.rows.append(self.stream.update(bar))
+
+    def frame(self):
+        return pd.DataFrame(list(self.rows))
+
+class TimeframeState(IndicatorRows):
+    def __init__(self, interval, base_interval, engine, buffer_size, history):
+        super().__init__(engine, history)
+        self.aggregator = BarAggregator(interval, base_interval)
+        self.buffer = CandleRingBuffer(buffer_size)
+
+    def add(self, bar):
+        self.buffer.append(bar)
+        super().add(bar)
+
+class TimeframeResampler:
+    """Higher-timeframe bars built in-process from one base candle stream.
+
+    Every (symbol, timeframe) keeps its partial bar, a CandleRingBuffer of
+    closed bars and its own IndicatorStream, so a timeframe's indicators are
+    updated once per bar, when it closes. `indicator_frames(symbol)` returns
+    the newest `history` indicator rows of each timeframe, which is what
+    `SignalGenerator` takes for `<timeframe>:<condition>` conditions.
+
+    Every symbol also keeps an IndicatorStream of the base candles, so
+    `base_indicator_frame(symbol)` holds the base indicators without
+    recomputing them over a buffer. The timeframes may be empty.
+    """
+
+    def __init__(self, timeframes, base_interval='1s', engine=None, buffer_size=35, history=None):
+        base_step = bar_interval_to_milliseconds(base_interval)
+        for timeframe in timeframes:
+            step = bar_interval_to_milliseconds(timeframe)
+            if step <= base_step or step % base_step:
+                raise ValueError(f"Timeframe {timeframe} is not a multiple of the base interval {base_interval}")
+        self.timeframes = list(timeframes)
+        self.base_interval = base_interval
+        self.engine = engine
+        self.buffer_size = buffer_size
+        self.history = history or buffer_size
+        self.states = {}
+        self.base_states = {}
+
+    def state(self, symbol, timeframe):
+        symbol = symbol.upper()
+        if symbol not in self.states:
+            self.states[symbol] = {
+                interval: TimeframeState(interval, self.base_interval, self.engine, self.buffer_size, self.history)
+                for interval in self.timeframes
+            }
+        return self.states[symbol][timeframe]
+
+    def base_state(self, symbol):
+        symbol = symbol.upper()
+        if symbol not in self.base_states:
+            self.base_states[symbol] = IndicatorRows(self.engine, self.history)
+        return self.base_states[symbol]
+
+    def update(self, symbol, candle):
+        """Feed one closed base candle; returns the (timeframe, bar) pairs it closed."""
+        base = self.base_state(symbol)
+        if not base.rows or to_milliseconds(candle['timestamp']) > to_milliseconds(base.rows[-1]['timestamp']):
+            base.add(candle)
+        closed = []
+        for timeframe in self.timeframes:
+            state = self.state(symbol, timeframe)
+            for bar in state.aggregator.update(candle):
+                state.add(bar)
+                closed.append((timeframe, bar))
+        return closed
+
+    def seed(self, symbol, timeframe, df):
+        """Load closed `timeframe` bars, e.g. from REST, before streaming."""
+        if df is None or df.empty:
+            return
+        state = self.state(symbol, timeframe)
+        columns = ['timestamp', *[column for column in BAR_AGGREGATION if column in df.columns]]
+        for bar in df[columns].to_dict('records'):
+            state.add(bar)
+        state.aggregator.closed_until = to_milliseconds(df['timestamp'].iloc[-1]) + state.aggregator.step
+
+    async def fetch_initial_bars(self, symbols, fetcher=None, limit=None):
+        """Seed every timeframe with its closed bars from REST, then feed the
+        base candles since the bars still open started, so the first bar
+        closed after boot is whole."""
+        fetcher = fetcher or BinanceDataFetcher()
+        limit = limit or max(WARMUP_BARS, self.history)
+        loop = asyncio.get_running_loop()
+        keys = [(symbol.upper(), timeframe) for symbol in symbols for timeframe in self.timeframes]
+        frames = await asyncio.gather(*[
+            loop.run_in_executor(None, fetcher.fetch_klines, symbol, timeframe, limit + 1)
+            for symbol, timeframe in keys
+        ])
+        now = int(time.time() * 1000)
+        for (symbol, timeframe), df in zip(keys, frames):
+            if df is None or df.empty:
+                logger.error(f"Failed to fetch initial {timeframe} bars for {symbol}")
+                continue
+            # The newest kline is still open; its bar is rebuilt from base candles.
+            opens = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ms]').astype(np.int64)
+            self.seed(symbol, timeframe, df[opens + bar_interval_to_milliseconds(timeframe) <= now])
+        await self.backfill(symbols, fetcher, now, limit)
+        logger.info(f"Seeded {len(self.timeframes)} timeframes for {len(symbols)} symbols")
+
+    async def backfill(self, symbols, fetcher, now=None, limit=WARMUP_BARS):
+        """Feed the base candles closed since the oldest open bar started, and
+        at least `limit` of them to warm the base indicator stream.
+        Sub-second bases have no REST klines; their open bars stay incomplete
+        and are dropped when they close."""
+        if self.base_interval not in INTERVAL_MILLISECONDS:
+            return
+        now = now if now is not None else int(time.time() * 1000)
+        base_step = INTERVAL_MILLISECONDS[self.base_interval]
+        end = now // base_step * base_step
+        start = min([end - limit * base_step, *[
+            now // bar_interval_to_milliseconds(timeframe) * bar_interval_to_milliseconds(timeframe)
+            for timeframe in self.timeframes
+        ]])
+        loop = asyncio.get_running_loop()
+        symbols = [symbol.upper() for symbol in symbols]
+        frames = await asyncio.gather(*[
+            loop.run_in_executor(None, fetcher.fetch_range, symbol, self.base_interval, start, end)
+            for symbol in symbols
+        ])
+        for symbol, df in zip(symbols, frames):
+            if df is None:
+                logger.error(f"Failed to backfill {self.base_interval} candles for {symbol}; open bars are dropped when they close")
+                continue
+            columns = ['timestamp', *[column for column in BAR_AGGREGATION if column in df.columns]]
+            for candle in df[columns].to_dict('records'):
+                self.update(symbol, candle)
+
+    def buffer(self, symbol, timeframe):
+        return self.state(symbol, timeframe).buffer
+
+    def partial(self, symbol, timeframe):
+        return self.state(symbol, timeframe).aggregator.partial()
+
+    def indicator_frame(self, symbol, timeframe):
+        return self.state(symbol, timeframe).frame()
+
+    def base_indicator_frame(self, symbol):
+        return self.base_state(symbol).frame()
+
+    def indicator_frames(self, symbol):
+        return {timeframe: self.indicator_frame(symbol, timeframe) for timeframe in self.timeframes}
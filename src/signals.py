@@ -1,13 +1,19 @@
 import json
 from datetime import datetime, timedelta
+from itertools import product
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from fetch import BinanceDataFetcher
+from candle_buffer import to_milliseconds
+from fetch import BinanceDataFetcher, bar_interval_to_milliseconds, interval_to_milliseconds
+from store import CandleStore
+from indicators import kernels
 from indicators.engine import IndicatorEngine
+from resample import resample_candles
 import logging
 
 class SignalGenerator:
-    def __init__(self, config_path=None, config=None, indicator_engine=None):
+    def __init__(self, config_path=None, config=None, indicator_engine=None, prune=None):
         if config_path:
             self.config_path = Path(config_path)
         else:
@@ -22,21 +28,164 @@ class SignalGenerator:
         if indicator_engine:
             self.indicator_engine = indicator_engine
         else:
-            self.indicator_engine = IndicatorEngine(config=indicator_cfg)
+            self.indicator_engine = IndicatorEngine(config=indicator_cfg, backend=self.config.get("indicator_backend", "pandas_ta"))
         
-        self.thresholds = self.config.get("thresholds", {})
         self.signal_settings = self.config.get("signal_settings", {})
         self.strategies = self.config.get("strategies", [])
-        self.condition_reasons = build_condition_reasons(self.thresholds)
+        self.thresholds = strategy_thresholds(self.config.get("thresholds", {}), self.strategies)
+        self.base_interval = self.signal_settings.get("base_interval", "1s")
+        self.timeframe_plan = condition_timeframes(self.strategies)
+        self.condition_reasons = build_condition_reasons(self.thresholds, self.timeframe_plan)
+        self.last_signal_times = {}
+        if prune is None:
+            prune = self.signal_settings.get("prune_unused_indicators", False)
+        self.indicator_plan = build_indicator_plan(self.strategies, self.signal_settings, self.thresholds, self.indicator_engine) if prune else None
 
-    def generate_signals(self, df, symbol="BTCUSDT"):
+    def generate_signals(self, df, symbol="BTCUSDT", tail=None, timeframes=None, streamed=False):
+        """Signals for the candles `df`. With `streamed`, `df` already holds
+        the indicator columns, as `IndicatorStream` rows do."""
+        check_tail(tail)
         logging.info("SignalGenerator: Starting signal generation for dataframe with %d rows", len(df))
         if df is None or df.empty:
             return []
-        indicator_df = self.indicator_engine.calculate_all_indicators(df).copy()
+        columns = self.indicator_plan["columns"] if self.indicator_plan else None
+        condition_names = self.indicator_plan["conditions"] if self.indicator_plan else None
+        indicator_df = df if streamed else self.indicator_engine.calculate_all_indicators(df, columns=columns)
+        if tail is None:
+            indicator_df = indicator_df.copy()
+            ensure_timestamp_column(indicator_df, df)
+            condition_map = compute_conditions(indicator_df, self.thresholds, condition_names)
+            condition_map.update(self.timeframe_conditions(df, timeframes))
+            return evaluate_strategies(indicator_df, condition_map, symbol, self.strategies, self.signal_settings, self.condition_reasons)
+        tail = min(tail, len(indicator_df))
+        # Extra rows so crossover conditions can look at the previous candle
+        # and divergence conditions at their lookback.
+        context = tail + max(1, divergence_lookback(self.thresholds, condition_names))
+        window_df = indicator_df.iloc[-context:].copy()
+        ensure_timestamp_column(window_df, df.iloc[-context:])
+        condition_map = {name: series.iloc[-tail:] for name, series in compute_conditions(window_df, self.thresholds, condition_names).items()}
+        condition_map.update({name: series.iloc[-tail:] for name, series in self.timeframe_conditions(df, timeframes).items()})
+        last_signal_times = self.last_signal_times.setdefault(symbol, {})
+        return evaluate_strategies(window_df.iloc[-tail:], condition_map, symbol, self.strategies, self.signal_settings, self.condition_reasons, last_signal_times)
+
+    def generate_panel_signals(self, data, tail=None):
+        """Signals for many symbols at once from a long-format frame, a dict of
+        wide frames or an IndicatorPanel. With `tail`, only the last `tail`
+        rows are evaluated and cooldowns carry over between calls."""
+        check_tail(tail)
+        columns = self.indicator_plan["columns"] if self.indicator_plan else None
+        condition_names = self.indicator_plan["conditions"] if self.indicator_plan else None
+        panel = self.indicator_engine.calculate_panel(data, columns=columns)
+        logging.info("SignalGenerator: Starting panel signal generation for %d symbols x %d rows", len(panel.symbols), len(panel))
+        if len(panel) == 0:
+            return []
+        if tail is None:
+            condition_map = compute_conditions(panel, self.thresholds, condition_names)
+            return evaluate_panel(panel, condition_map, self.strategies, self.signal_settings, self.condition_reasons)
+        tail = min(tail, len(panel))
+        window = panel.tail(tail + max(1, divergence_lookback(self.thresholds, condition_names)))
+        condition_map = {name: frame.iloc[-tail:] for name, frame in compute_conditions(window, self.thresholds, condition_names).items()}
+        return evaluate_panel(window.tail(tail), condition_map, self.strategies, self.signal_settings, self.condition_reasons, self.last_signal_times)
+
+    def sweep_thresholds(self, df, grid):
+        """Evaluate the strategies for every combination of threshold values in
+        `grid`, shaped like the `thresholds` config with lists of values, e.g.
+        {"rsi": {"oversold": [30, 35, 40]}, "volume": {"ratio_long_min": [1.1, 1.5]}}.
+
+        Indicators are computed once; each condition is evaluated for all
+        values of its threshold as a (value x time) array. Returns one dict per
+        setting with the swept values, the full thresholds, the signal count
+        and per-strategy counts and timestamps, matching what
+        `generate_signals` would produce with those thresholds.
+        """
+        keys, settings = threshold_settings(grid)
+        if df is None or df.empty or not settings:
+            return []
+        columns = self.indicator_plan["columns"] if self.indicator_plan else None
+        condition_names = self.indicator_plan["conditions"] if self.indicator_plan else None
+        indicator_df = self.indicator_engine.calculate_all_indicators(df, columns=columns).copy()
         ensure_timestamp_column(indicator_df, df)
-        condition_map = compute_conditions(indicator_df, self.thresholds)
-        return evaluate_strategies(indicator_df, condition_map, symbol, self.strategies, self.signal_settings, self.condition_reasons)
+        conditions = compute_conditions(indicator_df, self.thresholds, condition_names)
+        conditions.update(self.timeframe_conditions(df))
+        condition_rows = {name: np.asarray(series, dtype=bool)[None, :] for name, series in conditions.items()}
+        setting_rows = {name: np.zeros(len(settings), dtype=np.intp) for name in condition_rows}
+        for position, key in enumerate(keys):
+            values = np.array([setting[position] for setting in settings], dtype=np.float64)
+            levels, inverse = np.unique(values, return_inverse=True)
+            for name, threshold in THRESHOLD_CONDITIONS.items():
+                if threshold != key or (condition_names is not None and name not in condition_names):
+                    continue
+                rows = sweep_condition(indicator_df, name, levels)
+                if rows is not None:
+                    condition_rows[name] = rows
+                    setting_rows[name] = inverse.reshape(-1)
+        logging.info("SignalGenerator: Sweeping %d threshold settings over %d rows", len(settings), len(indicator_df))
+        results = sweep_strategies(indicator_df, condition_rows, setting_rows, len(settings), self.strategies, self.signal_settings)
+        for setting, result in zip(settings, results):
+            thresholds = {group: dict(values) for group, values in self.thresholds.items()}
+            for (group, key), value in zip(keys, setting):
+                thresholds.setdefault(group, {})[key] = value
+            result["swept"] = {f"{group}.{key}": value for (group, key), value in zip(keys, setting)}
+            result["thresholds"] = thresholds
+        return results
+
+    def timeframe_conditions(self, df, timeframes=None):
+        """`<timeframe>:<condition>` conditions for every row of the base
+        candles `df`, each taken from the last bar of that timeframe that had
+        closed by the end of the row. `timeframes` maps a timeframe to its
+        indicator frame, as `TimeframeResampler.indicator_frames` returns it;
+        timeframes it lacks are resampled from `df`."""
+        conditions = {}
+        if not self.timeframe_plan or df is None or df.empty:
+            return conditions
+        timeframes = timeframes or {}
+        base_step = bar_interval_to_milliseconds(self.base_interval)
+        row_times = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        for timeframe, names in self.timeframe_plan.items():
+            frame = timeframes.get(timeframe)
+            if frame is None:
+                bars = resample_candles(df, timeframe)
+                frame = self.indicator_engine.calculate_all_indicators(bars) if len(bars) >= self.indicator_engine.warmup_period() else None
+            computed = compute_conditions(frame, self.thresholds, names) if frame is not None and not frame.empty else {}
+            bar_times = pd.to_datetime(frame["timestamp"]).to_numpy(dtype="datetime64[ms]").astype(np.int64) if computed else None
+            for name in names:
+                values = np.zeros(len(df), dtype=bool)
+                if name in computed:
+                    latest = np.searchsorted(bar_times, row_times + base_step - bar_interval_to_milliseconds(timeframe), side="right") - 1
+                    closed = latest >= 0
+                    values[closed] = np.asarray(computed[name], dtype=bool)[latest[closed]]
+                conditions[f"{timeframe}:{name}"] = pd.Series(values, index=df.index)
+        return conditions
+
+    def evaluate_latest(self, df, symbol="BTCUSDT", timeframes=None, streamed=False):
+        """The signal for the newest candle of `df`, if any. Timeframe
+        conditions need that timeframe's indicator frame in `timeframes`, or
+        enough candles in `df` to resample and warm it up."""
+        missing = [timeframe for timeframe in self.timeframe_plan if timeframe not in (timeframes or {})]
+        if missing and df is not None and len(df) < self.warmup_period():
+            raise ValueError(
+                f"{', '.join(missing)} conditions need their indicator frames or "
+                f"{self.warmup_period()} base candles, got {len(df)}"
+            )
+        signals = self.generate_signals(df, symbol=symbol, tail=1, timeframes=timeframes, streamed=streamed)
+        return signals[-1] if signals else None
+
+    def warmup_period(self):
+        if self.indicator_plan:
+            lookback = self.indicator_plan["lookback"]
+        else:
+            lookback = self.indicator_engine.warmup_period() + divergence_lookback(self.thresholds)
+        base_step = bar_interval_to_milliseconds(self.base_interval)
+        for timeframe in self.timeframe_plan:
+            bars = bar_interval_to_milliseconds(timeframe) // base_step
+            lookback = max(lookback, (self.indicator_engine.warmup_period() + 1) * bars)
+        return lookback
+
+    def reset_cooldowns(self, symbol=None):
+        if symbol is None:
+            self.last_signal_times.clear()
+        else:
+            self.last_signal_times.pop(symbol, None)
 
     def save_signals(self, signals, filepath):
         destination = Path(filepath).expanduser().resolve()
@@ -54,6 +203,10 @@ class SignalGenerator:
             reasons = ", ".join(signal.get("reason", []))
             print(f"[{timestamp}] {name} at {price}: {reasons}")
 
+def check_tail(tail):
+    if tail is not None and (isinstance(tail, bool) or not isinstance(tail, (int, np.integer)) or tail < 1):
+        raise ValueError(f"tail must be a positive integer or None, got {tail!r}")
+
 def ensure_timestamp_column(indicator_df, original_df):
     if "timestamp" in indicator_df.columns:
         indicator_df["timestamp"] = pd.to_datetime(indicator_df["timestamp"], utc=False)
@@ -67,18 +220,105 @@ def ensure_timestamp_column(indicator_df, original_df):
     else:
         indicator_df["timestamp"] = pd.to_datetime(index)
 
-def compute_conditions(indicator_df, thresholds):
+CONDITION_COLUMNS = {
+    "rsi_oversold": ["rsi"],
+    "rsi_overbought": ["rsi"],
+    "macd_bullish_cross": ["macd", "signal"],
+    "macd_bearish_cross": ["macd", "signal"],
+    "macd_hist_positive": ["macd", "signal", "histogram"],
+    "macd_hist_negative": ["macd", "signal", "histogram"],
+    "ema_bullish": ["ema"],
+    "ema_bearish": ["ema"],
+    "price_touch_lower_band": ["bb_lower"],
+    "price_touch_upper_band": ["bb_upper"],
+    "volume_spike": ["vol_ratio_long"],
+    "volume_dryup": ["vol_ratio_long"],
+    "low_volatility": ["bb_width"],
+    "rsi_bullish_divergence": ["rsi"],
+    "rsi_bearish_divergence": ["rsi"],
+    "macd_bullish_divergence": ["macd"],
+    "macd_bearish_divergence": ["macd"],
+}
+
+DIVERGENCE_CONDITIONS = {
+    "rsi": ("rsi_bullish_divergence", "rsi_bearish_divergence"),
+    "macd": ("macd_bullish_divergence", "macd_bearish_divergence"),
+}
+
+DIVERGENCE_LOOKBACKS = {"rsi": 5, "macd": 10}
+
+def build_indicator_plan(strategies, signal_settings, thresholds, indicator_engine):
+    """Work out the conditions, indicator columns and warm-up lookback that the
+    enabled strategies actually need.
+
+    Returns None when everything has to be computed: confluence is counted
+    across all conditions, so a strategy whose confluence minimum exceeds its
+    own condition count depends on conditions it does not name. With a plan,
+    the `confluence` and `indicators` fields of a signal only cover the
+    conditions and columns in the plan.
+    """
+    min_confluence = signal_settings.get("min_confluence_count", 1)
+    conditions = set()
+    for strategy in strategies:
+        if not strategy.get("enabled", True):
+            continue
+        required_conditions = strategy.get("conditions", [])
+        if not required_conditions or any(split_condition(condition)[1] not in CONDITION_COLUMNS for condition in required_conditions):
+            continue
+        effective_min = max(min_confluence, strategy.get("min_confluence", len(required_conditions)))
+        if effective_min > len(required_conditions):
+            return None
+        conditions.update(condition for condition in required_conditions if split_condition(condition)[0] is None)
+    if signal_settings.get("ignore_low_volatility", False):
+        conditions.add("low_volatility")
+    ema_periods = sorted(indicator_engine.indicators["ema"].periods)[:2]
+    columns = set()
+    for condition in conditions:
+        for column in CONDITION_COLUMNS[condition]:
+            if column == "ema":
+                columns.update(f"ema_{period}" for period in ema_periods)
+            else:
+                columns.add(column)
+    return {
+        "conditions": sorted(conditions),
+        "columns": sorted(columns),
+        "lookback": indicator_engine.warmup_period(columns) + divergence_lookback(thresholds, conditions),
+    }
+
+def split_condition(name):
+    """'1m:ema_bullish' -> ('1m', 'ema_bullish'); conditions of the base
+    candles have no timeframe."""
+    timeframe, separator, condition = name.rpartition(":")
+    return (timeframe, condition) if separator else (None, name)
+
+def condition_timeframes(strategies):
+    """{timeframe: [conditions]} named with a timeframe prefix by the enabled strategies."""
+    timeframes = {}
+    for strategy in strategies:
+        if not strategy.get("enabled", True):
+            continue
+        for condition in strategy.get("conditions", []):
+            timeframe, name = split_condition(condition)
+            if timeframe is not None:
+                timeframes.setdefault(timeframe, set()).add(name)
+    return {timeframe: sorted(names) for timeframe, names in sorted(timeframes.items(), key=lambda item: bar_interval_to_milliseconds(item[0]))}
+
+def compute_conditions(indicator_df, thresholds, names=None):
     false_series = pd.Series(False, index=indicator_df.index)
     conditions = {}
+
+    def wanted(*group):
+        return names is None or any(name in names for name in group)
+
     rsi_thresholds = thresholds.get("rsi", {})
-    if "rsi" in indicator_df.columns:
+    if "rsi" in indicator_df.columns and wanted("rsi_oversold", "rsi_overbought"):
         rsi = indicator_df["rsi"]
         oversold_level = rsi_thresholds.get("oversold", 30)
         overbought_level = rsi_thresholds.get("overbought", 70)
         conditions["rsi_oversold"] = rsi.lt(oversold_level).fillna(False)
         conditions["rsi_overbought"] = rsi.gt(overbought_level).fillna(False)
     macd_columns = {"macd", "signal"}
-    if macd_columns.issubset(indicator_df.columns):
+    if macd_columns.issubset(indicator_df.columns) and wanted("macd_bullish_cross", "macd_bearish_cross", "macd_hist_positive", "macd_hist_negative"):
         macd = indicator_df["macd"]
         macd_signal = indicator_df["signal"]
         macd_histogram = indicator_df.get("histogram")
@@ -91,7 +331,7 @@ def compute_conditions(indicator_df, thresholds):
             conditions["macd_hist_positive"] = macd_histogram.gt(min_histogram).fillna(False)
             conditions["macd_hist_negative"] = macd_histogram.lt(-min_histogram).fillna(False)
     ema_columns = [col for col in indicator_df.columns if col.startswith("ema_")]
-    if len(ema_columns) >= 2:
+    if len(ema_columns) >= 2 and wanted("ema_bullish", "ema_bearish"):
         try:
             sorted_emas = sorted(ema_columns, key=lambda col: int(col.split("_")[1]))
         except (IndexError, ValueError):
@@ -102,13 +342,13 @@ def compute_conditions(indicator_df, thresholds):
         slow_ema = indicator_df[slow_col]
         conditions["ema_bullish"] = fast_ema.gt(slow_ema).fillna(False)
         conditions["ema_bearish"] = fast_ema.lt(slow_ema).fillna(False)
-    if {"close", "bb_lower"}.issubset(indicator_df.columns):
+    if {"close", "bb_lower"}.issubset(indicator_df.columns) and wanted("price_touch_lower_band"):
         close = indicator_df["close"]
         bb_lower = indicator_df["bb_lower"]
         tolerance = thresholds.get("bollinger", {}).get("touch_tolerance", 0.01)
         lower_touch = (close <= bb_lower) | (close.sub(bb_lower).abs() <= close.abs() * tolerance)
         conditions["price_touch_lower_band"] = lower_touch.fillna(False)
-    if {"close", "bb_upper"}.issubset(indicator_df.columns):
+    if {"close", "bb_upper"}.issubset(indicator_df.columns) and wanted("price_touch_upper_band"):
         close = indicator_df["close"]
         bb_upper = indicator_df["bb_upper"]
         tolerance = thresholds.get("bollinger", {}).get("touch_tolerance", 0.01)
@@ -124,88 +364,379 @@ def compute_conditions(indicator_df, thresholds):
     else:
         conditions["volume_spike"] = false_series
         conditions["volume_dryup"] = false_series
-    if "bb_width" in indicator_df.columns:
+    if "bb_width" in indicator_df.columns and wanted("low_volatility"):
         low_vol_threshold = thresholds.get("bollinger", {}).get("low_volatility_width")
         if low_vol_threshold is not None:
             conditions["low_volatility"] = indicator_df["bb_width"].lt(low_vol_threshold).fillna(False)
+    for group, (bullish, bearish) in DIVERGENCE_CONDITIONS.items():
+        if {"close", group}.issubset(indicator_df.columns) and divergence_wanted(thresholds, group, names):
+            oscillator = indicator_df[group]
+            values = divergence_values(indicator_df["close"], oscillator, group, thresholds.get(group, {}))
+            if values.ndim == 2:
+                values = pd.DataFrame(values, index=oscillator.index, columns=oscillator.columns)
+            else:
+                values = pd.Series(values, index=oscillator.index)
+            conditions[bullish] = values.gt(0)
+            conditions[bearish] = values.lt(0)
+    if names is not None:
+        conditions = {name: series for name, series in conditions.items() if name in names}
     return conditions
 
-def evaluate_strategies(indicator_df, conditions, symbol, strategies, signal_settings, condition_reasons):
+def strategy_thresholds(thresholds, strategies):
+    """`thresholds` with the default `divergence_lookback` for every group whose
+    divergence conditions an enabled strategy names on the base candles but
+    which configures no divergence setting, so those conditions are computed
+    without a plan too."""
+    named = set()
+    for strategy in strategies:
+        if strategy.get("enabled", True):
+            named.update(condition for condition in strategy.get("conditions", []) if split_condition(condition)[0] is None)
+    thresholds = {group: dict(values) for group, values in thresholds.items()}
+    for group, conditions in DIVERGENCE_CONDITIONS.items():
+        settings = thresholds.get(group, {})
+        if named.intersection(conditions) and "divergence_lookback" not in settings and "divergence_pivot_window" not in settings:
+            thresholds[group] = {**settings, "divergence_lookback": DIVERGENCE_LOOKBACKS[group]}
+    return thresholds
+
+def divergence_wanted(thresholds, group, names=None):
+    """Divergence conditions are computed when named, or, without a plan, when
+    the group configures `divergence_lookback` or `divergence_pivot_window`
+    (which `strategy_thresholds` sets for groups a strategy names); otherwise
+    they would change the confluence count of every signal."""
+    if names is not None:
+        return any(name in names for name in DIVERGENCE_CONDITIONS[group])
+    settings = thresholds.get(group, {})
+    return "divergence_lookback" in settings or "divergence_pivot_window" in settings
+
+def divergence_values(close, oscillator, group, settings):
+    pivot_window = settings.get("divergence_pivot_window")
+    if pivot_window:
+        max_distance = settings.get("divergence_max_distance") or 10 * pivot_window
+        return kernels.pivot_divergence(close, oscillator, pivot_window, max_distance)
+    lookback = settings.get("divergence_lookback", DIVERGENCE_LOOKBACKS[group])
+    return kernels.divergence(close, oscillator, [lookback])[0]
+
+def divergence_lookback(thresholds, names=None):
+    """Candles before a row that its divergence conditions look at."""
+    lookback = 0
+    for group in DIVERGENCE_CONDITIONS:
+        if not divergence_wanted(thresholds, group, names):
+            continue
+        settings = thresholds.get(group, {})
+        pivot_window = settings.get("divergence_pivot_window")
+        if pivot_window:
+            span = 2 * pivot_window + (settings.get("divergence_max_distance") or 10 * pivot_window)
+        else:
+            span = settings.get("divergence_lookback", DIVERGENCE_LOOKBACKS[group])
+        lookback = max(lookback, span)
+    return lookback
+
+THRESHOLD_CONDITIONS = {
+    "rsi_oversold": ("rsi", "oversold"),
+    "rsi_overbought": ("rsi", "overbought"),
+    "macd_hist_positive": ("macd", "min_histogram"),
+    "macd_hist_negative": ("macd", "min_histogram"),
+    "price_touch_lower_band": ("bollinger", "touch_tolerance"),
+    "price_touch_upper_band": ("bollinger", "touch_tolerance"),
+    "volume_spike": ("volume", "ratio_long_min"),
+    "volume_dryup": ("volume", "dryup_ratio_max"),
+    "low_volatility": ("bollinger", "low_volatility_width"),
+}
+
+def threshold_settings(grid):
+    keys = []
+    options = []
+    for group, values in grid.items():
+        for key, value in values.items():
+            if (group, key) not in THRESHOLD_CONDITIONS.values():
+                raise ValueError(f"Unknown threshold '{group}.{key}'")
+            keys.append((group, key))
+            options.append(list(value) if isinstance(value, (list, tuple, range, np.ndarray)) else [value])
+    return keys, list(product(*options))
+
+def sweep_condition(indicator_df, name, levels):
+    """Condition `name` for every threshold level at once, as a (level x time)
+    array; the same comparisons as `compute_conditions`, with NaN never true.
+    Returns None when the columns it needs were not computed."""
+    levels = np.asarray(levels, dtype=np.float64)[:, None]
+    needed = {
+        "rsi_oversold": ["rsi"],
+        "rsi_overbought": ["rsi"],
+        "macd_hist_positive": ["histogram"],
+        "macd_hist_negative": ["histogram"],
+        "price_touch_lower_band": ["close", "bb_lower"],
+        "price_touch_upper_band": ["close", "bb_upper"],
+        "volume_spike": ["vol_ratio_long"],
+        "volume_dryup": ["vol_ratio_long"],
+        "low_volatility": ["bb_width"],
+    }[name]
+    if not set(needed).issubset(indicator_df.columns):
+        return None
+    values = [indicator_df.loc[:, column] for column in needed]
+    values = [(value.iloc[:, 0] if isinstance(value, pd.DataFrame) else value).to_numpy(dtype=np.float64)[None, :] for value in values]
+    if name == "rsi_oversold":
+        return values[0] < levels
+    if name == "rsi_overbought":
+        return values[0] > levels
+    if name == "macd_hist_positive":
+        return values[0] > levels
+    if name == "macd_hist_negative":
+        return values[0] < -levels
+    if name in ("price_touch_lower_band", "price_touch_upper_band"):
+        close, band = values
+        touch = close <= band if name == "price_touch_lower_band" else close >= band
+        return touch | (np.abs(close - band) <= np.abs(close) * levels)
+    if name == "volume_spike":
+        return values[0] > levels
+    if name == "volume_dryup":
+        return values[0] < levels
+    return values[0] < levels
+
+def sweep_strategies(indicator_df, condition_rows, setting_rows, setting_count, strategies, signal_settings):
+    """Per-setting signal counts and timestamps, as `evaluate_strategies` would
+    emit them. `condition_rows[name]` holds one row per threshold level and
+    `setting_rows[name]` the row each setting uses.
+
+    Strategies are grouped by signal name, since cooldowns are shared per
+    name, and each group is only evaluated once per distinct combination of
+    the condition rows it reads.
+    """
+    results = [{"signal_count": 0, "counts": {}, "timestamps": {}} for _ in range(setting_count)]
+    min_confluence = signal_settings.get("min_confluence_count", 1)
+    ignore_low_volatility = signal_settings.get("ignore_low_volatility", False)
+    min_interval = signal_settings.get("min_signal_interval_minutes", 0)
+    condition_names = list(condition_rows)
+    compiled = compile_strategies(strategies, condition_names, min_confluence)
+    timestamps = indicator_df["timestamp"].to_numpy()
+    interval = np.timedelta64(int(min_interval * 60 * 1e9), "ns")
+    groups = {}
+    for strategy_index, (strategy, _, _) in enumerate(compiled):
+        groups.setdefault(strategy.get("signal", "NEUTRAL"), []).append(strategy_index)
+    for members in groups.values():
+        needed = set()
+        for strategy_index in members:
+            _, columns, effective_min = compiled[strategy_index]
+            needed.update(condition_names[column] for column in columns)
+            if effective_min > len(columns):
+                needed.update(condition_names)
+        if ignore_low_volatility and "low_volatility" in condition_rows:
+            needed.add("low_volatility")
+        needed = sorted(needed)
+        projection = np.stack([setting_rows[name] for name in needed], axis=1)
+        distinct, inverse = np.unique(projection, axis=0, return_inverse=True)
+        chunk = max(1, (1 << 22) // max(len(timestamps), 1))
+        outcomes = []
+        for start in range(0, len(distinct), chunk):
+            block = distinct[start:start + chunk]
+            rows = {name: condition_rows[name][block[:, column]] for column, name in enumerate(needed)}
+            confluence_counts = None
+            fired = []
+            for strategy_index in members:
+                _, columns, effective_min = compiled[strategy_index]
+                names = [condition_names[column] for column in columns]
+                mask = np.logical_and.reduce([rows[name] for name in names])
+                if effective_min > len(columns):
+                    if confluence_counts is None:
+                        confluence_counts = sum(rows[name].astype(np.int16) for name in condition_names)
+                    mask &= confluence_counts >= effective_min
+                if ignore_low_volatility and "low_volatility" in rows:
+                    mask &= ~rows["low_volatility"]
+                fired.append(mask)
+            fired = np.stack(fired, axis=1)
+            outcomes.extend(
+                [timestamps[rows] for rows in emitted_rows(fired[row], timestamps, interval if min_interval > 0 else None)]
+                for row in range(len(block))
+            )
+        for setting, outcome in zip(range(setting_count), inverse.reshape(-1)):
+            result = results[setting]
+            for strategy_index, emitted in zip(members, outcomes[outcome]):
+                name = compiled[strategy_index][0].get("name")
+                if name in result["timestamps"]:
+                    emitted = np.sort(np.concatenate([result["timestamps"][name], emitted]))
+                result["timestamps"][name] = emitted
+                result["counts"][name] = len(emitted)
+    for result in results:
+        result["signal_count"] = sum(result["counts"].values())
+    return results
+
+def emitted_rows(fired, timestamps, interval=None, last_time=None):
+    """Rows each strategy of a signal-name group emits on, given where it fired
+    (strategies x time). With a cooldown, the first strategy firing on a row
+    takes it and the next signal needs `interval` to pass, counting from
+    `last_time` when the group already fired before these rows."""
+    if interval is None:
+        return [np.flatnonzero(row) for row in fired]
+    candidates = np.flatnonzero(fired.any(axis=0))
+    times = timestamps[candidates]
+    kept = []
+    position = 0
+    if last_time is not None:
+        position = int(np.searchsorted(times, last_time + interval, side="left"))
+    while position < len(candidates):
+        kept.append(position)
+        position = max(position + 1, int(np.searchsorted(times, times[position] + interval, side="left")))
+    kept = candidates[kept]
+    owner = fired[:, kept].argmax(axis=0)
+    return [kept[owner == strategy] for strategy in range(fired.shape[0])]
+
+def evaluate_strategies(indicator_df, conditions, symbol, strategies, signal_settings, condition_reasons, last_signal_times=None):
     if not strategies:
         return []
     min_confluence = signal_settings.get("min_confluence_count", 1)
     ignore_low_volatility = signal_settings.get("ignore_low_volatility", False)
     min_interval = signal_settings.get("min_signal_interval_minutes", 0)
     min_interval_delta = timedelta(minutes=min_interval)
+    condition_names, matrix = build_condition_matrix(conditions, len(indicator_df))
+    compiled = compile_strategies(strategies, condition_names, min_confluence)
+    if not compiled:
+        return []
+    confluence_counts = matrix.sum(axis=1)
+    fired = score_strategies(matrix, confluence_counts, compiled)
     low_volatility_series = conditions.get("low_volatility")
-    last_signal_times = {}
+    if ignore_low_volatility and low_volatility_series is not None:
+        fired &= ~np.asarray(low_volatility_series, dtype=bool)[:, None]
+    timestamps = indicator_df["timestamp"]
+    closes = indicator_df["close"].to_numpy() if "close" in indicator_df.columns else None
+    context_columns = indicator_context_columns(indicator_df)
+    if last_signal_times is None:
+        last_signal_times = {}
     generated_signals = []
-    for idx in indicator_df.index:
-        row_conditions = {name: bool(series.loc[idx]) for name, series in conditions.items()}
-        confluence_count = sum(1 for is_true in row_conditions.values() if is_true)
-        if ignore_low_volatility and low_volatility_series is not None:
-            if bool(low_volatility_series.loc[idx]):
-                continue
-        timestamp = normalize_timestamp(indicator_df.at[idx, "timestamp"])
-        price = safe_float(indicator_df.at[idx, "close"]) if "close" in indicator_df.columns else None
-        for strategy in strategies:
-            if not strategy.get("enabled", True):
-                continue
-            required_conditions = strategy.get("conditions", [])
-            if not required_conditions:
-                continue
-            if not all(row_conditions.get(condition, False) for condition in required_conditions):
-                continue
-            strategy_min = strategy.get("min_confluence", len(required_conditions))
-            effective_min = max(min_confluence, strategy_min)
-            if confluence_count < effective_min:
-                continue
+    for position in np.flatnonzero(fired.any(axis=1)):
+        timestamp = normalize_timestamp(timestamps.iloc[position])
+        price = safe_float(closes[position]) if closes is not None else None
+        confluence_count = int(confluence_counts[position])
+        for strategy_index in np.flatnonzero(fired[position]):
+            strategy, columns, _ = compiled[strategy_index]
             signal_name = strategy.get("signal", "NEUTRAL")
             last_time = last_signal_times.get(signal_name)
             if min_interval > 0 and last_time is not None and timestamp is not None:
                 if (timestamp - last_time) < min_interval_delta:
                     continue
-            reasons = [condition_reasons.get(condition, condition) for condition in required_conditions]
-            layman_explanation = generate_layman_explanation(signal_name, required_conditions, strategy.get("direction"))
-            signal_entry = {
-                "timestamp": timestamp.isoformat() if timestamp else None,
-                "symbol": symbol,
-                "price": price,
-                "signal": signal_name,
-                "strategy": strategy.get("name"),
-                "direction": strategy.get("direction"),
-                "reason": reasons,
-                "layman_explanation": layman_explanation,
-                "confluence": confluence_count,
-                "conditions": {condition: row_conditions.get(condition, False) for condition in required_conditions},
-                "indicators": extract_indicator_context(indicator_df.loc[idx]),
-            }
-            generated_signals.append(signal_entry)
+            indicators = {key: safe_float(values[position]) for key, values in context_columns if pd.notna(values[position])}
+            generated_signals.append(build_signal_entry(strategy, columns, matrix[position], timestamp, symbol, price, confluence_count, indicators, condition_reasons))
             if timestamp is not None:
                 last_signal_times[signal_name] = timestamp
     return generated_signals
 
-def extract_indicator_context(row):
-    if isinstance(row, pd.DataFrame):
-        row = row.iloc[0]
-    numeric_keys = ["rsi", "macd", "signal", "histogram", "ema_12", "ema_26", 
-                    "bb_lower", "bb_upper", "bb_width", "bb_percent", 
-                    "vol_ratio_long", "volume"]
-    context = {}
-    for key in numeric_keys:
-        if key in row.index:
-            val = row[key]
-            if isinstance(val, pd.Series):
-                val = val.iloc[0]
-            if pd.notna(val):
-                context[key] = safe_float(val)
-    return context
-
-def build_condition_reasons(thresholds):
+def build_signal_entry(strategy, columns, condition_row, timestamp, symbol, price, confluence_count, indicators, condition_reasons):
+    required_conditions = strategy.get("conditions", [])
+    signal_name = strategy.get("signal", "NEUTRAL")
+    reasons = [condition_reasons.get(condition, condition) for condition in required_conditions]
+    layman_explanation = generate_layman_explanation(signal_name, required_conditions, strategy.get("direction"))
+    return {
+        "timestamp": timestamp.isoformat() if timestamp else None,
+        "symbol": symbol,
+        "price": price,
+        "signal": signal_name,
+        "strategy": strategy.get("name"),
+        "direction": strategy.get("direction"),
+        "reason": reasons,
+        "layman_explanation": layman_explanation,
+        "confluence": confluence_count,
+        "conditions": {condition: bool(condition_row[column]) for condition, column in zip(required_conditions, columns)},
+        "indicators": indicators,
+    }
+
+def evaluate_panel(panel, conditions, strategies, signal_settings, condition_reasons, last_signal_times=None):
+    """Strategy evaluation across every symbol of an IndicatorPanel at once.
+
+    Conditions are wide (time x symbols) frames. Signals come back in time
+    order, then in the panel's symbol order, and cooldowns are tracked per
+    symbol in `last_signal_times[symbol]`.
+    """
+    if not strategies:
+        return []
+    min_confluence = signal_settings.get("min_confluence_count", 1)
+    ignore_low_volatility = signal_settings.get("ignore_low_volatility", False)
+    min_interval = signal_settings.get("min_signal_interval_minutes", 0)
+    min_interval_delta = timedelta(minutes=min_interval)
+    condition_names = list(conditions)
+    matrix = np.zeros((len(panel), len(panel.symbols), len(condition_names)), dtype=bool)
+    for column, name in enumerate(condition_names):
+        matrix[:, :, column] = np.asarray(conditions[name], dtype=bool).reshape(len(panel), -1)
+    compiled = compile_strategies(strategies, condition_names, min_confluence)
+    if not compiled:
+        return []
+    confluence_counts = matrix.sum(axis=2)
+    fired = np.zeros(matrix.shape[:2] + (len(compiled),), dtype=bool)
+    for strategy_index, (_, columns, effective_min) in enumerate(compiled):
+        fired[:, :, strategy_index] = matrix[:, :, columns].all(axis=2) & (confluence_counts >= effective_min)
+    low_volatility = conditions.get("low_volatility")
+    if ignore_low_volatility and low_volatility is not None:
+        fired &= ~np.asarray(low_volatility, dtype=bool).reshape(len(panel), -1)[:, :, None]
+    closes = panel["close"].to_numpy()
+    context_columns = [(key, panel[key].to_numpy()) for key in INDICATOR_CONTEXT_KEYS if key in panel]
+    if last_signal_times is None:
+        last_signal_times = {}
+    generated_signals = []
+    for row, column in np.argwhere(fired.any(axis=2)):
+        timestamp = normalize_timestamp(panel.index[row])
+        symbol = panel.symbols[column]
+        symbol_times = last_signal_times.setdefault(symbol, {})
+        price = safe_float(closes[row, column])
+        confluence_count = int(confluence_counts[row, column])
+        for strategy_index in np.flatnonzero(fired[row, column]):
+            strategy, columns, _ = compiled[strategy_index]
+            signal_name = strategy.get("signal", "NEUTRAL")
+            last_time = symbol_times.get(signal_name)
+            if min_interval > 0 and last_time is not None and timestamp is not None:
+                if (timestamp - last_time) < min_interval_delta:
+                    continue
+            indicators = {key: safe_float(values[row, column]) for key, values in context_columns if pd.notna(values[row, column])}
+            generated_signals.append(build_signal_entry(strategy, columns, matrix[row, column], timestamp, symbol, price, confluence_count, indicators, condition_reasons))
+            if timestamp is not None:
+                symbol_times[signal_name] = timestamp
+    return generated_signals
+
+def build_condition_matrix(conditions, length):
+    condition_names = list(conditions)
+    matrix = np.zeros((length, len(condition_names)), dtype=bool)
+    for column, name in enumerate(condition_names):
+        matrix[:, column] = np.asarray(conditions[name], dtype=bool)
+    return condition_names, matrix
+
+def compile_strategies(strategies, condition_names, min_confluence):
+    positions = {name: column for column, name in enumerate(condition_names)}
+    compiled = []
+    for strategy in strategies:
+        if not strategy.get("enabled", True):
+            continue
+        required_conditions = strategy.get("conditions", [])
+        if not required_conditions:
+            continue
+        if any(condition not in positions for condition in required_conditions):
+            continue
+        strategy_min = strategy.get("min_confluence", len(required_conditions))
+        effective_min = max(min_confluence, strategy_min)
+        columns = [positions[condition] for condition in required_conditions]
+        compiled.append((strategy, columns, effective_min))
+    return compiled
+
+def score_strategies(matrix, confluence_counts, compiled):
+    fired = np.zeros((matrix.shape[0], len(compiled)), dtype=bool)
+    for strategy_index, (_, columns, effective_min) in enumerate(compiled):
+        fired[:, strategy_index] = matrix[:, columns].all(axis=1) & (confluence_counts >= effective_min)
+    return fired
+
+INDICATOR_CONTEXT_KEYS = ["rsi", "macd", "signal", "histogram", "ema_12", "ema_26", 
+                          "bb_lower", "bb_upper", "bb_width", "bb_percent", 
+                          "vol_ratio_long", "volume"]
+
+def indicator_context_columns(indicator_df):
+    columns = []
+    for key in INDICATOR_CONTEXT_KEYS:
+        if key in indicator_df.columns:
+            values = indicator_df.loc[:, key]
+            if isinstance(values, pd.DataFrame):
+                values = values.iloc[:, 0]
+            columns.append((key, values.to_numpy()))
+    return columns
+
+def build_condition_reasons(thresholds, timeframes=None):
     rsi_thresholds = thresholds.get("rsi", {})
     volume_thresholds = thresholds.get("volume", {})
     bollinger_thresholds = thresholds.get("bollinger", {})
-    return {
+    reasons = {
         "rsi_oversold": f"RSI<{rsi_thresholds.get('oversold', 30)}",
         "rsi_overbought": f"RSI>{rsi_thresholds.get('overbought', 70)}",
         "macd_bullish_cross": "MACD crossover up",
@@ -219,7 +750,15 @@ def build_condition_reasons(thresholds):
         "volume_spike": f"Volume > {volume_thresholds.get('ratio_long_min', 1.5)}x long MA",
         "volume_dryup": f"Volume < {volume_thresholds.get('dryup_ratio_max', 0.5)}x long MA",
         "low_volatility": f"BB width < {bollinger_thresholds.get('low_volatility_width', 0.0)}",
+        "rsi_bullish_divergence": "Price lower while RSI higher",
+        "rsi_bearish_divergence": "Price higher while RSI lower",
+        "macd_bullish_divergence": "Price lower while MACD higher",
+        "macd_bearish_divergence": "Price higher while MACD lower",
     }
+    for timeframe, names in (timeframes or {}).items():
+        for name in names:
+            reasons[f"{timeframe}:{name}"] = f"{timeframe} {reasons.get(name, name)}"
+    return reasons
 
 def build_layman_explanations():
     return {
@@ -236,6 +775,10 @@ def build_layman_explanations():
         "volume_spike": "The trading volume has increased significantly compared to its recent average. This indicates heightened market activity, which could be driven by strong buying or selling pressure, often signaling the start of a new trend or a major price movement.",
         "volume_dryup": "The trading volume has decreased significantly compared to its recent average. This indicates reduced market activity, which could suggest a lack of interest or uncertainty among traders, often preceding a period of consolidation or low volatility.",
         "low_volatility": "The Bollinger Band width, which measures the difference between the upper and lower bands, is very narrow. This indicates that the price movements have been relatively small recently, suggesting a period of low volatility. Such conditions often precede a breakout or significant price movement in either direction.",
+        "rsi_bullish_divergence": "The price has made a lower low while the Relative Strength Index (RSI) has made a higher low. This bullish divergence suggests that selling momentum is fading even as the price falls, which often comes before a reversal upward.",
+        "rsi_bearish_divergence": "The price has made a higher high while the Relative Strength Index (RSI) has made a lower high. This bearish divergence suggests that buying momentum is fading even as the price rises, which often comes before a reversal downward.",
+        "macd_bullish_divergence": "The price has moved lower while the MACD line has moved higher. This bullish divergence suggests that downward momentum is weakening, which can signal that a downtrend is losing strength.",
+        "macd_bearish_divergence": "The price has moved higher while the MACD line has moved lower. This bearish divergence suggests that upward momentum is weakening, which can signal that an uptrend is losing strength.",
     }
 
 def generate_layman_explanation(signal_name, required_conditions, direction):
@@ -244,8 +787,9 @@ def generate_layman_explanation(signal_name, required_conditions, direction):
     
     explanations = []
     for condition in required_conditions:
-        if condition in layman_map:
-            explanations.append(layman_map[condition])
+        timeframe, name = split_condition(condition)
+        if name in layman_map:
+            explanations.append(layman_map[name] if timeframe is None else f"On the {timeframe} chart: {layman_map[name]}")
     
     if not explanations:
         return None
@@ -299,13 +843,23 @@ def peek_columns(path):
     return list(sample.columns)
 
 def run_cli(symbol="BTCUSDT", interval="1s", limit=5000, data_file=None, 
-            output="data/signals1K1s.json", config=None, save=True):
+            output="data/signals1K1s.json", config=None, save=True,
+            store_dir=None, start=None, end=None):
     if config:
         generator = SignalGenerator(config_path=config)
     else:
         generator = SignalGenerator()
     if data_file:
         df = load_dataframe(data_file)
+    elif store_dir and start:
+        store = CandleStore(store_dir)
+        lookback = generator.warmup_period()
+        # Fetch the warm-up candles before `start` too, so the range read is the range fetched.
+        store.sync(BinanceDataFetcher(data_dir="data"), symbol, interval, to_milliseconds(start) - lookback * interval_to_milliseconds(interval), end)
+        df = store.read(symbol, interval, start, end, lookback=lookback)
+        if df.empty:
+            print("No candles available in the local store for this range.")
+            return 1
     else:
         fetcher = BinanceDataFetcher(data_dir="data")
         df = fetcher.fetch_klines(symbol=symbol, interval=interval, limit=limit)
@@ -313,6 +867,9 @@ def run_cli(symbol="BTCUSDT", interval="1s", limit=5000, data_file=None,
             print("Failed to fetch data from Binance.")
             return 1
     signals = generator.generate_signals(df, symbol=symbol)
+    if store_dir and start:
+        first = to_milliseconds(start)
+        signals = [signal for signal in signals if signal["timestamp"] and to_milliseconds(signal["timestamp"]) >= first]
     if signals:
         generator.print_signals(signals)
     else:
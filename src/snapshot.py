@@ -0,0 +1,247 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from candle_buffer import to_milliseconds
+from fetch import INTERVAL_MILLISECONDS, BinanceDataFetcher
+from resample import TimeframeResampler
+from store import CANDLE_DTYPE, frame_to_records, records_to_frame
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 3
+
+# Older snapshots are discarded; backfilling more than this is no faster than a cold start.
+MAX_SNAPSHOT_AGE = 3600.0
+
+def buffer_records(buffer):
+    records = np.empty(len(buffer), dtype=CANDLE_DTYPE)
+    for name in CANDLE_DTYPE.names:
+        records[name] = buffer.view(name)
+    return records
+
+def buffer_name(key):
+    return f"buffer:{key[0]}:{key[1]}"
+
+def engine_parameters(resampler):
+    if resampler is None or resampler.engine is None:
+        return None
+    # Through JSON, so parameters compare equal to the ones read back.
+    return json.loads(json.dumps({name: indicator.parameters for name, indicator in resampler.engine.indicators.items()}))
+
+def export_state(value):
+    """`value` as plain JSON data: objects become dicts of their attributes,
+    arrays and deques lists, and timestamps tagged epoch milliseconds."""
+    if isinstance(value, pd.Timestamp):
+        return {'__timestamp__': to_milliseconds(value)}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {key: export_state(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, deque)):
+        return [export_state(item) for item in value]
+    if hasattr(value, '__dict__'):
+        return {name: export_state(item) for name, item in vars(value).items()}
+    return value
+
+def import_value(data):
+    if isinstance(data, dict):
+        if set(data) == {'__timestamp__'}:
+            return pd.Timestamp(data['__timestamp__'], unit='ms')
+        return {key: import_value(item) for key, item in data.items()}
+    if isinstance(data, list):
+        return [import_value(item) for item in data]
+    return data
+
+def restore_state(target, data):
+    """Load `data`, as `export_state` returned it, into the attributes of the
+    freshly built `target`. Attributes keep the type they were built with;
+    no object is created from the data."""
+    for name, current in vars(target).items():
+        if name not in data:
+            raise ValueError(f"Snapshot lacks {type(target).__name__}.{name}")
+        setattr(target, name, restored_value(current, data[name]))
+
+def restored_value(current, data):
+    if isinstance(current, np.ndarray):
+        array = np.asarray(data, dtype=current.dtype)
+        if array.shape != current.shape:
+            raise ValueError(f"Snapshot array of shape {array.shape}, expected {current.shape}")
+        return array
+    if isinstance(current, deque):
+        return deque(import_value(data), maxlen=current.maxlen)
+    if isinstance(current, dict) and isinstance(data, dict) and set(current) == set(data):
+        return {key: restored_value(item, data[key]) for key, item in current.items()}
+    if hasattr(current, '__dict__') and not isinstance(current, pd.Timestamp):
+        restore_state(current, data)
+        return current
+    return import_value(data)
+
+def capture(client, resampler=None):
+    """Everything a `BinanceMultiStreamClient` (and its resampler) needs to
+    resume streaming: the candle buffers, latest prices, the incremental
+    indicator state of every symbol's base candles and, per symbol and
+    timeframe, the partial bar, closed bars and incremental indicator state.
+
+    Returns the state as JSON data and the buffers as CANDLE_DTYPE records,
+    both copies the client no longer touches.
+    """
+    state = {
+        'version': SNAPSHOT_VERSION,
+        'saved_at': int(time.time() * 1000),
+        'buffer_size': client.buffer_size,
+        'buffers': [list(key) for key in client.buffers],
+        'latest_prices': {symbol: float(price) for symbol, price in client.latest_prices.items()},
+        'resampler': None,
+    }
+    if resampler is not None:
+        state['resampler'] = {
+            'base_interval': resampler.base_interval,
+            'timeframes': list(resampler.timeframes),
+            'buffer_size': resampler.buffer_size,
+            'history': resampler.history,
+            'parameters': engine_parameters(resampler),
+            'states': export_state(resampler.states),
+            'base_states': export_state(resampler.base_states),
+        }
+    arrays = {buffer_name(key): buffer_records(buffer) for key, buffer in client.buffers.items()}
+    return state, arrays
+
+def write_snapshot(path, state, arrays):
+    """Write a captured snapshot as an .npz archive, one array of candle
+    records per buffer and the state as JSON, replacing `path` atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    with temporary.open('wb') as handle:
+        np.savez(handle, state=np.array(json.dumps(state)), **arrays)
+    os.replace(temporary, path)
+
+def save_snapshot(path, client, resampler=None):
+    write_snapshot(path, *capture(client, resampler))
+
+def load_snapshot(path, client, resampler=None, max_age=MAX_SNAPSHOT_AGE):
+    """The (state, buffers) of the snapshot at `path` if it is recent and was
+    taken with the same streams, buffer sizes, timeframes and indicator
+    parameters, else None."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            state = json.loads(str(archive['state'][()]))
+            if state.get('version') != SNAPSHOT_VERSION:
+                return None
+            buffers = {tuple(key): archive[buffer_name(key)] for key in state['buffers']}
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    age = time.time() - state['saved_at'] / 1000
+    if age > max_age:
+        logger.info(f"Ignoring snapshot {path}, {age:.0f}s old")
+        return None
+    if state['buffer_size'] != client.buffer_size or set(buffers) != set(client.buffers):
+        logger.info(f"Ignoring snapshot {path}, taken with other streams")
+        return None
+    saved = state['resampler']
+    if resampler is not None:
+        expected = (resampler.base_interval, list(resampler.timeframes), resampler.buffer_size, resampler.history, engine_parameters(resampler))
+        if saved is None or (saved['base_interval'], saved['timeframes'], saved['buffer_size'], saved['history'], saved['parameters']) != expected:
+            logger.info(f"Ignoring snapshot {path}, taken with other timeframes")
+            return None
+    return state, buffers
+
+def restored_resampler(resampler, saved):
+    """A new resampler configured like `resampler`, holding the saved states."""
+    fresh = TimeframeResampler(resampler.timeframes, resampler.base_interval, resampler.engine, resampler.buffer_size, resampler.history)
+    for symbol, timeframes in saved['states'].items():
+        for timeframe, data in timeframes.items():
+            restore_state(fresh.state(symbol, timeframe), data)
+    for symbol, data in saved['base_states'].items():
+        restore_state(fresh.base_state(symbol), data)
+    return fresh
+
+async def restore_snapshot(path, client, resampler=None, fetcher=None, max_age=MAX_SNAPSHOT_AGE):
+    """Resume `client` and `resampler` from the snapshot at `path`, fetching
+    only the candles that closed since it was taken. Returns False, having
+    changed nothing, when there is no usable snapshot or the gap could not be
+    fetched, so the caller can fall back to a cold start.
+
+    Sub-second intervals built from trades have no REST klines; their buffers
+    resume where the snapshot left off.
+    """
+    snapshot = load_snapshot(path, client, resampler, max_age)
+    if snapshot is None:
+        return False
+    state, buffers = snapshot
+    fresh = None
+    if resampler is not None:
+        try:
+            fresh = restored_resampler(resampler, state['resampler'])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring snapshot {path} with unusable indicator state: {e}")
+            return False
+    now = int(time.time() * 1000)
+    gaps = {}
+    for key, records in buffers.items():
+        step = INTERVAL_MILLISECONDS.get(key[1])
+        if step is None or not len(records):
+            continue
+        start = int(records['timestamp'][-1]) + step
+        last_closed = now // step * step
+        if start < last_closed:
+            gaps[key] = (start, last_closed)
+    frames = {}
+    if gaps:
+        fetcher = fetcher or BinanceDataFetcher()
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(None, fetcher.fetch_range, symbol, interval, start, end)
+            for (symbol, interval), (start, end) in gaps.items()
+        ])
+        for key, df in zip(gaps, results):
+            if df is None:
+                logger.error(f"Failed to backfill {key[0]} {key[1]} since the snapshot")
+                return False
+            frames[key] = df
+
+    for key, records in buffers.items():
+        client.buffers[key].extend(records_to_frame(records))
+    client.latest_prices.update(state['latest_prices'])
+    if resampler is not None:
+        resampler.states = fresh.states
+        resampler.base_states = fresh.base_states
+    backfilled = 0
+    for (symbol, interval), df in frames.items():
+        buffer = client.buffers[(symbol, interval)]
+        records = frame_to_records(df)
+        df = records_to_frame(records[records['timestamp'] > buffer.timestamps()[-1]])
+        if df.empty:
+            continue
+        buffer.extend(df)
+        client.latest_prices[symbol] = buffer[-1]['close']
+        if resampler is not None and interval == resampler.base_interval:
+            for candle in df.to_dict('records'):
+                resampler.update(symbol, candle)
+        backfilled += len(df)
+    age = (now - state['saved_at']) / 1000
+    logger.info(f"Restored {len(client.buffers)} stream buffers from a {age:.1f}s old snapshot, backfilled {backfilled} candles")
+    return True
+
+async def snapshot_loop(path, client, resampler=None, period=5.0):
+    """Save a snapshot every `period` seconds while the client streams. State
+    is captured on the event loop; encoding and writing run in an executor."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(period)
+        try:
+            await loop.run_in_executor(None, write_snapshot, path, *capture(client, resampler))
+        except Exception as e:
+            logger.error(f"Error saving snapshot: {e}", exc_info=True)
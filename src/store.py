@@ -0,0 +1,179 @@
+import json
+import os
+import time
+import logging
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from candle_buffer import to_milliseconds
+from fetch import interval_to_milliseconds
+
+logger = logging.getLogger(__name__)
+
+DAY_MILLISECONDS = 86_400_000
+
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+    ('trades_count', '<i8'),
+])
+
+class CandleStore:
+    """On-disk candle history partitioned as <root>/<SYMBOL>/<interval>/<YYYY-MM-DD>.npy.
+
+    Each partition is a NumPy structured array sorted by open time (epoch
+    milliseconds), so reads memory-map the files and slice them with a
+    binary search instead of parsing the whole history.
+    """
+
+    def __init__(self, root="data/store"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _partition_dir(self, symbol, interval):
+        return self.root / symbol.upper() / interval
+
+    def _partition_path(self, symbol, interval, day):
+        date = pd.Timestamp(day * DAY_MILLISECONDS, unit='ms').strftime('%Y-%m-%d')
+        return self._partition_dir(symbol, interval) / f"{date}.npy"
+
+    def days(self, symbol, interval):
+        directory = self._partition_dir(symbol, interval)
+        if not directory.exists():
+            return []
+        return sorted(to_milliseconds(path.stem) // DAY_MILLISECONDS for path in directory.glob('*.npy'))
+
+    def _load(self, symbol, interval, day, mmap=True):
+        path = self._partition_path(symbol, interval, day)
+        if not path.exists():
+            return None
+        return np.load(path, mmap_mode='r' if mmap else None)
+
+    def write(self, symbol, interval, df):
+        if df is None or df.empty:
+            return 0
+        records = frame_to_records(df)
+        days = records['timestamp'] // DAY_MILLISECONDS
+        for day in np.unique(days):
+            new = records[days == day]
+            existing = self._load(symbol, interval, day, mmap=False)
+            if existing is not None:
+                new = np.concatenate([existing, new])
+            order = np.argsort(new['timestamp'], kind='stable')
+            merged = new[order]
+            keep = np.append(merged['timestamp'][1:] != merged['timestamp'][:-1], True)
+            self._save(self._partition_path(symbol, interval, day), merged[keep])
+        return len(records)
+
+    def _save(self, path, records):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + '.tmp')
+        with temporary.open('wb') as handle:
+            np.save(handle, records)
+        os.replace(temporary, path)
+
+    def read_records(self, symbol, interval, start=None, end=None):
+        days = self.days(symbol, interval)
+        if not days:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        start_ms = to_milliseconds(start) if start is not None else days[0] * DAY_MILLISECONDS
+        end_ms = to_milliseconds(end) if end is not None else (days[-1] + 1) * DAY_MILLISECONDS
+        chunks = []
+        for day in days:
+            if day < start_ms // DAY_MILLISECONDS or day * DAY_MILLISECONDS >= end_ms:
+                continue
+            partition = self._load(symbol, interval, day)
+            timestamps = partition['timestamp']
+            lo = np.searchsorted(timestamps, start_ms, side='left')
+            hi = np.searchsorted(timestamps, end_ms, side='left')
+            if hi > lo:
+                chunks.append(np.array(partition[lo:hi]))
+        if not chunks:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.concatenate(chunks)
+
+    def read(self, symbol, interval, start=None, end=None, lookback=0):
+        if lookback and start is not None:
+            start = to_milliseconds(start) - lookback * interval_to_milliseconds(interval)
+        return records_to_frame(self.read_records(symbol, interval, start, end))
+
+    def _empty_path(self, symbol, interval):
+        return self._partition_dir(symbol, interval) / 'empty.json'
+
+    def empty_ranges(self, symbol, interval):
+        """[start, end) ranges the exchange returned no candles for."""
+        path = self._empty_path(symbol, interval)
+        if not path.exists():
+            return []
+        return [tuple(span) for span in json.loads(path.read_text())]
+
+    def mark_empty(self, symbol, interval, ranges):
+        spans = sorted(self.empty_ranges(symbol, interval) + [tuple(span) for span in ranges])
+        merged = []
+        for span_start, span_end in spans:
+            if merged and span_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], span_end)
+            else:
+                merged.append([span_start, span_end])
+        path = self._empty_path(symbol, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + '.tmp')
+        temporary.write_text(json.dumps(merged))
+        os.replace(temporary, path)
+
+    def missing_ranges(self, symbol, interval, start, end, skip_empty=True):
+        """Ranges without stored candles. With `skip_empty`, ranges the
+        exchange is known to have no candles for are left out."""
+        step = interval_to_milliseconds(interval)
+        start_ms = -(-to_milliseconds(start) // step) * step
+        end_ms = to_milliseconds(end)
+        if end_ms <= start_ms:
+            return []
+        timestamps = self.read_records(symbol, interval, start_ms, end_ms)['timestamp']
+        edges = np.concatenate([[start_ms - step], timestamps, [end_ms]])
+        gaps = np.flatnonzero(np.diff(edges) > step)
+        ranges = [(int(edges[i] + step), int(edges[i + 1])) for i in gaps]
+        if skip_empty:
+            for empty_start, empty_end in self.empty_ranges(symbol, interval):
+                ranges = [
+                    (piece_start, piece_end)
+                    for gap_start, gap_end in ranges
+                    for piece_start, piece_end in ((gap_start, min(gap_end, empty_start)), (max(gap_start, empty_end), gap_end))
+                    if piece_end > piece_start
+                ]
+        return ranges
+
+    def sync(self, fetcher, symbol, interval, start, end=None):
+        step = interval_to_milliseconds(interval)
+        # Only closed candles are stored, so stop at the start of the open one.
+        last_closed = int(time.time() * 1000) // step * step
+        end_ms = min(to_milliseconds(end), last_closed) if end is not None else last_closed
+        written = 0
+        for gap_start, gap_end in self.missing_ranges(symbol, interval, start, end_ms):
+            logger.info(f"Syncing {symbol} {interval} candles from {gap_start} to {gap_end}")
+            df = fetcher.fetch_range(symbol, interval, gap_start, gap_end)
+            if df is None:
+                continue
+            written += self.write(symbol, interval, df)
+            # What a successful fetch left missing is an exchange outage, not worth refetching.
+            holes = self.missing_ranges(symbol, interval, gap_start, gap_end, skip_empty=False)
+            if holes:
+                self.mark_empty(symbol, interval, holes)
+        return written
+
+def frame_to_records(df):
+    records = np.empty(len(df), dtype=CANDLE_DTYPE)
+    records['timestamp'] = pd.to_datetime(df['timestamp']).to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        records[column] = df[column].to_numpy(dtype=np.float64)
+    records['trades_count'] = df['trades_count'].to_numpy(dtype=np.int64) if 'trades_count' in df.columns else 0
+    return records
+
+def records_to_frame(records):
+    df = pd.DataFrame({name: records[name] for name in CANDLE_DTYPE.names})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
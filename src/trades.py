@@ -0,0 +1,245 @@
+import asyncio
+import gzip
+import logging
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from candle_buffer import CandleRingBuffer
+from decode import decode_agg_trade_message
+from fetch import BinanceMultiStreamClient, bar_interval_to_milliseconds
+
+logger = logging.getLogger(__name__)
+
+# Column order of the aggTrades archives on data.binance.vision.
+AGG_TRADE_COLUMNS = [
+    'agg_trade_id', 'price', 'quantity', 'first_trade_id', 'last_trade_id',
+    'transact_time', 'is_buyer_maker', 'is_best_match'
+]
+
+class TradeBarBuilder:
+    """OHLCV bars of `interval` built from individual trades.
+
+    The bar [start, start + interval) closes when the first trade at or after
+    its end arrives, or when `close_until` is called with a time past its end.
+    With `fill_gaps`, intervals without trades become flat zero-volume bars at
+    the previous close, as Binance fills its own klines. Trades older than the
+    current bar are ignored.
+    """
+
+    def __init__(self, interval, fill_gaps=True):
+        self.interval = interval
+        self.step = bar_interval_to_milliseconds(interval)
+        self.fill_gaps = fill_gaps
+        self.start = None
+        self.bar = None
+        self.last_close = None
+
+    def update(self, trade_time, price, quantity, trades_count=1):
+        closed = self.close_until(trade_time)
+        start = trade_time // self.step * self.step
+        if self.start is not None and start < self.start:
+            return closed
+        if self.bar is None:
+            self.start = start
+            self.bar = {
+                'timestamp': pd.Timestamp(start, unit='ms'),
+                'open': price,
+                'high': price,
+                'low': price,
+                'close': price,
+                'volume': quantity,
+                'trades_count': trades_count,
+            }
+        else:
+            bar = self.bar
+            if price > bar['high']:
+                bar['high'] = price
+            if price < bar['low']:
+                bar['low'] = price
+            bar['close'] = price
+            bar['volume'] += quantity
+            bar['trades_count'] += trades_count
+        return closed
+
+    def close_until(self, now):
+        """Bars that end at or before `now`, in time order."""
+        closed = []
+        if self.start is None or self.start + self.step > now:
+            return closed
+        if self.bar is not None:
+            closed.append(self.bar)
+            self.last_close = self.bar['close']
+            self.bar = None
+            self.start += self.step
+        if self.fill_gaps and self.last_close is not None:
+            price = self.last_close
+            while self.start + self.step <= now:
+                closed.append({
+                    'timestamp': pd.Timestamp(self.start, unit='ms'),
+                    'open': price,
+                    'high': price,
+                    'low': price,
+                    'close': price,
+                    'volume': 0.0,
+                    'trades_count': 0,
+                })
+                self.start += self.step
+        return closed
+
+    def partial(self):
+        return dict(self.bar) if self.bar is not None else None
+
+def _open(path):
+    path = Path(path)
+    return gzip.open(path, 'rt', encoding='utf-8') if path.suffix == '.gz' else path.open('r', encoding='utf-8')
+
+def read_trade_csv(path):
+    """An aggTrades archive from data.binance.vision (with or without the
+    header row) as a frame of trade_time, price, quantity and trades_count."""
+    with _open(path) as handle:
+        first = handle.readline()
+    header = 0 if first.split(',')[0].strip().isidentifier() else None
+    df = pd.read_csv(path, header=header)
+    df.columns = AGG_TRADE_COLUMNS[:len(df.columns)]
+    trade_time = df['transact_time'].to_numpy(dtype=np.int64)
+    # Newer spot archives use microsecond timestamps.
+    if len(trade_time) and trade_time.max() > 10 ** 14:
+        trade_time = trade_time // 1000
+    return pd.DataFrame({
+        'trade_time': trade_time,
+        'price': df['price'].to_numpy(dtype=np.float64),
+        'quantity': df['quantity'].to_numpy(dtype=np.float64),
+        'trades_count': (df['last_trade_id'] - df['first_trade_id'] + 1).to_numpy(dtype=np.int64),
+    })
+
+def iter_trade_file(path, symbol=None):
+    """(symbol, (trade_time, price, quantity, trades_count, event_time)) for
+    every trade of a recorded file: an aggTrades CSV archive, or JSON lines of
+    raw aggTrade frames (optionally gzipped). CSV rows carry no symbol, so
+    they are attributed to `symbol`."""
+    path = Path(path)
+    suffixes = [suffix for suffix in path.suffixes if suffix != '.gz']
+    if suffixes and suffixes[-1] == '.csv':
+        df = read_trade_csv(path)
+        for trade_time, price, quantity, trades_count in zip(
+            df['trade_time'].tolist(), df['price'].tolist(), df['quantity'].tolist(), df['trades_count'].tolist()
+        ):
+            yield symbol, (trade_time, price, quantity, trades_count, trade_time)
+        return
+    with _open(path) as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            decoded = decode_agg_trade_message(line)
+            if decoded is not None and (symbol is None or decoded[0].upper() == symbol.upper()):
+                yield decoded
+
+class BinanceAggTradeClient(BinanceMultiStreamClient):
+    """Sub-second candles built locally from the @aggTrade stream.
+
+    Subscribes to `<symbol>@aggTrade` and builds bars of every interval in
+    `intervals` (e.g. '100ms', '250ms', '500ms') with exact OHLCV and exchange
+    trade counts. Closed bars go through the same per-(symbol, interval)
+    buffers and `on_candle_closed` callbacks as kline candles, and on to the
+    resampler. A bar closes on the first trade past its end; in a quiet market
+    it closes `close_delay_ms` after its end by the exchange clock, estimated
+    from the event time of the last frame. `replay_file` feeds a recorded
+    trade file through the same path without a network.
+    """
+
+    def __init__(self, symbols, intervals=('250ms',), buffer_size=35, close_delay_ms=50, fill_gaps=True, **kwargs):
+        super().__init__([], buffer_size=buffer_size, **kwargs)
+        self.intervals = list(intervals)
+        self.close_delay_ms = close_delay_ms
+        self.builders = {}
+        self.clocks = {}
+        for symbol in symbols:
+            symbol = symbol.upper()
+            self.routes[f"{symbol.lower()}@aggTrade"] = symbol
+            for interval in self.intervals:
+                self.buffers[(symbol, interval)] = CandleRingBuffer(buffer_size)
+                self.builders[(symbol, interval)] = TradeBarBuilder(interval, fill_gaps)
+
+    @property
+    def streams(self):
+        return list(self.buffers)
+
+    async def fetch_initial_candles(self, fetcher=None):
+        # Binance has no sub-second klines, so the buffers fill from the stream.
+        logger.info(f"Building {', '.join(self.intervals)} bars from aggTrade for {len(self.routes)} symbols")
+        return True
+
+    async def _handle_message(self, message):
+        decoded = decode_agg_trade_message(message)
+        if decoded is not None:
+            await self._handle_trade(decoded[0].upper(), *decoded[1])
+
+    async def _handle_trade(self, symbol, trade_time, price, quantity, trades_count, event_time):
+        if (symbol, self.intervals[0]) not in self.builders:
+            return
+        self.latest_prices[symbol] = price
+        self.clocks[symbol] = (event_time, time.monotonic())
+
+        await self._trigger_callbacks(
+            'on_price_update',
+            price=price,
+            timestamp=trade_time,
+            is_closed=False,
+            symbol=symbol,
+            interval=self.intervals[0]
+        )
+
+        for interval in self.intervals:
+            for bar in self.builders[(symbol, interval)].update(trade_time, price, quantity, trades_count):
+                await self._publish_candle(symbol, interval, bar)
+
+    def exchange_time(self, symbol):
+        event_time, received = self.clocks[symbol]
+        return event_time + int((time.monotonic() - received) * 1000)
+
+    async def close_bars(self, now=None):
+        """Close the bars that ended `close_delay_ms` before `now` (by default
+        the estimated exchange time of each symbol)."""
+        for (symbol, interval), builder in self.builders.items():
+            if now is None and symbol not in self.clocks:
+                continue
+            until = (now if now is not None else self.exchange_time(symbol)) - self.close_delay_ms
+            for bar in builder.close_until(until):
+                await self._publish_candle(symbol, interval, bar)
+
+    async def _close_loop(self):
+        period = min(bar_interval_to_milliseconds(interval) for interval in self.intervals) / 2000
+        while True:
+            await asyncio.sleep(period)
+            try:
+                await self.close_bars()
+            except Exception as e:
+                logger.error(f"Error closing trade bars: {e}", exc_info=True)
+
+    async def connect_and_stream(self):
+        self.dispatcher.start()
+        await asyncio.gather(self._close_loop(), *[
+            self._stream_shard(shard_id, stream_names)
+            for shard_id, stream_names in enumerate(self.shards())
+        ])
+
+    async def replay_file(self, path, symbol=None, flush=True):
+        """Feed a recorded trade file (see `iter_trade_file`) through the bar
+        builders and callbacks as fast as possible. With `flush`, the bars
+        still open at the end of the file are closed too. Returns the number
+        of trades replayed."""
+        self.dispatcher.start()
+        count = 0
+        for trade_symbol, trade in iter_trade_file(path, symbol):
+            await self._handle_trade((trade_symbol or symbol).upper(), *trade)
+            count += 1
+        if flush:
+            for (bar_symbol, interval), builder in self.builders.items():
+                if builder.bar is not None:
+                    for bar in builder.close_until(builder.start + builder.step):
+                        await self._publish_candle(bar_symbol, interval, bar)
+        await self.dispatcher.join()
+        logger.info(f"Replayed {count} trades from {path}")
+        return count
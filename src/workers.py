@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from signals import SignalGenerator
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ('thread', 'process')
+
+_generator = None
+
+def _init_worker(config_path):
+    global _generator
+    _generator = SignalGenerator(config_path=config_path)
+
+def _ready():
+    return _generator is not None
+
+def evaluate_latest_job(df, symbol, cooldowns, timeframes=None, streamed=False):
+    # Cooldown state travels with the job so any worker can evaluate any symbol.
+    _generator.last_signal_times[symbol] = dict(cooldowns)
+    signal = _generator.evaluate_latest(df, symbol=symbol, timeframes=timeframes, streamed=streamed)
+    return signal, _generator.last_signal_times.pop(symbol, {})
+
+class SignalWorkerPool:
+    """Runs indicator and signal evaluation off the event loop.
+
+    At most one job per symbol is in flight. A candle that arrives while its
+    symbol is busy waits in a single pending slot, and a newer candle
+    replaces it, so stale jobs are skipped rather than queued. Results are
+    handed to `on_result(symbol, signal)` back on the event loop.
+    """
+
+    def __init__(self, config_path, executor='thread', max_workers=2, on_result=None):
+        if executor not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor '{executor}'. Expected one of {EXECUTOR_KINDS}")
+        self.kind = executor
+        self.on_result = on_result
+        if executor == 'process':
+            # spawn and forkserver re-import the __main__ module in every
+            # worker, so the pool forks, and does it here: create it before
+            # any other thread starts.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork') if 'fork' in methods else None
+            self.executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(str(config_path),)
+            )
+            for future in [self.executor.submit(_ready) for _ in range(max_workers)]:
+                future.result()
+        else:
+            _init_worker(str(config_path))
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.cooldowns = {}
+        self.running = {}
+        self.pending = {}
+        self.submitted = 0
+        self.completed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+
+    def submit(self, symbol, df, timeframes=None, streamed=False):
+        self.submitted += 1
+        if symbol in self.running:
+            if symbol in self.pending:
+                self.skipped += 1
+            self.pending[symbol] = (df, timeframes, streamed)
+            return
+        self.running[symbol] = asyncio.ensure_future(self._run(symbol, (df, timeframes, streamed)))
+
+    async def _run(self, symbol, job):
+        try:
+            while job is not None:
+                df, timeframes, streamed = job
+                started = time.monotonic()
+                try:
+                    future = self.executor.submit(evaluate_latest_job, df, symbol, self.cooldowns.get(symbol, {}), timeframes, streamed)
+                    signal, cooldowns = await asyncio.wrap_future(future)
+                    self.cooldowns[symbol] = cooldowns
+                    self.completed += 1
+                    if signal and self.on_result:
+                        result = self.on_result(symbol, signal)
+                        if asyncio.iscoroutine(result):
+                            await result
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"Signal job for {symbol} failed: {e}")
+                self.last_duration = time.monotonic() - started
+                self.max_duration = max(self.max_duration, self.last_duration)
+                job = self.pending.pop(symbol, None)
+        finally:
+            self.running.pop(symbol, None)
+
+    def metrics(self):
+        return {
+            'executor': self.kind,
+            'running': len(self.running),
+            'pending': len(self.pending),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'last_duration_ms': round(self.last_duration * 1000, 3),
+            'max_duration_ms': round(self.max_duration * 1000, 3)
+        }
+
+    def shutdown(self, wait=False):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
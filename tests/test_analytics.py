@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import forward_returns, range_extrema
+
+def test_range_extrema_matches_brute_force():
+    rng = np.random.default_rng(8)
+    values = rng.normal(0, 1, 500)
+    start = rng.integers(0, 500, 2000)
+    stop = start + rng.integers(-5, 120, 2000)
+    stop = np.minimum(stop, 499)
+
+    for maximum, reduce in ((True, np.max), (False, np.min)):
+        expected = np.array([reduce(values[a:b + 1]) if b >= a else np.nan for a, b in zip(start, stop)])
+        assert np.isnan(expected).any()
+        np.testing.assert_array_equal(range_extrema(values, start, stop, maximum=maximum), expected)
+
+def test_range_extrema_of_only_empty_ranges():
+    assert np.isnan(range_extrema(np.arange(5.0), np.array([3, 4]), np.array([2, -1]))).all()
+
+def test_forward_returns_by_hand():
+    close = np.array([100, 101, 102, 103, 104, 105, 104, 103, 102, 101], dtype=np.float64)
+    candles = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=len(close), freq='s'),
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1.0,
+    })
+    signals = [
+        {'timestamp': '2024-01-01T00:00:00', 'price': 100.0, 'strategy': 'up', 'direction': 'long', 'conditions': {}},
+        {'timestamp': '2024-01-01T00:00:05', 'price': 105.0, 'strategy': 'down', 'direction': 'short', 'conditions': {}},
+    ]
+    frame = forward_returns(signals, candles, horizons=['3s', '5s'])
+    long, short = frame.iloc[0], frame.iloc[1]
+
+    # Long: exit at 103, candles 1..3 reach 104 high and 100 low.
+    assert long['return_3s'] == pytest.approx(0.03)
+    assert long['mfe_3s'] == pytest.approx(0.04)
+    assert long['mae_3s'] == pytest.approx(0.0)
+    assert long['return_5s'] == pytest.approx(0.05)
+    assert long['mfe_5s'] == pytest.approx(0.06)
+    # Short: exit at 102, candles 6..8 reach 105 high and 101 low.
+    assert short['return_3s'] == pytest.approx(3 / 105)
+    assert short['mfe_3s'] == pytest.approx(4 / 105)
+    assert short['mae_3s'] == pytest.approx(0.0)
+    # Five seconds after the short runs past the last candle.
+    assert np.isnan(short[['return_5s', 'mfe_5s', 'mae_5s']].to_numpy(dtype=np.float64)).all()
@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import Backtester
+
+def candles(rows=4000, seed=17):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'open': np.roll(close, 1), 'high': close + 0.3, 'low': close - 0.3, 'close': close,
+        'volume': rng.uniform(5, 50, rows), 'trades_count': 1,
+    })
+
+def repo_config():
+    config = json.loads((Path(__file__).parents[1] / 'config.json').read_text())
+    config['indicator_backend'] = 'numpy'
+    return config
+
+def test_chunked_run_equals_a_single_pass():
+    df = candles()
+    config = repo_config()
+    single = Backtester(config=config).run(df)
+    chunked = Backtester(config=config, chunk_size=700).run(df)
+
+    assert single['trades'] > 10
+    for key in ('bars', 'signals', 'trades', 'closed_trades', 'open_position', 'exposure'):
+        assert chunked[key] == single[key], key
+    for key in ('total_return', 'max_drawdown', 'turnover', 'costs', 'average_trade_return'):
+        assert chunked[key] == pytest.approx(single[key], rel=1e-12, abs=1e-15), key
+
+def test_log_equity_and_fees_on_hand_computed_trades():
+    config = {
+        'indicator_backend': 'numpy',
+        'thresholds': {},
+        'signal_settings': {'min_confluence_count': 1, 'min_signal_interval_minutes': 0},
+        'strategies': [
+            {'name': 'up', 'direction': 'long', 'signal': 'BUY', 'conditions': ['go_long']},
+            {'name': 'down', 'direction': 'short', 'signal': 'SELL', 'conditions': ['go_short']},
+        ],
+    }
+    backtester = Backtester(config=config, fee=0.001, slippage=0.0, capital=1000.0)
+    close = np.array([100.0, 110.0, 121.0, 127.05, 114.345, 114.345])
+    timestamps = pd.date_range('2024-01-01', periods=len(close), freq='min').to_numpy()
+    conditions = {
+        'go_long': np.array([1, 0, 0, 0, 0, 0], dtype=bool),
+        'go_short': np.array([0, 0, 1, 0, 0, 0], dtype=bool),
+    }
+    report = backtester.run_conditions(conditions, timestamps, close)
+
+    # Long at 100 paying 0.1%, held to 121 and reversed (0.1% out, 0.1% in),
+    # then short through +5% and -10%.
+    keep = 0.999
+    assert report['trades'] == 2
+    assert report['closed_trades'] == 1
+    assert report['hit_rate'] == 1.0
+    assert report['average_trade_return'] == pytest.approx(1.21 * keep ** 2 - 1, rel=1e-12)
+    assert report['total_return'] == pytest.approx(1.21 * keep ** 3 * 0.95 * 1.1 - 1, rel=1e-12)
+    assert report['final_equity'] == pytest.approx(1000.0 * 1.21 * keep ** 3 * 0.95 * 1.1, rel=1e-12)
+    assert report['max_drawdown'] == pytest.approx(0.05, rel=1e-12)
+    assert report['turnover'] == 3.0
+    assert report['costs'] == pytest.approx(1000.0 * (0.001 + 1.21 * keep * 0.001 + 1.21 * keep ** 2 * 0.001), rel=1e-9)
+    assert report['exposure'] == pytest.approx(5 / 6)
+    assert report['open_position'] == -1
+    assert report['signals'] == {'up': 1, 'down': 1}
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from candle_buffer import CandleRingBuffer
+
+STEP = 1_000
+START = 1_700_000_000_000
+
+def candles(count, seed=2):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, count))
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(np.arange(START, START + count * STEP, STEP), unit='ms'),
+        'open': np.roll(close, 1), 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+        'volume': rng.uniform(5, 50, count), 'trades_count': rng.integers(1, 9, count),
+    })
+
+def assert_holds(buffer, expected):
+    expected = expected.reset_index(drop=True)
+    pd.testing.assert_frame_equal(buffer.to_dataframe(), expected, check_dtype=False)
+    assert len(buffer) == len(expected)
+    assert buffer[0]['timestamp'] == expected['timestamp'].iloc[0]
+    assert buffer[-1]['close'] == expected['close'].iloc[-1]
+    assert [candle['timestamp'] for candle in buffer] == expected['timestamp'].tolist()
+
+@pytest.mark.parametrize('count', [5, 7, 8, 23])
+def test_appends_keep_the_newest_in_order(count):
+    df = candles(count)
+    buffer = CandleRingBuffer(7)
+    for candle in df.to_dict('records'):
+        buffer.append(candle)
+    assert_holds(buffer, df.iloc[-7:])
+
+def test_extends_wrap_like_appends():
+    df = candles(40)
+    buffer = CandleRingBuffer(7)
+    # Across the end of the ring, then longer than the ring, then a single candle.
+    buffer.extend(df.iloc[:5])
+    buffer.extend(df.iloc[5:10])
+    assert_holds(buffer, df.iloc[3:10])
+    buffer.extend(df.iloc[10:30])
+    assert_holds(buffer, df.iloc[23:30])
+    buffer.append(df.iloc[30].to_dict())
+    buffer.extend(df.iloc[31:33])
+    assert_holds(buffer, df.iloc[26:33])
+
+def test_views_are_read_only():
+    buffer = CandleRingBuffer(3)
+    buffer.extend(candles(5))
+    with pytest.raises(ValueError):
+        buffer.view('close')[0] = 0.0
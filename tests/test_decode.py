@@ -0,0 +1,72 @@
+import json
+
+import pandas as pd
+import pytest
+
+import decode
+from decode import decode_agg_trade_message, decode_kline_message, decode_rest_klines, decode_stream_message, klines_to_frame
+
+T0 = 1_700_000_000_000
+
+# Binance sends prices and volumes as decimal strings, times and counts as ints.
+REST_BATCH = json.dumps([
+    [T0 + 60_000, "37012.10000000", "37020.00000000", "37001.55000000", "37010.01000000", "12.34500000",
+     T0 + 119_999, "456789.12", 321, "6.1", "225000.5", "0"],
+    [T0, "0.00001234", "0.00001240", "0.00001200", "0.00001239", "98765432.10000000",
+     T0 + 59_999, "1218.77", 4, "1.0", "12.3", "0"],
+])
+
+KLINE = {
+    "e": "kline", "E": T0 + 1_250, "s": "BTCUSDT",
+    "k": {"t": T0, "T": T0 + 999, "s": "BTCUSDT", "i": "1s", "f": 100, "L": 104,
+          "o": "37012.10000000", "c": "37010.01000000", "h": "37020.00000000", "l": "37001.55000000",
+          "v": "0.12345678", "n": 5, "x": True, "q": "4569.1", "V": "0.1", "Q": "3701.2", "B": "0"},
+}
+COMBINED = json.dumps({"stream": "btcusdt@kline_1s", "data": KLINE})
+TRADE = json.dumps({"stream": "btcusdt@aggTrade", "data": {
+    "e": "aggTrade", "E": T0 + 12, "s": "BTCUSDT", "a": 9, "p": "37010.01", "q": "0.005",
+    "f": 200, "l": 202, "T": T0 + 10, "m": False, "M": True,
+}})
+
+def decoded(monkeypatch, loads):
+    monkeypatch.setattr(decode, 'loads', loads)
+    return {
+        'rest': klines_to_frame(decode_rest_klines(decode.loads(REST_BATCH))),
+        'kline': decode_kline_message(json.dumps(KLINE)),
+        'combined': decode_kline_message(COMBINED.encode()),
+        'stream': decode_stream_message(COMBINED),
+        'raw_stream': decode_stream_message(json.dumps(KLINE)),
+        'trade': decode_agg_trade_message(TRADE),
+    }
+
+def types(value):
+    if isinstance(value, dict):
+        return {key: types(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(types(item) for item in value)
+    return type(value)
+
+def test_orjson_decodes_like_json(monkeypatch):
+    orjson = pytest.importorskip('orjson')
+    fast = decoded(monkeypatch, orjson.loads)
+    plain = decoded(monkeypatch, json.loads)
+
+    pd.testing.assert_frame_equal(fast.pop('rest'), plain.pop('rest'))
+    assert fast == plain
+    # Equal is not enough: 5 == 5.0, and ints must stay ints.
+    assert types(fast) == types(plain)
+
+def test_decoded_values(monkeypatch):
+    result = decoded(monkeypatch, json.loads)
+
+    rest = result['rest']
+    assert rest['timestamp'].tolist() == [pd.Timestamp(T0, unit='ms'), pd.Timestamp(T0 + 60_000, unit='ms')]
+    assert rest['open'].tolist() == [0.00001234, 37012.1]
+    assert rest['volume'].tolist() == [98765432.1, 12.345]
+    assert rest['trades_count'].tolist() == [4, 321]
+    assert rest['close_timestamp'].iloc[1] == pd.Timestamp(T0 + 119_999, unit='ms')
+
+    expected = (T0, 37012.1, 37020.0, 37001.55, 37010.01, 0.12345678, 5, True)
+    assert result['kline'] == result['combined'] == expected
+    assert result['stream'] == result['raw_stream'] == ('btcusdt@kline_1s', expected)
+    assert result['trade'] == ('BTCUSDT', (T0 + 10, 37010.01, 0.005, 3, T0 + 12))
@@ -0,0 +1,19 @@
+import asyncio
+
+from dispatch import EventChannel
+
+def test_coalesced_event_lag_starts_at_the_delivered_event():
+    async def run():
+        channel = EventChannel('on_price_update', 10, 'coalesce', 1)
+        channel.ready = asyncio.Event()
+        channel.space = asyncio.Event()
+        await channel.put((), {'symbol': 'BTCUSDT', 'price': 1.0})
+        await asyncio.sleep(0.2)
+        await channel.put((), {'symbol': 'BTCUSDT', 'price': 2.0})
+        args, kwargs = await channel.get()
+        return kwargs, channel
+
+    kwargs, channel = asyncio.run(run())
+    assert kwargs['price'] == 2.0
+    assert channel.coalesced == 1
+    assert channel.last_lag < 0.1
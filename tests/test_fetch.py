@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fetch
+from fetch import MAX_STREAMS_PER_CONNECTION, SUBSCRIBE_BATCH_SIZE, BinanceDataFetcher, BinanceMultiStreamClient, RequestWeightLimiter
+
+STEP = 60_000
+START = 1_700_000_040_000 // STEP * STEP
+
+def kline(open_time):
+    price = 100.0 + (open_time - START) / STEP
+    return [
+        open_time, str(price), str(price + 1), str(price - 1), str(price + 0.5), "10.0",
+        open_time + STEP - 1, "1000.0", 7, "5.0", "500.0", "0"
+    ]
+
+class KlineHandler(BaseHTTPRequestHandler):
+    """/api/v3/klines over a synthetic 1m history. Pages come back newest
+    first and repeat the candle before `startTime`, and the first request of
+    every page in `server.rate_limited` is answered with that status."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: int(values[0]) if values[0].isdigit() else values[0] for key, values in parse_qs(url.query).items()}
+        with self.server.lock:
+            self.server.requests.append(params)
+            status = self.server.rate_limited.pop(params.get("startTime"), None)
+        if url.path != "/api/v3/klines":
+            return self.reply(404, {"msg": "not found"})
+        if status is not None:
+            return self.reply(status, {"code": -1003, "msg": "Too many requests"}, {"Retry-After": "0.05"})
+        times = list(range(params["startTime"], min(params["endTime"] + 1, params["startTime"] + params["limit"] * STEP), STEP))
+        if params["startTime"] > START:
+            times.insert(0, params["startTime"] - STEP)
+        self.reply(200, [kline(open_time) for open_time in reversed(times)], {"X-MBX-USED-WEIGHT-1M": "2"})
+
+    def reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KlineHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.rate_limited = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def fetcher(server, tmp_path):
+    return BinanceDataFetcher(
+        data_dir=str(tmp_path),
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/api/v3",
+        max_workers=4
+    )
+
+def test_fetch_range_orders_and_deduplicates_pages(server, fetcher):
+    end = START + 2500 * STEP
+    df = fetcher.fetch_range("BTCUSDT", "1m", START, end)
+
+    assert len(server.requests) == 3
+    assert [request["startTime"] for request in sorted(server.requests, key=lambda r: r["startTime"])] == [
+        START, START + 1000 * STEP, START + 2000 * STEP
+    ]
+    times = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    np.testing.assert_array_equal(times, np.arange(START, end, STEP))
+    assert df["close"].iloc[-1] == pytest.approx(100.0 + 2499 + 0.5)
+    assert df["trades_count"].dtype == np.int64
+
+def test_fetch_range_retries_rate_limited_pages(server, fetcher):
+    server.rate_limited = {START: 429, START + 1000 * STEP: 418}
+    df = fetcher.fetch_range("BTCUSDT", "1m", START, START + 1500 * STEP)
+
+    assert len(df) == 1500
+    assert len(server.requests) == 4
+    assert not server.rate_limited
+
+def test_fetch_range_gives_up_after_max_retries(server, fetcher):
+    fetcher.max_retries = 0
+    server.rate_limited = {START: 429}
+    assert fetcher.fetch_range("BTCUSDT", "1m", START, START + 10 * STEP) is None
+
+def test_fetch_range_waits_for_request_weight(server, fetcher):
+    fetcher.limiter = RequestWeightLimiter(weight_per_minute=4, window=0.3)
+    started = time.monotonic()
+    df = fetcher.fetch_range("BTCUSDT", "1m", START, START + 3000 * STEP)
+
+    assert len(df) == 3000
+    assert time.monotonic() - started >= 0.25
+
+def test_limiter_blocks_until_the_window_slides():
+    limiter = RequestWeightLimiter(weight_per_minute=4, window=0.2)
+    started = time.monotonic()
+    limiter.acquire(2)
+    limiter.acquire(2)
+    assert time.monotonic() - started < 0.1
+    limiter.acquire(2)
+    assert time.monotonic() - started >= 0.18
+
+def test_limiter_block_for_delays_every_caller():
+    limiter = RequestWeightLimiter(weight_per_minute=100, window=1.0)
+    limiter.block_for(0.15)
+    started = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - started >= 0.13
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+def many_streams(count):
+    return [(f"S{i:04d}USDT", "1m") for i in range(count)]
+
+@pytest.mark.parametrize("count, sizes", [
+    (1, [1]),
+    (MAX_STREAMS_PER_CONNECTION - 1, [MAX_STREAMS_PER_CONNECTION - 1]),
+    (MAX_STREAMS_PER_CONNECTION, [MAX_STREAMS_PER_CONNECTION]),
+    (MAX_STREAMS_PER_CONNECTION + 1, [MAX_STREAMS_PER_CONNECTION, 1]),
+    (2 * MAX_STREAMS_PER_CONNECTION + 1, [MAX_STREAMS_PER_CONNECTION, MAX_STREAMS_PER_CONNECTION, 1]),
+])
+def test_shards_fill_connections_up_to_the_limit(count, sizes):
+    client = BinanceMultiStreamClient(many_streams(count))
+    shards = client.shards()
+
+    assert [len(shard) for shard in shards] == sizes
+    assert [name for shard in shards for name in shard] == [f"s{i:04d}usdt@kline_1m" for i in range(count)]
+
+def test_repeated_streams_share_a_route():
+    client = BinanceMultiStreamClient(many_streams(3) + [("s0001usdt", "1m")])
+    assert client.shards() == [["s0000usdt@kline_1m", "s0001usdt@kline_1m", "s0002usdt@kline_1m"]]
+
+@pytest.mark.parametrize("count", [SUBSCRIBE_BATCH_SIZE, SUBSCRIBE_BATCH_SIZE + 1, MAX_STREAMS_PER_CONNECTION])
+def test_subscribe_batches_a_shard(monkeypatch, count):
+    monkeypatch.setattr(fetch, "SUBSCRIBE_INTERVAL", 0)
+    client = BinanceMultiStreamClient(many_streams(count))
+    [shard] = client.shards()
+    socket = RecordingSocket()
+    asyncio.run(client._subscribe(socket, shard))
+
+    batches = -(-count // SUBSCRIBE_BATCH_SIZE)
+    assert [request["id"] for request in socket.sent] == list(range(1, batches + 1))
+    assert all(request["method"] == "SUBSCRIBE" for request in socket.sent)
+    assert all(len(request["params"]) <= SUBSCRIBE_BATCH_SIZE for request in socket.sent)
+    assert [name for request in socket.sent for name in request["params"]] == shard
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from indicators.engine import IndicatorEngine
+
+def candles(rows=120):
+    close = 100 + np.cumsum(np.sin(np.arange(rows) / 5.0))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+        'volume': 10 + np.cos(np.arange(rows)),
+    })
+
+def test_cached_indicator_frames_are_not_shared():
+    engine = IndicatorEngine(backend='numpy')
+    df = candles()
+    first = engine.calculate_all_indicators(df)
+    expected = first['rsi'].copy()
+    first['rsi'] = -1.0
+    second = engine.calculate_all_indicators(df)
+
+    assert second is not first
+    pd.testing.assert_series_equal(second['rsi'], expected)
+    assert engine.cache_info()['hits'] >= 1
+
+def test_cached_indicator_results_are_not_shared():
+    engine = IndicatorEngine(backend='numpy')
+    df = candles()
+    rsi = engine.indicators['rsi']
+    first = rsi.cached_calculate(df)
+    first.iloc[-1] = -1.0
+    assert rsi.cached_calculate(df).iloc[-1] != -1.0
+
+    summary = engine.get_indicator_summary(df)
+    summary.clear()
+    assert engine.get_indicator_summary(df)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators.engine import IndicatorEngine
+
+RTOL = 1e-9
+
+GRIDS = {
+    'rsi': {'period': [2, 7, 14, 21]},
+    'macd': {'fast_period': [5, 12], 'slow_period': [26, 35], 'signal_period': [4, 9]},
+    'ema': {'periods': [3, 12, 50]},
+    'bollinger_bands': {'period': [10, 20], 'std_dev': [1.5, 2.0]},
+    'volume_ma': {'short_period': [5, 10], 'long_period': [30, 60]},
+}
+
+def candles(rows=800, seed=12):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    # A flat stretch, where bands and RSI have nothing to divide by.
+    close[300:380] = close[299]
+    spread = np.abs(rng.normal(0, 0.3, rows))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'open': np.roll(close, 1), 'high': close + spread, 'low': close - spread, 'close': close,
+        'volume': rng.uniform(5, 50, rows),
+    })
+
+def single_run(engine, name, parameters, df):
+    """The frame `calculate` gives for one parameter set, with grid column names."""
+    indicator = type(engine.indicators[name])(**({'periods': [parameters['period']]} if name == 'ema' else parameters))
+    indicator.backend = engine.backend
+    data = indicator.calculate(df)
+    if isinstance(data, pd.Series):
+        return data.to_frame(indicator.output_columns()[0])
+    if name == 'ema':
+        return data.rename(columns={f"ema_{parameters['period']}": 'ema'})
+    return data
+
+@pytest.mark.parametrize('name', list(GRIDS))
+def test_grid_rows_match_single_runs(name):
+    df = candles()
+    engine = IndicatorEngine(cache_size=0, backend='numpy')
+    result = engine.calculate_grid(df, {name: GRIDS[name]})[name]
+
+    sizes = [len(values) for values in GRIDS[name].values()]
+    assert len(result) == int(np.prod(sizes))
+    for i, parameters in enumerate(result.parameters):
+        expected = single_run(engine, name, parameters, df)
+        for column in result.columns:
+            left = expected[column].to_numpy(dtype=np.float64)
+            right = result[column][i]
+            message = f"{column} {parameters}"
+            np.testing.assert_array_equal(np.isnan(left), np.isnan(right), err_msg=message)
+            np.testing.assert_allclose(right, left, rtol=RTOL, atol=RTOL * np.nanmax(np.abs(left)), equal_nan=True, err_msg=message)
+
+def test_grids_share_one_pass():
+    df = candles()
+    engine = IndicatorEngine(cache_size=0, backend='numpy')
+    results = engine.calculate_grid(df, GRIDS)
+    separate = {name: engine.calculate_grid(df, {name: values})[name] for name, values in GRIDS.items()}
+    for name, result in results.items():
+        assert result.parameters == separate[name].parameters
+        for column in result.columns:
+            np.testing.assert_array_equal(result[column], separate[name][column])
@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+
+import numpy as np
+import pandas as pd
+
+from fetch import BinanceMultiStreamClient
+from journal import MessageJournal, iter_candle_frames, iter_journal, replay
+from store import frame_to_records
+
+STEP = 1_000
+START = 1_700_000_000_000
+
+def frames(count=120, seed=2):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, count))
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(np.arange(START, START + count * STEP, STEP), unit='ms'),
+        'open': close, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+        'volume': rng.uniform(5, 50, count), 'trades_count': 3,
+    })
+    return list(iter_candle_frames(frame_to_records(df), 'BTCUSDT', '1s'))
+
+def client():
+    return BinanceMultiStreamClient([('BTCUSDT', '1s')], buffer_size=200)
+
+def buffer_frame(client):
+    return client.buffers[('BTCUSDT', '1s')].to_dataframe()
+
+def write_journal(path, messages):
+    with MessageJournal(path, flush_interval=0) as journal:
+        for received, message in messages:
+            journal.write(message, received)
+    return path
+
+def test_replayed_journal_matches_the_live_session(tmp_path):
+    messages = frames()
+    live = client()
+
+    async def stream():
+        for _, message in messages:
+            await live._handle_message(message)
+    asyncio.run(stream())
+    path = write_journal(tmp_path / 'session.jsonl.gz', messages)
+
+    replayed = client()
+    assert asyncio.run(replay(replayed, path, speed=0)) == len(messages)
+    assert len(buffer_frame(replayed)) == len(messages)
+    pd.testing.assert_frame_equal(buffer_frame(replayed), buffer_frame(live))
+    assert replayed.latest_prices == live.latest_prices
+
+def test_reopened_journal_appends(tmp_path):
+    messages = frames()
+    path = write_journal(tmp_path / 'session.jsonl.gz', messages[:50])
+    write_journal(path, messages[50:])
+    assert list(iter_journal(path)) == messages
+
+def test_truncated_journal_stops_cleanly(tmp_path):
+    messages = frames()
+    path = write_journal(tmp_path / 'session.jsonl.gz', messages)
+    data = path.read_bytes()
+    # Cut inside the last flushed block, in the middle of a record.
+    truncated = tmp_path / 'truncated.jsonl.gz'
+    truncated.write_bytes(data[:len(data) // 2])
+
+    records = list(iter_journal(truncated))
+    assert 0 < len(records) < len(messages)
+    assert records == messages[:len(records)]
+    partial = client()
+    assert asyncio.run(replay(partial, truncated, speed=0)) == len(records)
+    assert len(buffer_frame(partial)) == len(records)
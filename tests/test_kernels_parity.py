@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators.engine import IndicatorEngine
+
+pytest.importorskip("pandas_ta")
+
+REFERENCE = 'pandas_ta'
+RTOL = 1e-9
+
+def candles(rows=600, seed=7, flat=None):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    if flat is not None:
+        close[flat] = close[flat.start - 1]
+    spread = np.abs(rng.normal(0, 0.3, rows))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'open': np.roll(close, 1),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(5, 50, rows),
+    })
+
+def indicator_frames(df):
+    frames = [
+        IndicatorEngine(cache_size=0, backend=backend).calculate_all_indicators(df)
+        for backend in (REFERENCE, 'numpy')
+    ]
+    return [frame.loc[:, ~frame.columns.duplicated()] for frame in frames]
+
+def indicator_columns(df, frame):
+    return [column for column in frame.columns if column not in df.columns]
+
+def assert_parity(expected, actual, column, rows=slice(None)):
+    left = expected[column].to_numpy(dtype=np.float64)[rows]
+    right = actual[column].to_numpy(dtype=np.float64)[rows]
+    np.testing.assert_array_equal(np.isnan(left), np.isnan(right), err_msg=f"{column}: NaN rows differ")
+    both = ~np.isnan(left)
+    scale = max(float(np.abs(left[both]).max()), 1.0) if both.any() else 1.0
+    np.testing.assert_allclose(right[both], left[both], rtol=RTOL, atol=RTOL * scale, err_msg=column)
+
+def test_every_column_matches_pandas_ta():
+    df = candles()
+    expected, actual = indicator_frames(df)
+    columns = indicator_columns(df, expected)
+
+    assert columns == indicator_columns(df, actual)
+    assert {'rsi', 'macd', 'signal', 'histogram', 'ema_12', 'ema_26', 'bb_width', 'bb_percent', 'vol_zscore'} <= set(columns)
+    for column in columns:
+        assert_parity(expected, actual, column)
+
+@pytest.mark.parametrize('parameters', [
+    {'rsi': {'period': 7}, 'macd': {'fast_period': 5, 'slow_period': 35, 'signal_period': 5},
+     'ema': {'periods': [9, 21, 50]}, 'bollinger_bands': {'period': 10, 'std_dev': 1.5},
+     'volume_ma': {'short_period': 5, 'long_period': 20}},
+])
+def test_non_default_parameters_match_pandas_ta(parameters):
+    df = candles(seed=11)
+    expected, actual = (
+        IndicatorEngine(config=parameters, cache_size=0, backend=backend).calculate_all_indicators(df)
+        for backend in (REFERENCE, 'numpy')
+    )
+    expected = expected.loc[:, ~expected.columns.duplicated()]
+    actual = actual.loc[:, ~actual.columns.duplicated()]
+    for column in indicator_columns(df, expected):
+        assert_parity(expected, actual, column)
+
+def test_flat_closes_give_zero_band_width():
+    period = 20
+    flat = slice(300, 340)
+    df = candles(flat=flat)
+    expected, actual = indicator_frames(df)
+    # Rows whose whole Bollinger window lies in the flat run.
+    flat_rows = np.zeros(len(df), dtype=bool)
+    flat_rows[flat.start + period - 1:flat.stop] = True
+
+    assert (actual['bb_width'].to_numpy()[flat_rows] == 0.0).all()
+    assert np.isnan(actual['bb_percent'].to_numpy()[flat_rows]).all()
+    # pandas' rolling deviation may leave a residual in a flat window, which
+    # makes its bands differ by that much and its bb_percent arbitrary there.
+    price = float(df['close'].abs().max())
+    np.testing.assert_allclose(expected['bb_width'].to_numpy()[flat_rows], 0.0, atol=1e-6)
+    for column in ('bb_lower', 'bb_middle', 'bb_upper'):
+        np.testing.assert_allclose(actual[column].to_numpy()[flat_rows], expected[column].to_numpy()[flat_rows], rtol=0, atol=1e-6 * price)
+    for column in indicator_columns(df, expected):
+        assert_parity(expected, actual, column, ~flat_rows)
@@ -0,0 +1,65 @@
+import json
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import optimize
+from backtest import Backtester
+from optimize import apply_candidate
+
+def candles(rows=3000, seed=23):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'open': np.roll(close, 1), 'high': close + 0.3, 'low': close - 0.3, 'close': close,
+        'volume': rng.uniform(5, 50, rows), 'trades_count': 1,
+    })
+
+SPACE = {
+    'strategies': [['macd_bollinger_long', 'macd_bollinger_short'], ['ema_rsi_long', 'macd_bollinger_short']],
+    'signal_settings': {'min_signal_interval_minutes': [0, 0.5]},
+    'thresholds': {'rsi': {'oversold': [25, 35]}},
+}
+
+@pytest.fixture
+def config():
+    config = json.loads((Path(__file__).parents[1] / 'config.json').read_text())
+    config['indicator_backend'] = 'numpy'
+    return config
+
+@pytest.fixture
+def blocks(monkeypatch):
+    names = []
+    create = optimize.SharedArrays.create.__func__
+    def recording(cls, arrays):
+        shared = create(cls, arrays)
+        names.append(shared.block.name)
+        return shared
+    monkeypatch.setattr(optimize.SharedArrays, 'create', classmethod(recording))
+    return names
+
+def assert_released(names):
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+def test_parallel_ranking_matches_serial_and_backtests(config, blocks):
+    df = candles()
+    serial = optimize.optimize(df, SPACE, config=config, processes=1)
+    parallel = optimize.optimize(df, SPACE, config=config, processes=2)
+
+    assert len(serial) == 8
+    assert parallel == serial
+    assert any(result['report']['trades'] for result in serial)
+    for result in serial:
+        expected = Backtester(config=apply_candidate(config, result['candidate'])).run(df)
+        for key, value in expected.items():
+            assert result['report'][key] == pytest.approx(value, rel=1e-12, abs=1e-15), key
+    ranked = [result['report']['total_return'] for result in serial]
+    assert ranked == sorted(ranked, reverse=True)
+    assert len(blocks) == 2
+    assert_released(blocks)
@@ -0,0 +1,88 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from indicators.engine import IndicatorEngine
+import resample
+from resample import BarAggregator, TimeframeResampler
+
+STEP = 1_000
+MINUTE = 60_000
+START = 1_700_000_040_000 // MINUTE * MINUTE
+
+def candle(open_time, volume=1.0):
+    return {
+        'timestamp': pd.Timestamp(open_time, unit='ms'),
+        'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5,
+        'volume': volume, 'trades_count': 1,
+    }
+
+class SecondFetcher:
+    """1s candles for any range; 1m klines ending with the open one at `now`."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def fetch_klines(self, symbol, interval, limit):
+        opens = np.arange(self.now // MINUTE * MINUTE - (limit - 1) * MINUTE, self.now, MINUTE)
+        return pd.DataFrame([candle(int(t), 60.0) for t in opens])
+
+    def fetch_range(self, symbol, interval, start, end):
+        return pd.DataFrame([candle(t) for t in range(start, end, STEP)])
+
+def test_bar_closes_with_its_last_base_candle():
+    aggregator = BarAggregator('1m', '1s')
+    closed = [bar for t in range(START, START + MINUTE, STEP) for bar in aggregator.update(candle(t))]
+
+    assert len(closed) == 1
+    assert closed[0]['timestamp'] == pd.Timestamp(START, unit='ms')
+    assert closed[0]['volume'] == 60.0
+    assert closed[0]['trades_count'] == 60
+
+def test_bar_missing_its_first_candles_is_dropped():
+    aggregator = BarAggregator('1m', '1s')
+    booted = START + 40 * STEP
+    closed = [bar for t in range(booted, START + 2 * MINUTE, STEP) for bar in aggregator.update(candle(t))]
+
+    assert [bar['timestamp'] for bar in closed] == [pd.Timestamp(START + MINUTE, unit='ms')]
+
+def test_repeated_candles_are_counted_once():
+    aggregator = BarAggregator('1m', '1s')
+    aggregator.update(candle(START))
+    aggregator.update(candle(START))
+    assert aggregator.partial()['volume'] == 1.0
+
+def test_initial_bars_backfill_the_open_bar(monkeypatch):
+    now = START + 40 * STEP + 500
+    monkeypatch.setattr(resample.time, 'time', lambda: now / 1000)
+    resampler = TimeframeResampler(['1m'], '1s', buffer_size=10)
+    fetcher = SecondFetcher(now)
+    asyncio.run(resampler.fetch_initial_bars(['btcusdt'], fetcher, limit=5))
+
+    assert len(resampler.buffer('BTCUSDT', '1m')) == 5
+    assert resampler.partial('BTCUSDT', '1m')['volume'] == 40.0
+    # The stream repeats the candle the backfill ended with, then carries on.
+    closed = [bar for t in range(START + 39 * STEP, START + MINUTE, STEP) for _, bar in resampler.update('BTCUSDT', candle(t))]
+    assert len(closed) == 1
+    assert closed[0]['volume'] == 60.0
+
+def test_base_candles_stream_their_indicators():
+    engine = IndicatorEngine(backend='numpy')
+    resampler = TimeframeResampler(['1m'], '1s', engine=engine, buffer_size=50, history=200)
+    rng = np.random.default_rng(5)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, 200))
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(np.arange(START, START + 200 * STEP, STEP), unit='ms'),
+        'open': close, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+        'volume': rng.uniform(5, 50, 200), 'trades_count': 1,
+    })
+    for candle in df.to_dict('records'):
+        resampler.update('BTCUSDT', candle)
+    resampler.update('BTCUSDT', df.iloc[-1].to_dict())
+
+    rows = resampler.base_indicator_frame('BTCUSDT')
+    expected = engine.calculate_all_indicators(df)
+    assert len(rows) == 200
+    for column in ('rsi', 'macd', 'signal', 'bb_width', 'vol_zscore'):
+        np.testing.assert_allclose(rows[column], expected[column], rtol=1e-9, equal_nan=True)
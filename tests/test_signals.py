@@ -0,0 +1,197 @@
+import json
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators.engine import IndicatorEngine
+from signals import (
+    INDICATOR_CONTEXT_KEYS, SignalGenerator, build_condition_matrix, compile_strategies,
+    compute_conditions, emitted_rows, evaluate_strategies, score_strategies
+)
+
+def candles(rows=200, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'open': close, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+        'volume': rng.uniform(5, 50, rows),
+    })
+
+def generator(strategies, thresholds=None, prune=False):
+    config = {
+        'thresholds': thresholds or {'rsi': {'oversold': 30, 'overbought': 70}},
+        'signal_settings': {'min_confluence_count': 1},
+        'strategies': strategies,
+    }
+    return SignalGenerator(config=config, indicator_engine=IndicatorEngine(backend='numpy'), prune=prune)
+
+def test_named_divergence_conditions_are_computed_without_a_plan():
+    strategy = {'name': 'div', 'direction': 'BUY', 'conditions': ['rsi_bullish_divergence'], 'min_confluence': 1}
+    signals = generator([strategy])
+    indicator_df = signals.indicator_engine.calculate_all_indicators(candles())
+    conditions = compute_conditions(indicator_df, signals.thresholds)
+
+    assert signals.thresholds['rsi']['divergence_lookback'] == 5
+    assert signals.thresholds['rsi']['oversold'] == 30
+    assert 'rsi_bullish_divergence' in conditions
+    assert 'macd_bullish_divergence' not in conditions
+
+def test_timeframe_and_disabled_divergence_leave_base_thresholds_alone():
+    strategies = [
+        {'name': 'htf', 'direction': 'BUY', 'conditions': ['1m:macd_bullish_divergence']},
+        {'name': 'off', 'direction': 'BUY', 'conditions': ['rsi_bullish_divergence'], 'enabled': False},
+    ]
+    assert generator(strategies).thresholds == {'rsi': {'oversold': 30, 'overbought': 70}}
+
+def test_configured_pivot_window_is_kept():
+    strategy = {'name': 'div', 'direction': 'SELL', 'conditions': ['macd_bearish_divergence']}
+    thresholds = {'macd': {'divergence_pivot_window': 3}}
+    assert generator([strategy], thresholds).thresholds == thresholds
+
+def test_latest_timeframe_signal_needs_frames_or_history():
+    strategy = {'name': 'htf', 'direction': 'BUY', 'conditions': ['1m:rsi_oversold']}
+    signals = generator([strategy])
+    df = candles(35)
+
+    with pytest.raises(ValueError, match='1m'):
+        signals.evaluate_latest(df)
+    signals.evaluate_latest(df, timeframes={'1m': pd.DataFrame()})
+    signals.evaluate_latest(candles(signals.warmup_period()))
+
+def reference_signals(indicator_df, conditions, strategies, signal_settings):
+    """The per-row strategy loop evaluate_strategies replaced."""
+    min_confluence = signal_settings.get('min_confluence_count', 1)
+    min_interval = timedelta(minutes=signal_settings.get('min_signal_interval_minutes', 0))
+    low_volatility = conditions.get('low_volatility')
+    last_signal_times = {}
+    signals = []
+    for idx in indicator_df.index:
+        row_conditions = {name: bool(series.loc[idx]) for name, series in conditions.items()}
+        confluence = sum(row_conditions.values())
+        if signal_settings.get('ignore_low_volatility') and low_volatility is not None and low_volatility.loc[idx]:
+            continue
+        timestamp = indicator_df.at[idx, 'timestamp']
+        for strategy in strategies:
+            required = strategy.get('conditions', [])
+            if not strategy.get('enabled', True) or not required:
+                continue
+            if not all(row_conditions.get(condition, False) for condition in required):
+                continue
+            if confluence < max(min_confluence, strategy.get('min_confluence', len(required))):
+                continue
+            last_time = last_signal_times.get(strategy['signal'])
+            if min_interval and last_time is not None and timestamp - last_time < min_interval:
+                continue
+            row = indicator_df.loc[idx]
+            indicators = {}
+            for key in INDICATOR_CONTEXT_KEYS:
+                if key in row.index:
+                    value = row[key]
+                    # calculate_all_indicators repeats the volume column.
+                    value = value.iloc[0] if isinstance(value, pd.Series) else value
+                    if pd.notna(value):
+                        indicators[key] = float(value)
+            signals.append({
+                'timestamp': timestamp.isoformat(), 'strategy': strategy['name'], 'signal': strategy['signal'],
+                'price': float(indicator_df.at[idx, 'close']), 'confluence': confluence,
+                'conditions': {condition: row_conditions[condition] for condition in required},
+                'indicators': indicators,
+            })
+            last_signal_times[strategy['signal']] = timestamp
+    return signals
+
+@pytest.mark.parametrize('settings', [
+    {'min_signal_interval_minutes': 0},
+    {'min_signal_interval_minutes': 0.25},
+    {'min_signal_interval_minutes': 0.25, 'ignore_low_volatility': True, 'min_confluence_count': 2},
+])
+def test_vectorized_strategies_match_the_row_loop(settings):
+    config = json.loads((Path(__file__).parents[1] / 'config.json').read_text())
+    df = candles(3000, seed=21)
+    indicator_df = IndicatorEngine(backend='numpy').calculate_all_indicators(df)
+    assert list(indicator_df.columns).count('volume') == 2
+    thresholds = {**config['thresholds'], 'bollinger': {**config['thresholds'].get('bollinger', {}),
+                  'low_volatility_width': float(np.nanmedian(indicator_df['bb_width']))}}
+    conditions = compute_conditions(indicator_df, thresholds)
+    assert conditions['low_volatility'].any() and not conditions['low_volatility'].all()
+    signal_settings = {'min_confluence_count': 1, **settings}
+    strategies = config['strategies']
+
+    expected = reference_signals(indicator_df, conditions, strategies, signal_settings)
+    actual = evaluate_strategies(indicator_df, conditions, 'BTCUSDT', strategies, signal_settings, {})
+    keys = ['timestamp', 'strategy', 'signal', 'price', 'confluence', 'conditions', 'indicators']
+    assert len(expected) > 20
+    assert [{key: signal[key] for key in keys} for signal in actual] == expected
+    if settings['min_signal_interval_minutes']:
+        uncooled = reference_signals(indicator_df, conditions, strategies, {**signal_settings, 'min_signal_interval_minutes': 0})
+        assert len(uncooled) > len(expected)
+
+    # The backtest and threshold sweep emit through emitted_rows instead.
+    condition_names, matrix = build_condition_matrix(conditions, len(indicator_df))
+    compiled = compile_strategies(strategies, condition_names, signal_settings['min_confluence_count'])
+    fired = score_strategies(matrix, matrix.sum(axis=1), compiled)
+    if settings.get('ignore_low_volatility'):
+        fired &= ~conditions['low_volatility'].to_numpy()[:, None]
+    timestamps = indicator_df['timestamp'].to_numpy()
+    interval = np.timedelta64(int(settings['min_signal_interval_minutes'] * 60e9), 'ns') if settings['min_signal_interval_minutes'] else None
+    groups = {}
+    for index, (strategy, _, _) in enumerate(compiled):
+        groups.setdefault(strategy['signal'], []).append(index)
+    emitted = []
+    for members in groups.values():
+        for index, rows in zip(members, emitted_rows(fired[:, members].T, timestamps, interval)):
+            emitted.extend((row, index) for row in rows)
+    assert [(pd.Timestamp(timestamps[row]).isoformat(), compiled[index][0]['name']) for row, index in sorted(emitted)] == [
+        (signal['timestamp'], signal['strategy']) for signal in expected
+    ]
+
+@pytest.mark.parametrize('interval', [0, 0.25])
+def test_panel_signals_match_each_symbol(interval):
+    config = json.loads((Path(__file__).parents[1] / 'config.json').read_text())
+    config['signal_settings'] = {**config['signal_settings'], 'min_signal_interval_minutes': interval}
+    frames = {'BTCUSDT': candles(2000, seed=31), 'ETHUSDT': candles(2000, seed=32), 'SOLUSDT': candles(2000, seed=33).iloc[500:]}
+    long = pd.concat([df.assign(symbol=symbol) for symbol, df in frames.items()], ignore_index=True)
+
+    def fresh():
+        return SignalGenerator(config=config, indicator_engine=IndicatorEngine(backend='numpy'))
+
+    actual = fresh().generate_panel_signals(long)
+    expected = []
+    for symbol, df in frames.items():
+        expected.extend(fresh().generate_signals(df.reset_index(drop=True), symbol=symbol))
+    order = list(frames)
+    expected.sort(key=lambda signal: (signal['timestamp'], order.index(signal['symbol'])))
+    assert len(expected) > 20
+    assert {signal['symbol'] for signal in expected} == set(frames)
+    # Wide EMAs round differently in the last bit, so the context is compared approximately.
+    assert [{**signal, 'indicators': None} for signal in actual] == [{**signal, 'indicators': None} for signal in expected]
+    for panel_signal, signal in zip(actual, expected):
+        assert panel_signal['indicators'] == pytest.approx(signal['indicators'], rel=1e-9)
+
+def test_threshold_sweep_matches_generate_signals():
+    config = json.loads((Path(__file__).parents[1] / 'config.json').read_text())
+    config['signal_settings'] = {**config['signal_settings'], 'min_signal_interval_minutes': 0.25, 'ignore_low_volatility': True}
+    df = candles(1500, seed=41)
+    width = float(np.nanmedian(IndicatorEngine(backend='numpy').calculate_all_indicators(df)['bb_width']))
+    grid = {
+        'rsi': {'oversold': [25, 35, 45], 'overbought': [55, 70]},
+        'bollinger': {'touch_tolerance': [0.0, 0.002], 'low_volatility_width': [0.0, width]},
+        'volume': {'ratio_long_min': [1.0, 1.5]},
+    }
+    results = SignalGenerator(config=config, indicator_engine=IndicatorEngine(backend='numpy')).sweep_thresholds(df, grid)
+
+    assert len(results) == 3 * 2 * 2 * 2 * 2
+    assert len({result['signal_count'] for result in results}) > 5
+    for result in results:
+        single = SignalGenerator(config={**config, 'thresholds': result['thresholds']}, indicator_engine=IndicatorEngine(backend='numpy'))
+        signals = single.generate_signals(df)
+        times = {}
+        for signal in signals:
+            times.setdefault(signal['strategy'], []).append(signal['timestamp'])
+        assert result['signal_count'] == len(signals), result['swept']
+        assert {name: count for name, count in result['counts'].items() if count} == {name: len(rows) for name, rows in times.items()}, result['swept']
+        assert {name: [pd.Timestamp(time).isoformat() for time in rows] for name, rows in result['timestamps'].items() if len(rows)} == times, result['swept']
@@ -0,0 +1,85 @@
+import asyncio
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from fetch import BinanceMultiStreamClient
+from indicators.engine import IndicatorEngine
+from resample import TimeframeResampler
+from snapshot import restore_snapshot, save_snapshot
+
+STEP = 1_000
+
+def candles(start, count, seed=9):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, count))
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(np.arange(start, start + count * STEP, STEP), unit='ms'),
+        'open': close, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+        'volume': rng.uniform(5, 50, count), 'trades_count': 3,
+    })
+
+class RangeFetcher:
+    def __init__(self, df):
+        self.df = df
+
+    def fetch_range(self, symbol, interval, start, end):
+        times = pd.to_datetime(self.df['timestamp']).to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        return self.df[(times >= start) & (times < end)].reset_index(drop=True)
+
+def streaming(config=None):
+    engine = IndicatorEngine(config=config, backend='numpy')
+    resampler = TimeframeResampler(['1m'], '1s', engine=engine, buffer_size=10, history=40)
+    client = BinanceMultiStreamClient([('BTCUSDT', '1s')], buffer_size=40, resampler=resampler)
+    return client, resampler
+
+def feed(client, resampler, df):
+    for candle in df.to_dict('records'):
+        client.buffers[('BTCUSDT', '1s')].append(candle)
+        resampler.update('BTCUSDT', candle)
+
+def test_restored_state_continues_like_the_original(tmp_path):
+    end = int(time.time()) * 1000
+    df = candles(end - 400 * STEP, 400)
+    saved, later = df.iloc[:300], df.iloc[300:]
+    client, resampler = streaming()
+    feed(client, resampler, saved)
+    path = tmp_path / 'snapshot.npz'
+    save_snapshot(path, client, resampler)
+    feed(client, resampler, later)
+
+    restored_client, restored = streaming()
+    assert asyncio.run(restore_snapshot(path, restored_client, restored, fetcher=RangeFetcher(df)))
+
+    pd.testing.assert_frame_equal(restored.base_indicator_frame('BTCUSDT'), resampler.base_indicator_frame('BTCUSDT'))
+    pd.testing.assert_frame_equal(restored.indicator_frame('BTCUSDT', '1m'), resampler.indicator_frame('BTCUSDT', '1m'))
+    assert restored.partial('BTCUSDT', '1m') == resampler.partial('BTCUSDT', '1m')
+    pd.testing.assert_frame_equal(
+        restored_client.buffers[('BTCUSDT', '1s')].to_dataframe(),
+        client.buffers[('BTCUSDT', '1s')].to_dataframe()
+    )
+
+def test_snapshot_holds_no_pickles(tmp_path):
+    client, resampler = streaming()
+    feed(client, resampler, candles(int(time.time()) * 1000 - 100 * STEP, 100))
+    path = tmp_path / 'snapshot.npz'
+    save_snapshot(path, client, resampler)
+
+    with zipfile.ZipFile(path) as archive:
+        assert sorted(archive.namelist()) == ['buffer:BTCUSDT:1s.npy', 'state.npy']
+    with np.load(path, allow_pickle=False) as archive:
+        assert archive['buffer:BTCUSDT:1s'].shape == (40,)
+
+def test_other_parameters_are_a_cold_start(tmp_path):
+    client, resampler = streaming()
+    feed(client, resampler, candles(int(time.time()) * 1000 - 100 * STEP, 100))
+    path = tmp_path / 'snapshot.npz'
+    save_snapshot(path, client, resampler)
+
+    config = {name: dict(indicator.parameters) for name, indicator in resampler.engine.indicators.items()}
+    config['rsi']['period'] = 7
+    other_client, other = streaming(config)
+    assert not asyncio.run(restore_snapshot(path, other_client, other, fetcher=RangeFetcher(candles(0, 0))))
+    assert len(other_client.buffers[('BTCUSDT', '1s')]) == 0
@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import signals
+from store import CandleStore
+
+STEP = 60_000
+START = 1_700_000_040_000 // STEP * STEP
+
+class OutageFetcher:
+    """1m candles for every minute except those in `outage`, priced from
+    their open time so any range of them is the same history."""
+
+    def __init__(self, outage=()):
+        self.outage = set(outage)
+        self.calls = []
+
+    def fetch_range(self, symbol, interval, start, end):
+        self.calls.append((start, end))
+        times = np.array([t for t in range(start, end, STEP) if t not in self.outage], dtype=np.int64)
+        close = 100 + np.sin(times // STEP * 0.7) + np.cos(times // STEP * 0.13)
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(times, unit='ms'),
+            'open': close, 'high': close + 0.5, 'low': close - 0.5, 'close': close, 'volume': 1.0 + times // STEP % 5,
+            'trades_count': 1,
+        }, index=range(len(times)))
+
+def test_sync_fills_missing_ranges(tmp_path):
+    store = CandleStore(tmp_path)
+    fetcher = OutageFetcher()
+    store.write('BTCUSDT', '1m', fetcher.fetch_range('BTCUSDT', '1m', START + 10 * STEP, START + 20 * STEP))
+    fetcher.calls.clear()
+
+    written = store.sync(fetcher, 'BTCUSDT', '1m', START, START + 30 * STEP)
+
+    assert written == 20
+    assert fetcher.calls == [(START, START + 10 * STEP), (START + 20 * STEP, START + 30 * STEP)]
+    assert len(store.read('BTCUSDT', '1m', START, START + 30 * STEP)) == 30
+
+def test_sync_does_not_refetch_exchange_outages(tmp_path):
+    store = CandleStore(tmp_path)
+    outage = range(START + 5 * STEP, START + 8 * STEP, STEP)
+    fetcher = OutageFetcher(outage)
+
+    store.sync(fetcher, 'BTCUSDT', '1m', START, START + 20 * STEP)
+    assert store.empty_ranges('BTCUSDT', '1m') == [(START + 5 * STEP, START + 8 * STEP)]
+    assert store.missing_ranges('BTCUSDT', '1m', START, START + 20 * STEP) == []
+    assert store.missing_ranges('BTCUSDT', '1m', START, START + 20 * STEP, skip_empty=False) == [
+        (START + 5 * STEP, START + 8 * STEP)
+    ]
+
+    fetcher.calls.clear()
+    assert store.sync(fetcher, 'BTCUSDT', '1m', START, START + 30 * STEP) == 10
+    assert fetcher.calls == [(START + 20 * STEP, START + 30 * STEP)]
+
+def test_failed_fetch_is_retried(tmp_path):
+    class FailingFetcher(OutageFetcher):
+        def fetch_range(self, symbol, interval, start, end):
+            self.calls.append((start, end))
+            return None
+
+    store = CandleStore(tmp_path)
+    fetcher = FailingFetcher()
+    store.sync(fetcher, 'BTCUSDT', '1m', START, START + 10 * STEP)
+    assert store.empty_ranges('BTCUSDT', '1m') == []
+    assert store.missing_ranges('BTCUSDT', '1m', START, START + 10 * STEP) == [(START, START + 10 * STEP)]
+
+def test_run_cli_syncs_the_warm_up_before_start(tmp_path, monkeypatch):
+    config = json.loads((Path(__file__).parents[1] / 'config.json').read_text())
+    config['indicator_backend'] = 'numpy'
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps(config))
+    fetcher = OutageFetcher()
+    monkeypatch.setattr(signals, 'BinanceDataFetcher', lambda **kwargs: fetcher)
+    frames = []
+    generate_signals = signals.SignalGenerator.generate_signals
+    def record(self, df, *args, **kwargs):
+        frames.append(df)
+        return generate_signals(self, df, *args, **kwargs)
+    monkeypatch.setattr(signals.SignalGenerator, 'generate_signals', record)
+
+    start, end = START + 100 * STEP, START + 200 * STEP
+    assert signals.run_cli(symbol='BTCUSDT', interval='1m', config=str(config_path), save=False,
+                           store_dir=str(tmp_path / 'store'), start=start, end=end) == 0
+
+    df = frames[0]
+    generator = signals.SignalGenerator(config_path=str(config_path))
+    first = int(np.flatnonzero(pd.to_datetime(df['timestamp']) == pd.Timestamp(start, unit='ms'))[0])
+    assert first == generator.warmup_period()
+    indicators = generator.indicator_engine.calculate_all_indicators(df)
+    assert not indicators[['rsi', 'macd', 'signal', 'bb_width']].iloc[first].isna().any()
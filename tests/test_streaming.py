@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from indicators.engine import IndicatorEngine
+from indicators.streaming import RollingStats
+
+RTOL = 1e-9
+
+def candles(rows=5000, seed=13):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows))
+    # A flat run (zero deviation) and a rising run (no RSI losses).
+    close[1000:1100] = close[999]
+    close[2000:2100] = close[1999] + 0.1 * np.arange(1, 101)
+    volume = rng.uniform(5, 50, rows)
+    volume[3000:3060] = 20.0
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='s'),
+        'open': np.roll(close, 1), 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+        'volume': volume, 'trades_count': 1,
+    })
+
+def assert_rows_match(rows, expected):
+    assert list(rows.columns) == list(expected.columns)
+    for column in expected.columns:
+        if column == 'timestamp':
+            continue
+        left = expected[column].to_numpy(dtype=np.float64)
+        right = rows[column].to_numpy(dtype=np.float64)
+        finite = np.isfinite(left)
+        scale = max(float(np.abs(left[finite]).max()), 1.0) if finite.any() else 1.0
+        np.testing.assert_allclose(right, left, rtol=RTOL, atol=RTOL * scale, equal_nan=True, err_msg=column)
+
+def test_stream_matches_batch_indicators():
+    df = candles()
+    assert len(df) > RollingStats.rebuild_every
+    engine = IndicatorEngine(backend='numpy', cache_size=0)
+    expected = engine.calculate_all_indicators(df)
+    expected = expected.loc[:, ~expected.columns.duplicated()]
+    stream = engine.create_stream()
+    rows = pd.DataFrame([stream.update(candle) for candle in df.to_dict('records')])
+
+    assert_rows_match(rows, expected)
+    flat = slice(1000 + 19, 1100)
+    assert (rows['bb_width'].iloc[flat] == 0.0).all()
+    # Wilder smoothing never forgets the losses before the run, it decays them.
+    assert (np.diff(rows['rsi'].iloc[2000:2100]) > 0).all() and rows['rsi'].iloc[2099] > 99.8
+    assert (rows['vol_std'].iloc[3000 + 29:3060] == 0.0).all()
+
+def test_engine_update_continues_its_warm_up():
+    df = candles(seed=4).iloc[:600]
+    engine = IndicatorEngine(backend='numpy', cache_size=0)
+    expected = engine.calculate_all_indicators(df)
+    expected = expected.loc[:, ~expected.columns.duplicated()]
+    engine.warm_up(df.iloc[:400])
+    rows = pd.DataFrame([engine.update(candle) for candle in df.iloc[400:].to_dict('records')])
+
+    assert_rows_match(rows, expected.iloc[400:].reset_index(drop=True))
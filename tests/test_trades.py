@@ -0,0 +1,86 @@
+import asyncio
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from trades import BinanceAggTradeClient, TradeBarBuilder, read_trade_csv
+
+FIXTURES = Path(__file__).parent / "fixtures"
+T0 = 1_700_000_000_000
+
+# (offset ms, open, high, low, close, volume, trades_count) of the bars the
+# six recorded trades build; the last bar of each interval closes on flush.
+BARS = {
+    '100ms': [
+        (0, 100.0, 101.0, 99.5, 99.5, 3.5, 5),
+        (100, 100.5, 100.5, 100.5, 100.5, 1.0, 2),
+        (200, 102.0, 102.0, 102.0, 102.0, 0.25, 1),
+        (300, 102.0, 102.0, 102.0, 102.0, 0.0, 0),
+        (400, 102.0, 102.0, 102.0, 102.0, 0.0, 0),
+        (500, 102.0, 102.0, 102.0, 102.0, 0.0, 0),
+        (600, 101.5, 101.5, 101.5, 101.5, 1.5, 3),
+    ],
+    '250ms': [
+        (0, 100.0, 101.0, 99.5, 100.5, 4.5, 7),
+        (250, 102.0, 102.0, 102.0, 102.0, 0.25, 1),
+        (500, 101.5, 101.5, 101.5, 101.5, 1.5, 3),
+    ],
+}
+
+def rows(df):
+    return [
+        (int((row.timestamp - pd.Timestamp(T0, unit='ms')) / pd.Timedelta(milliseconds=1)),
+         row.open, row.high, row.low, row.close, row.volume, int(row.trades_count))
+        for row in df.itertuples()
+    ]
+
+def replay(name, flush=True):
+    client = BinanceAggTradeClient(['BTCUSDT'], intervals=('100ms', '250ms'), buffer_size=20)
+    count = asyncio.run(client.replay_file(FIXTURES / name, symbol='BTCUSDT', flush=flush))
+    assert count == 6
+    return client
+
+@pytest.mark.parametrize('name', ['btcusdt-aggtrades.csv', 'btcusdt-aggtrades.jsonl'])
+def test_replayed_trades_build_exact_bars(name):
+    client = replay(name)
+    for interval, expected in BARS.items():
+        assert rows(client.buffers[('BTCUSDT', interval)].to_dataframe()) == expected
+    assert client.latest_prices['BTCUSDT'] == 101.5
+
+def test_open_bars_stay_open_without_flush():
+    client = replay('btcusdt-aggtrades.csv', flush=False)
+    for interval, expected in BARS.items():
+        assert rows(client.buffers[('BTCUSDT', interval)].to_dataframe()) == expected[:-1]
+        assert client.builders[('BTCUSDT', interval)].partial()['trades_count'] == 3
+
+def test_trade_counts_span_aggregated_ids():
+    trades = read_trade_csv(FIXTURES / 'btcusdt-aggtrades.csv')
+    assert trades['trades_count'].tolist() == [1, 3, 1, 2, 1, 3]
+    assert trades['trade_time'].iloc[0] == T0 + 10
+
+def test_close_until_closes_and_fills_quiet_intervals():
+    builder = TradeBarBuilder('100ms')
+    builder.update(T0 + 10, 100.0, 1.0)
+    assert builder.close_until(T0 + 99) == []
+
+    closed = builder.close_until(T0 + 350)
+    assert [(bar['timestamp'], bar['volume']) for bar in closed] == [
+        (pd.Timestamp(T0, unit='ms'), 1.0),
+        (pd.Timestamp(T0 + 100, unit='ms'), 0.0),
+        (pd.Timestamp(T0 + 200, unit='ms'), 0.0),
+    ]
+    assert builder.partial() is None
+    # A trade in the interval close_until already passed starts the next bar.
+    assert builder.update(T0 + 420, 99.0, 2.0) == [{
+        'timestamp': pd.Timestamp(T0 + 300, unit='ms'),
+        'open': 100.0, 'high': 100.0, 'low': 100.0, 'close': 100.0, 'volume': 0.0, 'trades_count': 0,
+    }]
+    assert builder.partial()['open'] == 99.0
+
+def test_gaps_are_left_open_without_fill():
+    builder = TradeBarBuilder('100ms', fill_gaps=False)
+    builder.update(T0 + 10, 100.0, 1.0)
+    closed = builder.update(T0 + 310, 101.0, 1.0)
+    assert [bar['timestamp'] for bar in closed] == [pd.Timestamp(T0, unit='ms')]
+    assert builder.partial()['timestamp'] == pd.Timestamp(T0 + 300, unit='ms')